@@ -3,7 +3,12 @@ import { useLocation } from "react-router-dom";
 import { useAuth } from "@clerk/clerk-react";
 import Navbar from "../components/Navbar";
 import ExcelJS from "exceljs";
-import { createFileImport, getImportData } from "../services/fileImports";
+import {
+  CHUNKED_UPLOAD_MIN_VALUES,
+  createFileImport,
+  getImportData,
+  uploadFileImport,
+} from "../services/fileImports";
 
 // Constants for address parsing
 const US_COUNTRIES = [
@@ -401,26 +406,32 @@ const DataValidation: React.FC<DataValidationProps> = () => {
         return;
       }
 
-      // Prepare data for API call
+      // Prepare data for API call - rows are matched back by row_id, so the
+      // original columns don't need to make the round trip
       const addresses = data
         .map((row, index) => ({
           row_id: index,
           address: row[addressColIndex] || "",
-          original_row_data: Object.fromEntries(
-            headers.map((header, i) => [header, row[i] || ""])
-          ),
         }))
         .filter((item) => item.address.trim() !== ""); // Filter empty addresses
 
-      // Call backend API
+      // Call backend API - signed in with a project open, the batch's stats
+      // are recorded against the project
+      const token = projectId ? await getToken() : null;
+      const requestHeaders: Record<string, string> = {
+        "Content-Type": "application/json",
+      };
+      if (token) {
+        requestHeaders["Authorization"] = `Bearer ${token}`;
+      }
       const response = await fetch(`${API_BASE_URL}/parse-addresses`, {
         method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-        },
+        headers: requestHeaders,
         body: JSON.stringify({
           import_type: importType.toLowerCase(),
           addresses: addresses,
+          echo_row_data: false,
+          ...(token ? { project_id: projectId } : {}),
         }),
       });
 
@@ -784,8 +795,6 @@ const DataValidation: React.FC<DataValidationProps> = () => {
       // Save to database if projectId is available
       if (projectId && importType) {
         try {
-          const token = await getToken();
-
           // Extract relevant data based on import type
           const extractedData: {
             names?: string[];
@@ -830,16 +839,22 @@ const DataValidation: React.FC<DataValidationProps> = () => {
             }
           }
 
-          // Save to database
-          await createFileImport(
-            {
-              project_id: projectId,
-              import_type: importType.toLowerCase(),
-              filename: filename,
-              data: extractedData,
-            },
-            token
+          // Save to database - large imports go up in resumable chunks
+          const fileImport = {
+            project_id: projectId,
+            import_type: importType.toLowerCase(),
+            filename: filename,
+            data: extractedData,
+          };
+          const valueCount = Object.values(extractedData).reduce(
+            (total, values) => total + (values?.length ?? 0),
+            0
           );
+          if (valueCount > CHUNKED_UPLOAD_MIN_VALUES) {
+            await uploadFileImport(fileImport, getToken);
+          } else {
+            await createFileImport(fileImport, await getToken());
+          }
         } catch (dbErr) {
           console.error("Error saving to database:", dbErr);
           // Don't block the export if database save fails
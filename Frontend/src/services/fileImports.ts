@@ -12,6 +12,9 @@ export interface FileImportCreate {
     part_numbers?: string[];
     vendor_names?: string[];
   };
+  // "delta" keeps the existing import and only rewrites data types that changed
+  // (for large sets, only the segments holding added or removed values)
+  replace_mode?: "full" | "delta";
 }
 
 export interface ImportDataResponse {
@@ -19,6 +22,15 @@ export interface ImportDataResponse {
   values: string[];
 }
 
+export interface ImportDataPage {
+  data_type: string;
+  values: string[];
+  offset: number;
+  limit: number;
+  total: number;
+  next_offset: number | null;
+}
+
 /**
  * Create a file import record
  * @param data - File import data
@@ -34,6 +46,131 @@ export async function createFileImport(
   });
 }
 
+export interface ImportUpload {
+  id: string;
+  project_id: string;
+  import_type: string;
+  filename: string;
+  replace_mode: "full" | "delta";
+  status: "open" | "finalized";
+  received: number[];
+  value_count: number;
+  max_chunk_bytes: number;
+  file_import_id: string | null;
+}
+
+// Values per chunk for uploadFileImport; imports with more values than
+// CHUNKED_UPLOAD_MIN_VALUES should go through it instead of createFileImport
+export const UPLOAD_CHUNK_VALUES = 20000;
+export const CHUNKED_UPLOAD_MIN_VALUES = 50000;
+
+async function sha256Hex(text: string): Promise<string> {
+  const digest = await crypto.subtle.digest(
+    "SHA-256",
+    new TextEncoder().encode(text)
+  );
+  return Array.from(new Uint8Array(digest))
+    .map((byte) => byte.toString(16).padStart(2, "0"))
+    .join("");
+}
+
+function splitIntoChunks(
+  data: FileImportCreate["data"],
+  chunkSize: number
+): Record<string, string[]>[] {
+  const chunks: Record<string, string[]>[] = [];
+  let current: Record<string, string[]> = {};
+  let size = 0;
+  for (const [dataType, values] of Object.entries(data)) {
+    for (let start = 0; start < (values?.length ?? 0); ) {
+      const slice = values!.slice(start, start + chunkSize - size);
+      current[dataType] = slice;
+      size += slice.length;
+      start += slice.length;
+      if (size === chunkSize) {
+        chunks.push(current);
+        current = {};
+        size = 0;
+      }
+    }
+  }
+  if (size > 0) {
+    chunks.push(current);
+  }
+  return chunks;
+}
+
+/**
+ * Create a file import through a chunked upload. Failed chunks are retried
+ * after asking the server which ones it already has; re-sending a chunk is safe.
+ * A big upload can outlive a Clerk session token (~60s), so a fresh one is
+ * fetched for every request.
+ * @param data - File import data
+ * @param getToken - Returns a current Clerk session token (useAuth().getToken)
+ * @param chunkSize - Values per chunk
+ * @param retries - Attempts after the first failure
+ */
+export async function uploadFileImport(
+  data: FileImportCreate,
+  getToken: () => Promise<string | null>,
+  chunkSize: number = UPLOAD_CHUNK_VALUES,
+  retries: number = 3
+): Promise<void> {
+  const upload = await apiRequest<ImportUpload>(
+    "/api/import-uploads",
+    await getToken(),
+    {
+      method: "POST",
+      body: JSON.stringify({
+        project_id: data.project_id,
+        import_type: data.import_type,
+        filename: data.filename,
+        replace_mode: data.replace_mode ?? "full",
+      }),
+    }
+  );
+  const chunks = splitIntoChunks(data.data, chunkSize);
+
+  let received = new Set<number>();
+  for (let attempt = 0; ; attempt++) {
+    try {
+      for (let seq = 0; seq < chunks.length; seq++) {
+        if (received.has(seq)) continue;
+        const body = JSON.stringify(chunks[seq]);
+        const checksum = await sha256Hex(body);
+        await apiRequest(
+          `/api/import-uploads/${upload.id}/chunks/${seq}`,
+          await getToken(),
+          {
+            method: "PUT",
+            headers: { "X-Chunk-Checksum": checksum },
+            body,
+          }
+        );
+        received.add(seq);
+      }
+      break;
+    } catch (err) {
+      if (attempt >= retries) throw err;
+      const status = await getToken()
+        .then((token) =>
+          apiRequest<ImportUpload>(`/api/import-uploads/${upload.id}`, token)
+        )
+        .catch(() => null);
+      if (status) received = new Set(status.received);
+    }
+  }
+
+  await apiRequest<void>(
+    `/api/import-uploads/${upload.id}/finalize`,
+    await getToken(),
+    {
+      method: "POST",
+      body: JSON.stringify({ chunk_count: chunks.length }),
+    }
+  );
+}
+
 /**
  * Get import data for cross-validation
  * @param projectId - Project ID
@@ -43,10 +180,40 @@ export async function createFileImport(
 export async function getImportData(
   projectId: string,
   importType: string,
-  token: string | null
+  token: string | null,
+  dataType?: string
 ): Promise<ImportDataResponse[]> {
+  const query = dataType ? `?data_type=${encodeURIComponent(dataType)}` : "";
   return apiRequest<ImportDataResponse[]>(
-    `/api/file-imports/${projectId}/${importType}`,
+    `/api/file-imports/${projectId}/${importType}${query}`,
+    token
+  );
+}
+
+/**
+ * Get one page of values for a single data type
+ * @param projectId - Project ID
+ * @param importType - Import type to read from
+ * @param dataType - Data type (e.g., "vendor_names")
+ * @param offset - Index of the first value to return
+ * @param limit - Page size (max 10000)
+ * @param token - Clerk session token (from useAuth().getToken())
+ */
+export async function getImportDataPage(
+  projectId: string,
+  importType: string,
+  dataType: string,
+  offset: number,
+  limit: number,
+  token: string | null
+): Promise<ImportDataPage> {
+  const query = new URLSearchParams({
+    data_type: dataType,
+    offset: String(offset),
+    limit: String(limit),
+  });
+  return apiRequest<ImportDataPage>(
+    `/api/file-imports/${projectId}/${importType}/values?${query}`,
     token
   );
 }
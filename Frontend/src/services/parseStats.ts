@@ -0,0 +1,63 @@
+/**
+ * Parse statistics API service
+ */
+import apiRequest from "./api";
+
+export interface Percentiles {
+  p50: number;
+  p90: number;
+  p99: number;
+}
+
+export interface StatsBucket {
+  start: string;
+  batches: number;
+  rows: number;
+  success_rate: number;
+  rows_per_sec: number;
+}
+
+export interface StatsSummary {
+  batches: number;
+  rows: number;
+  success_rate: number;
+  rows_per_sec: Percentiles;
+  duration_ms: Percentiles;
+  batch_success_rate: Percentiles;
+  // Rows per overall confidence score 1-10 (index 0 is score 1)
+  confidence_histogram: number[];
+  paths: Record<string, number>;
+}
+
+export interface ParseStatsResponse {
+  project_id: string;
+  since: string;
+  bucket: "hour" | "day";
+  summary: StatsSummary;
+  series: StatsBucket[];
+}
+
+/**
+ * Get a project's parse/import batch stats as a time series plus percentiles
+ * @param projectId - Project ID
+ * @param token - Clerk session token (from useAuth().getToken())
+ * @param days - How far back to look (1-365)
+ * @param bucket - Time series bucket width
+ * @param source - Only "parse_addresses" or "file_import" batches
+ */
+export async function getParseStats(
+  projectId: string,
+  token: string | null,
+  days: number = 30,
+  bucket: "hour" | "day" = "day",
+  source?: "parse_addresses" | "file_import"
+): Promise<ParseStatsResponse> {
+  const query = new URLSearchParams({ days: String(days), bucket });
+  if (source) {
+    query.set("source", source);
+  }
+  return apiRequest<ParseStatsResponse>(
+    `/api/parse-stats/${projectId}?${query}`,
+    token
+  );
+}
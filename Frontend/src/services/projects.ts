@@ -19,6 +19,18 @@ export interface ProjectUpdate {
   name: string;
 }
 
+export interface ImportTypeSummary {
+  import_type: string;
+  filename: string;
+  exported_at: string | null;
+  value_counts: Record<string, number>;
+}
+
+export interface ProjectSummary {
+  project: Project;
+  imports: ImportTypeSummary[];
+}
+
 /**
  * Get all projects for the current user
  * @param token - Clerk session token (from useAuth().getToken())
@@ -39,6 +51,18 @@ export async function getProject(
   return apiRequest<Project>(`/api/projects/${projectId}`, token);
 }
 
+/**
+ * Get a project with the latest import per type and its value counts
+ * @param projectId - Project ID
+ * @param token - Clerk session token (from useAuth().getToken())
+ */
+export async function getProjectSummary(
+  projectId: string,
+  token: string | null
+): Promise<ProjectSummary> {
+  return apiRequest<ProjectSummary>(`/api/projects/${projectId}/summary`, token);
+}
+
 /**
  * Create a new project
  * @param data - Project data
@@ -84,3 +108,48 @@ export async function deleteProject(
     method: "DELETE",
   });
 }
+
+/**
+ * Create several projects in one request
+ * @param data - Projects to create
+ * @param token - Clerk session token (from useAuth().getToken())
+ */
+export async function bulkCreateProjects(
+  data: ProjectCreate[],
+  token: string | null
+): Promise<Project[]> {
+  return apiRequest<Project[]>("/api/projects/bulk", token, {
+    method: "POST",
+    body: JSON.stringify({ projects: data }),
+  });
+}
+
+/**
+ * Rename several projects in one request
+ * @param data - Project IDs with their new names
+ * @param token - Clerk session token (from useAuth().getToken())
+ */
+export async function bulkUpdateProjects(
+  data: { id: string; name: string }[],
+  token: string | null
+): Promise<Project[]> {
+  return apiRequest<Project[]>("/api/projects/bulk", token, {
+    method: "PUT",
+    body: JSON.stringify({ projects: data }),
+  });
+}
+
+/**
+ * Delete several projects (and their imports) in one request
+ * @param projectIds - Project IDs
+ * @param token - Clerk session token (from useAuth().getToken())
+ */
+export async function bulkDeleteProjects(
+  projectIds: string[],
+  token: string | null
+): Promise<void> {
+  return apiRequest<void>("/api/projects/bulk-delete", token, {
+    method: "POST",
+    body: JSON.stringify({ project_ids: projectIds }),
+  });
+}
@@ -0,0 +1,531 @@
+"""
+Address parsing pipeline: cleaning, libpostal parsing and US city correction
+
+pandas, libpostal and rapidfuzz are imported where they're first used rather
+than at module import, so workers (and cold starts) that never parse an
+address don't pay for them. That matters most for libpostal: importing
+postal.parser runs libpostal_setup_parser, i.e. loads the ~2GB model, so with
+PARSER_SERVICE_SOCKET set an API worker must never reach parse_with_libpostal
+(main.run_address_pipeline and main.run_cleaned_pipeline send that work to the
+service instead). warm_up() pulls them all in up front.
+"""
+import re
+import math
+from metrics import stage_timer, inc
+from parse_cache import get_parse_cache
+
+# Lazy load US cities database (only when needed)
+_cities_df = None
+_cities_by_state = None
+_state_name_to_code = None
+_state_code_to_name = None
+_city_priors = None
+_city_priors_by_state = None
+_zip_to_counties = None
+_city_sets_by_state = None
+
+# Ranking stage settings for correct_city_name
+CITY_CANDIDATE_LIMIT = 25  # fuzzy candidates handed to the ranking stage
+CITY_AGREEMENT_MARGIN = 15  # ZIP/county agreement only decides among candidates this close to the best score
+
+def _compute_city_prior(population, ranking):
+    """Precompute a 0–1 prior for a city from its population and ranking tier.
+
+    uscities.csv ranks cities 1 (most prominent) to 5; population is folded in on a
+    log scale so a 400k city outranks a 3k town without swamping everything else.
+    """
+    pop_score = min(math.log10(max(population, 1)) / 7.0, 1.0)
+    rank_score = (5 - min(max(ranking, 1), 5)) / 4.0
+    return round(0.7 * pop_score + 0.3 * rank_score, 4)
+
+def _load_cities_data():
+    """Load cities data on first access"""
+    global _cities_df, _cities_by_state, _state_name_to_code, _state_code_to_name
+    global _city_priors, _city_priors_by_state, _zip_to_counties, _city_sets_by_state
+    if _cities_df is None:
+        import pandas as pd
+        from pathlib import Path
+        csv_path = Path(__file__).parent / 'uscities.csv'
+        cities_df = pd.read_csv(csv_path, dtype={'zips': str})
+        _cities_by_state = cities_df.groupby('state_id')['city'].apply(list).to_dict()
+        _state_name_to_code = cities_df.set_index('state_name')['state_id'].to_dict()
+        _state_code_to_name = cities_df.set_index('state_id')['state_name'].to_dict()
+        # Exact-match sets for the correct_city_name fast path
+        _city_sets_by_state = {state: frozenset(cities) for state, cities in _cities_by_state.items()}
+
+        # Per-city priors, aligned with the row order of cities_df (national list)
+        # and with the per-state lists above, so fuzzy candidate indexes map straight
+        # onto their prior: (state_id, county_name, population, prior, zips)
+        _city_priors = []
+        _city_priors_by_state = {}
+        _zip_to_counties = {}
+        for state_id, county, population, ranking, zips in zip(
+            cities_df['state_id'], cities_df['county_name'], cities_df['population'],
+            cities_df['ranking'], cities_df['zips'].fillna(''),
+        ):
+            population = int(population) if not pd.isna(population) else 0
+            ranking = int(ranking) if not pd.isna(ranking) else 5
+            zip_set = frozenset(zips.split())
+            prior = (state_id, county, population, _compute_city_prior(population, ranking), zip_set)
+            _city_priors.append(prior)
+            _city_priors_by_state.setdefault(state_id, []).append(prior)
+            for z in zip_set:
+                _zip_to_counties.setdefault(z, set()).add((state_id, county))
+        _cities_df = cities_df
+    return _cities_df, _cities_by_state, _state_name_to_code, _state_code_to_name
+
+def get_cities_by_state():
+    _, cities_by_state, _, _ = _load_cities_data()
+    return cities_by_state
+
+def get_state_name_to_code():
+    _, _, state_name_to_code, _ = _load_cities_data()
+    return state_name_to_code
+
+def get_state_code_to_name():
+    _, _, _, state_code_to_name = _load_cities_data()
+    return state_code_to_name
+
+def get_all_cities():
+    cities_df, _, _, _ = _load_cities_data()
+    return cities_df['city'].tolist()
+
+def get_city_set(state_code):
+    """Frozen set of the exact city names in a state (empty if unknown)."""
+    _load_cities_data()
+    return _city_sets_by_state.get(state_code, frozenset())
+
+def get_city_priors(state_code=None):
+    """Priors aligned with get_all_cities() (or get_cities_by_state()[state_code])."""
+    _load_cities_data()
+    if state_code:
+        return _city_priors_by_state.get(state_code, [])
+    return _city_priors
+
+def get_zip_counties(zip_code):
+    """Return the {(state_id, county_name)} pairs served by a 5-digit ZIP."""
+    _load_cities_data()
+    if not zip_code:
+        return set()
+    return _zip_to_counties.get(str(zip_code).strip()[:5], set())
+
+def clean_address_text(text: str) -> str:
+    """Remove non-address noise and normalize tokens before parsing."""
+    t = text.strip()
+
+    # Strip common prefixes / noise
+    t = re.sub(r'(?i)\battn:?|attention\b', '', t)
+
+    # Remove phone numbers and extensions (x304, ext. 55)
+    t = re.sub(r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', '', t)
+    t = re.sub(r'(?i)\b(?:x|ext\.?)\s*\d{1,5}\b', '', t)
+
+    # Remove hours like 7am-8pm
+    t = re.sub(r'(?i)\b\d{1,2}\s?(am|pm)\s?-\s?\d{1,2}\s?(am|pm)\b', '', t)
+
+    # Normalize country tokens and common misspellings
+    t = re.sub(r'(?i)\bU\.?\s*S\.?\s*A\.?\b', 'USA', t)
+    t = re.sub(r'(?i)\bpheonix\b', 'Phoenix', t)
+
+    # Drop stray punctuation (keep commas), collapse whitespace, tidy commas
+    t = re.sub(r'[^\w\s,]', ' ', t)
+    t = re.sub(r'\s*,\s*', ', ', t)
+    t = re.sub(r'\s{2,}', ' ', t)
+
+    return t.strip(' ,.-')
+
+# --- Country pre-detection ---
+# Trailing tokens -> country. Only full names (plus USA/US/UK): two-letter tokens
+# such as CA, GA or IN are US state codes far more often than countries here.
+COUNTRY_ALIASES = {
+    "USA": "USA", "US": "USA", "UNITED STATES": "USA", "UNITED STATES OF AMERICA": "USA",
+    "NEW MEXICO": "USA",  # otherwise the trailing "MEXICO" would win
+    "CANADA": "Canada",
+    "MEXICO": "Mexico", "UK": "United Kingdom", "UNITED KINGDOM": "United Kingdom",
+    "GREAT BRITAIN": "United Kingdom", "ENGLAND": "United Kingdom", "SCOTLAND": "United Kingdom",
+    "WALES": "United Kingdom", "NORTHERN IRELAND": "United Kingdom", "IRELAND": "Ireland",
+    "GERMANY": "Germany", "DEUTSCHLAND": "Germany", "FRANCE": "France", "SPAIN": "Spain",
+    "ITALY": "Italy", "PORTUGAL": "Portugal", "NETHERLANDS": "Netherlands", "BELGIUM": "Belgium",
+    "SWITZERLAND": "Switzerland", "AUSTRIA": "Austria", "SWEDEN": "Sweden", "NORWAY": "Norway",
+    "DENMARK": "Denmark", "FINLAND": "Finland", "POLAND": "Poland", "CZECH REPUBLIC": "Czech Republic",
+    "AUSTRALIA": "Australia", "NEW ZEALAND": "New Zealand", "JAPAN": "Japan", "CHINA": "China",
+    "HONG KONG": "Hong Kong", "TAIWAN": "Taiwan", "SOUTH KOREA": "South Korea", "KOREA": "South Korea",
+    "SINGAPORE": "Singapore", "MALAYSIA": "Malaysia", "THAILAND": "Thailand", "VIETNAM": "Vietnam",
+    "PHILIPPINES": "Philippines", "INDONESIA": "Indonesia", "INDIA": "India", "ISRAEL": "Israel",
+    "UNITED ARAB EMIRATES": "United Arab Emirates", "UAE": "United Arab Emirates",
+    "SOUTH AFRICA": "South Africa", "BRAZIL": "Brazil", "ARGENTINA": "Argentina", "CHILE": "Chile",
+    "COLOMBIA": "Colombia", "PERU": "Peru",
+}
+
+CANADIAN_PROVINCES = {
+    "ALBERTA": "AB", "BRITISH COLUMBIA": "BC", "MANITOBA": "MB", "NEW BRUNSWICK": "NB",
+    "NEWFOUNDLAND AND LABRADOR": "NL", "NEWFOUNDLAND": "NL", "NOVA SCOTIA": "NS",
+    "NORTHWEST TERRITORIES": "NT", "NUNAVUT": "NU", "ONTARIO": "ON", "PRINCE EDWARD ISLAND": "PE",
+    "QUEBEC": "QC", "QUÉBEC": "QC", "SASKATCHEWAN": "SK", "YUKON": "YT",
+}
+_CANADIAN_PROVINCE_CODES = frozenset(CANADIAN_PROVINCES.values())
+# First letter of a postal code (forward sortation area) -> province; X is shared by NT and NU
+_POSTCODE_PROVINCES = {
+    "A": "NL", "B": "NS", "C": "PE", "E": "NB", "G": "QC", "H": "QC", "J": "QC", "K": "ON",
+    "L": "ON", "M": "ON", "N": "ON", "P": "ON", "R": "MB", "S": "SK", "T": "AB", "V": "BC", "Y": "YT",
+}
+
+_CA_POSTCODE = re.compile(r'\b([ABCEGHJ-NPRSTVXY]\d[ABCEGHJ-NPRSTV-Z])\s?(\d[ABCEGHJ-NPRSTV-Z]\d)\b', re.IGNORECASE)
+_UK_POSTCODE_END = re.compile(r'\b[A-Z]{1,2}\d[A-Z\d]?\s?\d[A-Z]{2}$', re.IGNORECASE)
+_US_STATE_ZIP_END = re.compile(r'\b[A-Z]{2},?\s+\d{5}(?:-\d{4})?$', re.IGNORECASE)
+
+def detect_country(text: str):
+    """Cheap guess at the country of a cleaned address, from its end.
+
+    Looks at trailing country names and at postcode shapes (Canadian A1A 1A1,
+    UK postcodes, US "ST 12345"). Returns "USA", "Canada", another country
+    name, or None when there's nothing to go on.
+    """
+    tail = text.upper().rstrip(' ,')
+    words = tail.replace(',', ' ').split()
+    for n in (4, 3, 2, 1):
+        if len(words) >= n:
+            country = COUNTRY_ALIASES.get(" ".join(words[-n:]))
+            if country:
+                return country
+    if _US_STATE_ZIP_END.search(tail):
+        return "USA"
+    if _CA_POSTCODE.search(tail[-24:]):
+        return "Canada"
+    if _UK_POSTCODE_END.search(tail):
+        return "United Kingdom"
+    return None
+
+def international_result(text: str, country: str) -> dict:
+    """Lightweight result for addresses outside the US and Canada: no libpostal, no city matching"""
+    return {"Street": text.strip(), "City": "", "State": "", "Zip": "", "Country": country}
+
+def normalize_canadian(result: dict, text: str) -> dict:
+    """Province codes, A1A 1A1 postcodes and casing for a libpostal-parsed Canadian address"""
+    postcode = _CA_POSTCODE.search(result.get("Zip") or "") or _CA_POSTCODE.search(text)
+    if postcode:
+        result["Zip"] = f"{postcode.group(1)} {postcode.group(2)}".upper()
+
+    province = (result.get("State") or "").upper()
+    province = CANADIAN_PROVINCES.get(province, province)
+    if province not in _CANADIAN_PROVINCE_CODES and postcode:
+        province = _POSTCODE_PROVINCES.get(result["Zip"][0], province)
+    result["State"] = province
+
+    if result.get("City"):
+        result["City"] = result["City"].title()
+    result["Country"] = "Canada"
+    return result
+
+# libpostal component -> our address field
+LIBPOSTAL_COMPONENT_MAPPING = {
+    "house_number": "Street",
+    "road": "Street",
+    "unit": "Street",
+    "suburb": "City",
+    "city": "City",
+    "state": "State",
+    "postcode": "Zip",
+    "country": "Country"
+}
+
+def parse_with_libpostal(text: str) -> dict:
+    # The first import of postal.parser loads libpostal's model
+    from postal.parser import parse_address
+    parsed_pairs = parse_address(text)
+    result = {"Street": "", "City": "", "State": "", "Zip": "", "Country": ""}
+    mapping = LIBPOSTAL_COMPONENT_MAPPING
+
+    # if Libpostal returns nothing, parsed_pairs will be empty list
+    if parsed_pairs:
+        for val, comp in parsed_pairs:  # Note: postal returns (value, component)
+            if comp in mapping:
+                key = mapping[comp]
+                if result[key]:  # If there's already content, add a space
+                    result[key] = f"{result[key]} {val}".strip()
+                else:  # If empty, just set the value
+                    result[key] = val.strip()
+
+    # Check if this is an international address
+    country = result.get("Country", "").upper()
+    is_international = country and country not in ['USA', 'US', 'UNITED STATES', 'U.S.A.', 'U.S.', '']
+    
+    if is_international:
+        if country == "CANADA":
+            # For Canada: use libpostal parsing but skip US city matching
+            # Keep the parsed components as-is (libpostal handles Canadian addresses well)
+            # No additional processing needed - result already has parsed components
+            pass
+        else:
+            # For other international addresses: keep everything in Street field
+            result = {
+                "Street": text.strip(),  # Keep original address
+                "City": "",
+                "State": "", 
+                "Zip": "",
+                "Country": result["Country"]  # Keep the detected country
+            }
+    else:
+        # For US addresses: use existing enhanced parsing logic
+        
+        # ✅ fallback runs when result is still empty
+        if not any(result.values()):
+            m = re.search(
+                r'(\d{1,5}\s+[A-Za-z0-9\s]+?)\s+([A-Za-z][A-Za-z\s]+?)\s+([A-Za-z]{2})[,\s]+(\d{5}(?:-\d{4})?)',
+                text,
+                flags=re.IGNORECASE,
+            )
+            if m:
+                street, city, state, z = m.groups()
+                result["Street"] = street.strip()
+                result["City"] = city.strip().title()
+                result["State"] = state.upper()
+                result["Zip"] = z
+                if re.search(r'\bUSA\b', text, flags=re.IGNORECASE):
+                    result["Country"] = "USA"
+
+        # Final normalization for casing/labels (US addresses only)
+        if result["City"]:
+            result["City"] = result["City"].title()
+        if result["State"]:
+            result["State"] = result["State"].upper()
+        if result["Country"]:
+            if re.search(r'(?i)\b(usa|u\.s\.a|united states|us)\b', result["Country"], flags=re.IGNORECASE):
+                result["Country"] = "USA"
+            else:
+                result["Country"] = result["Country"].title()
+
+    return result
+
+def get_confidence_score(parsed):
+    """Compute a 1–10 confidence score."""
+    score = 0
+    if parsed.get("Street"): score += 3
+    if parsed.get("City"): score += 2
+    if parsed.get("State"): score += 2
+    if parsed.get("Zip"): score += 2
+    if parsed.get("Country"): score += 1
+    return min(score, 10)
+
+def _rank_city_candidates(city, candidates, priors, zip_code=None):
+    """Pick the best fuzzy candidate using precomputed priors.
+
+    Only candidates within CITY_AGREEMENT_MARGIN of the best fuzzy score are
+    considered, so a ZIP can't pull the match over to a badly spelled city.
+    Among those, ZIP agreement (the city itself serves the ZIP) wins, then
+    county agreement (same county as the ZIP), then fuzzy score, closeness of
+    the full string, prior and finally population. This is what makes a bare
+    "Springfield" - or a misspelled "Portlnd" next to a Portland ZIP - resolve
+    to the right city instead of whichever row scores or sorts first.
+    """
+    from rapidfuzz import fuzz
+    zip5 = str(zip_code).strip()[:5] if zip_code else ""
+    zip_counties = get_zip_counties(zip5) if zip5 else set()
+    best_score = max(score for _, score, _ in candidates)
+
+    def rank_key(candidate):
+        name, score, idx = candidate
+        state_id, county, population, prior, zips = priors[idx]
+        if zip5 and zip5 in zips:
+            agreement = 2
+        elif (state_id, county) in zip_counties:
+            agreement = 1
+        else:
+            agreement = 0
+        return (agreement, score, fuzz.ratio(city, name), prior, population)
+
+    close = [c for c in candidates if c[1] >= best_score - CITY_AGREEMENT_MARGIN]
+    return max(close, key=rank_key)
+
+def correct_city_name(city, state=None, zip_code=None):
+    """Enhanced city matching with state-specific lookup for better accuracy."""
+    if not city:
+        return city, 0
+    from rapidfuzz import process, fuzz
+    
+    # Normalize state code (handle both full names and abbreviations)
+    state_code = None
+    if state:
+        state_upper = state.upper()
+        cities_by_state = get_cities_by_state()
+        state_name_to_code = get_state_name_to_code()
+        # Check if it's already a state code
+        if state_upper in cities_by_state:
+            state_code = state_upper
+        # Check if it's a state name that needs conversion
+        elif state_upper in state_name_to_code:
+            state_code = state_name_to_code[state_upper]
+        # Try common state name variations
+        elif state_upper in ['CALIFORNIA', 'CA']:
+            state_code = 'CA'
+        elif state_upper in ['TEXAS', 'TX']:
+            state_code = 'TX'
+        elif state_upper in ['NEW YORK', 'NY']:
+            state_code = 'NY'
+        # Add more common mappings as needed
+    
+    # Fast path: already an exact, correctly cased city in that state - skip fuzzy matching
+    if state_code and city in get_city_set(state_code):
+        inc("city_exact_total")
+        return city, 100
+
+    # If we have a valid state, search only within that state
+    cities_by_state = get_cities_by_state()
+    if state_code and state_code in cities_by_state:
+        with stage_timer("city_state"):
+            state_cities = cities_by_state[state_code]
+            candidates = process.extract(
+                city, state_cities, scorer=fuzz.partial_ratio,
+                limit=CITY_CANDIDATE_LIMIT, score_cutoff=60,
+            )
+            candidates = [c for c in candidates if c[1] > 60]  # Higher threshold for state-specific matching
+            if candidates:
+                match = _rank_city_candidates(city, candidates, get_city_priors(state_code), zip_code)
+                return match[0], match[1]
+    
+    # Fallback: search all cities if no state or no good match found
+    inc("city_fallback_total")
+    with stage_timer("city_national"):
+        all_cities = get_all_cities()
+        candidates = process.extract(
+            city, all_cities, scorer=fuzz.partial_ratio,
+            limit=CITY_CANDIDATE_LIMIT, score_cutoff=50,
+        )
+        candidates = [c for c in candidates if c[1] > 50]  # Lower threshold for fallback
+        if candidates:
+            match = _rank_city_candidates(city, candidates, get_city_priors(), zip_code)
+            return match[0], match[1]
+    
+    return city, 0
+
+def warm_up():
+    """Load libpostal's model and the city index so the first request isn't cold."""
+    _load_cities_data()
+    # The model loads when postal.parser is first imported; parsing once also
+    # runs the rest of the path (component mapping, city correction) before traffic
+    parse_with_libpostal("123 Main St Springfield IL 62701 USA")
+    correct_city_name("Springfield", "IL", "62701")
+
+def _parse_cleaned(cleaned: str):
+    """libpostal + city correction for an already-cleaned address.
+
+    Addresses that are recognisably outside the US skip the US-specific work:
+    other countries skip libpostal too, Canada is parsed but checked against
+    its province index instead of the US city list.
+    """
+    country = detect_country(cleaned)
+    if country not in (None, "USA", "Canada"):
+        inc("international_total")
+        return international_result(cleaned, country), 0
+
+    with stage_timer("libpostal"):
+        parsed = parse_with_libpostal(cleaned)
+
+    if country == "Canada" or parsed.get("Country", "").upper() == "CANADA":
+        inc("international_total")
+        return normalize_canadian(parsed, cleaned), 0
+    if not parsed.get("City"):
+        return parsed, 0  # nothing to correct (including international rows libpostal caught)
+
+    # Fuzzy-correct city if needed (pass state for state-specific matching)
+    parsed["City"], city_conf = correct_city_name(
+        parsed.get("City", ""), parsed.get("State", ""), parsed.get("Zip", "")
+    )
+    return parsed, city_conf
+
+def parse_and_correct(text: str):
+    """Run the full pipeline on one raw address.
+
+    Returns (cleaned, parsed, city_confidence) with parsed["City"] already corrected.
+    """
+    with stage_timer("clean"):
+        cleaned = clean_address_text(text)
+    parsed, city_conf = _parse_cleaned(cleaned)
+    return cleaned, parsed, city_conf
+
+def clean_many(texts):
+    """Clean a batch of raw addresses; a row that fails to clean gets its Exception instead"""
+    cleaned_texts = []
+    for text in texts:
+        try:
+            with stage_timer("clean"):
+                cleaned_texts.append(clean_address_text(text))
+        except Exception as e:
+            cleaned_texts.append(e)
+    return cleaned_texts
+
+def lookup_cached(cleaned_texts):
+    """{cleaned: (parsed, city_confidence)} for the strings already in the parse cache"""
+    cache = get_parse_cache()
+    if cache is None:
+        return {}
+    unique_texts = {cleaned for cleaned in cleaned_texts if not isinstance(cleaned, Exception)}
+    try:
+        with stage_timer("cache"):
+            return cache.get_many(unique_texts)
+    except Exception as e:
+        print(f"Parse cache lookup failed: {str(e)}")
+        return {}
+
+def parse_cleaned_many(cleaned_texts):
+    """Parse unique cleaned strings: {cleaned: (parsed, city_confidence) or Exception}.
+
+    What was computed is stored in the parse cache (when there is one).
+    """
+    unique_results = {}
+    computed = {}
+    for cleaned in cleaned_texts:
+        if cleaned in unique_results:
+            continue
+        try:
+            unique_results[cleaned] = computed[cleaned] = _parse_cleaned(cleaned)
+        except Exception as e:
+            unique_results[cleaned] = e
+
+    cache = get_parse_cache()
+    if cache is not None and computed:
+        try:
+            with stage_timer("cache"):
+                cache.put_many(computed)
+        except Exception as e:
+            print(f"Parse cache write failed: {str(e)}")
+    return unique_results
+
+def fan_out(cleaned_texts, unique_results):
+    """Per-row results from the per-unique-string ones.
+
+    Duplicates share the same parsed dict instead of a copy per row.
+    """
+    results = []
+    for cleaned in cleaned_texts:
+        if isinstance(cleaned, Exception):
+            results.append(cleaned)
+            continue
+        result = unique_results[cleaned]
+        if isinstance(result, Exception):
+            results.append(result)
+        else:
+            parsed, city_conf = result
+            results.append((cleaned, parsed, city_conf))
+    return results
+
+def parse_and_correct_many(texts):
+    """Run the pipeline over a batch of raw addresses.
+
+    Rows are cleaned first and libpostal/city correction run once per unique
+    cleaned string, so duplicates (and rows that only differ by noise such as
+    phone numbers or hours) share one parse. With PARSE_CACHE_PATH set,
+    strings parsed before (by any worker, before any restart) come from the
+    on-disk cache instead. Each entry is either a
+    (cleaned, parsed, city_confidence) tuple or the Exception raised for that
+    row, so one bad row doesn't sink the batch. Duplicate rows share the same
+    parsed dict, so callers must not mutate it.
+    """
+    cleaned_texts = clean_many(texts)
+    unique_results = lookup_cached(cleaned_texts)
+    misses = [
+        cleaned for cleaned in dict.fromkeys(cleaned_texts)
+        if not isinstance(cleaned, Exception) and cleaned not in unique_results
+    ]
+    unique_results.update(parse_cleaned_many(misses))
+    return fan_out(cleaned_texts, unique_results)
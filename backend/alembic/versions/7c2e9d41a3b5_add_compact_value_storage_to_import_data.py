@@ -0,0 +1,55 @@
+"""Add compact value storage to import_data
+
+Revision ID: 7c2e9d41a3b5
+Revises: 11679b22f776
+Create Date: 2026-10-19 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e9d41a3b5'
+down_revision: Union[str, Sequence[str], None] = '11679b22f776'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('import_data', sa.Column('values_blob', sa.LargeBinary(), nullable=True))
+    op.add_column('import_data', sa.Column('value_count', sa.Integer(), nullable=True))
+    op.alter_column('import_data', 'values',
+               existing_type=postgresql.ARRAY(sa.String()),
+               nullable=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Expand compact rows back into arrays before values becomes NOT NULL again
+    from value_codec import CompactValues
+
+    bind = op.get_bind()
+    import_data = sa.table(
+        'import_data',
+        sa.column('id', sa.UUID()),
+        sa.column('values', postgresql.ARRAY(sa.String())),
+        sa.column('values_blob', sa.LargeBinary()),
+    )
+    rows = bind.execute(
+        sa.select(import_data.c.id, import_data.c.values_blob).where(import_data.c['values'].is_(None))
+    ).fetchall()
+    for row_id, blob in rows:
+        bind.execute(
+            import_data.update()
+            .where(import_data.c.id == row_id)
+            .values({'values': list(CompactValues(blob)) if blob else []})
+        )
+    op.alter_column('import_data', 'values',
+               existing_type=postgresql.ARRAY(sa.String()),
+               nullable=False)
+    op.drop_column('import_data', 'value_count')
+    op.drop_column('import_data', 'values_blob')
@@ -0,0 +1,48 @@
+"""Add parse session tables
+
+Revision ID: a3d6e8f1c2b7
+Revises: f7b3d19e4a52
+Create Date: 2026-10-20 14:12:40.318275
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d6e8f1c2b7'
+down_revision: Union[str, Sequence[str], None] = 'f7b3d19e4a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('parse_sessions',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('import_type', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_parse_sessions_user_id'), 'parse_sessions', ['user_id'], unique=False)
+    op.create_table('parse_session_rows',
+    sa.Column('session_id', sa.UUID(), nullable=False),
+    sa.Column('row_id', sa.BigInteger(), nullable=False),
+    sa.Column('content_hash', sa.String(), nullable=False),
+    sa.Column('success', sa.Boolean(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['session_id'], ['parse_sessions.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('session_id', 'row_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('parse_session_rows')
+    op.drop_index(op.f('ix_parse_sessions_user_id'), table_name='parse_sessions')
+    op.drop_table('parse_sessions')
@@ -0,0 +1,38 @@
+"""Add ON DELETE CASCADE to foreign keys
+
+Revision ID: b4f1c8a2d9e6
+Revises: 7c2e9d41a3b5
+Create Date: 2026-10-19 17:08:21.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f1c8a2d9e6'
+down_revision: Union[str, Sequence[str], None] = '7c2e9d41a3b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (constraint name, source table, referred table, local column)
+FOREIGN_KEYS = [
+    ('projects_user_id_fkey', 'projects', 'users', 'user_id'),
+    ('file_imports_project_id_fkey', 'file_imports', 'projects', 'project_id'),
+    ('import_data_file_import_id_fkey', 'import_data', 'file_imports', 'file_import_id'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, source, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_='foreignkey')
+        op.create_foreign_key(name, source, referent, [column], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, source, referent, column in FOREIGN_KEYS:
+        op.drop_constraint(name, source, type_='foreignkey')
+        op.create_foreign_key(name, source, referent, [column], ['id'])
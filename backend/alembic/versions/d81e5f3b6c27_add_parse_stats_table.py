@@ -0,0 +1,43 @@
+"""Add parse_stats table
+
+Revision ID: d81e5f3b6c27
+Revises: b4f1c8a2d9e6
+Create Date: 2026-10-19 17:52:36.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81e5f3b6c27'
+down_revision: Union[str, Sequence[str], None] = 'b4f1c8a2d9e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('parse_stats',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('source', sa.String(), nullable=False),
+    sa.Column('import_type', sa.String(), nullable=True),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('success_count', sa.Integer(), nullable=False),
+    sa.Column('error_count', sa.Integer(), nullable=False),
+    sa.Column('duration_ms', sa.Integer(), nullable=False),
+    sa.Column('details', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_parse_stats_project_id_created_at', 'parse_stats', ['project_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_parse_stats_project_id_created_at', table_name='parse_stats')
+    op.drop_table('parse_stats')
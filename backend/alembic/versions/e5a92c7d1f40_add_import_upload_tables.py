@@ -0,0 +1,63 @@
+"""Add import upload tables
+
+Revision ID: e5a92c7d1f40
+Revises: d81e5f3b6c27
+Create Date: 2026-10-19 19:08:14.502731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a92c7d1f40'
+down_revision: Union[str, Sequence[str], None] = 'd81e5f3b6c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('import_uploads',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('project_id', sa.UUID(), nullable=False),
+    sa.Column('import_type', sa.String(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('replace_mode', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('file_import_id', sa.UUID(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['file_import_id'], ['file_imports.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_uploads_project_id'), 'import_uploads', ['project_id'], unique=False)
+    op.create_table('import_upload_chunks',
+    sa.Column('upload_id', sa.UUID(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(), nullable=False),
+    sa.Column('value_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['upload_id'], ['import_uploads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('upload_id', 'seq')
+    )
+    op.create_table('import_upload_values',
+    sa.Column('upload_id', sa.UUID(), nullable=False),
+    sa.Column('data_type', sa.String(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Text(), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['import_uploads.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('upload_id', 'data_type', 'seq', 'position')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('import_upload_values')
+    op.drop_table('import_upload_chunks')
+    op.drop_index(op.f('ix_import_uploads_project_id'), table_name='import_uploads')
+    op.drop_table('import_uploads')
@@ -0,0 +1,99 @@
+"""Split compact import data values into segments
+
+Revision ID: f7b3d19e4a52
+Revises: e5a92c7d1f40
+Create Date: 2026-10-20 09:41:27.330918
+
+"""
+import json
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b3d19e4a52'
+down_revision: Union[str, Sequence[str], None] = 'e5a92c7d1f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEGMENT_SIZE = 4096  # IMPORT_SEGMENT_SIZE default when this migration was written
+
+import_data = sa.table(
+    'import_data',
+    sa.column('id', sa.UUID()),
+    sa.column('values_blob', sa.LargeBinary()),
+)
+segments = sa.table(
+    'import_data_segments',
+    sa.column('id', sa.UUID()),
+    sa.column('import_data_id', sa.UUID()),
+    sa.column('first_value', sa.Text()),
+    sa.column('value_count', sa.Integer()),
+    sa.column('checksum', sa.String()),
+    sa.column('values_blob', sa.LargeBinary()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    import uuid
+    from value_codec import CompactValues, encode_values
+
+    op.create_table('import_data_segments',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('import_data_id', sa.UUID(), nullable=False),
+    sa.Column('first_value', sa.Text(), nullable=False),
+    sa.Column('value_count', sa.Integer(), nullable=False),
+    sa.Column('checksum', sa.String(), nullable=False),
+    sa.Column('values_blob', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['import_data_id'], ['import_data.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_import_data_segments_import_data_id'), 'import_data_segments', ['import_data_id'], unique=False)
+
+    # Re-encode each single compact blob as segments, one row at a time
+    bind = op.get_bind()
+    row_ids = bind.execute(
+        sa.select(import_data.c.id).where(import_data.c.values_blob.isnot(None))
+    ).scalars().all()
+    for row_id in row_ids:
+        blob = bind.execute(
+            sa.select(import_data.c.values_blob).where(import_data.c.id == row_id)
+        ).scalar()
+        values = list(CompactValues(blob))
+        for start in range(0, len(values), SEGMENT_SIZE):
+            chunk = values[start:start + SEGMENT_SIZE]
+            bind.execute(segments.insert().values(
+                id=uuid.uuid4(),
+                import_data_id=row_id,
+                first_value=chunk[0],
+                value_count=len(chunk),
+                checksum=hashlib.blake2b(json.dumps(chunk).encode(), digest_size=16).hexdigest(),
+                values_blob=encode_values(chunk),
+            ))
+    op.drop_column('import_data', 'values_blob')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    from value_codec import CompactValues, encode_values
+
+    op.add_column('import_data', sa.Column('values_blob', sa.LargeBinary(), nullable=True))
+
+    # Join each row's segments back into a single compact blob
+    bind = op.get_bind()
+    row_ids = bind.execute(sa.select(segments.c.import_data_id).distinct()).scalars().all()
+    for row_id in row_ids:
+        values = []
+        for (blob,) in bind.execute(
+            sa.select(segments.c.values_blob).where(segments.c.import_data_id == row_id)
+        ):
+            values.extend(CompactValues(blob))
+        bind.execute(
+            import_data.update().where(import_data.c.id == row_id).values(values_blob=encode_values(values))
+        )
+    op.drop_index(op.f('ix_import_data_segments_import_data_id'), table_name='import_data_segments')
+    op.drop_table('import_data_segments')
@@ -2,15 +2,12 @@
 Clerk authentication utilities for FastAPI
 """
 import os
+import time
 from pathlib import Path
 from dotenv import load_dotenv
 import httpx
-from fastapi import HTTPException, Depends
+from fastapi import HTTPException, Depends, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from cryptography.hazmat.primitives.asymmetric import rsa
-from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import serialization
 import base64
 import json
 from typing import Optional
@@ -25,12 +22,24 @@ load_dotenv(dotenv_path=BASE_DIR / ".env")
 CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY", "")
 CLERK_PUBLISHABLE_KEY = os.getenv("CLERK_PUBLISHABLE_KEY", "")
 
+CLERK_JWKS_TTL = float(os.getenv("CLERK_JWKS_TTL", "3600"))  # seconds a fetched JWKS is reused
+
 # HTTP Bearer token security scheme
 security = HTTPBearer()
+# Same, for routes where signing in is optional
+optional_security = HTTPBearer(auto_error=False)
+
+
+# jwks_url -> (fetched at, JWKS)
+_jwks_cache = {}
 
 
-async def get_clerk_jwks():
-    """Fetch Clerk's JWKS (JSON Web Key Set) for token verification"""
+async def get_clerk_jwks(refresh: bool = False):
+    """Fetch Clerk's JWKS (JSON Web Key Set) for token verification.
+
+    Kept for CLERK_JWKS_TTL seconds so verifying a token doesn't cost a
+    request to Clerk; refresh=True refetches (e.g. for a rotated key).
+    """
     # Try to get JWKS URL from environment first
     jwks_url = os.getenv("CLERK_JWKS_URL")
     
@@ -47,13 +56,19 @@ async def get_clerk_jwks():
                        "Format: https://<your-instance>.clerk.accounts.dev/.well-known/jwks.json"
             )
     
+    cached = _jwks_cache.get(jwks_url)
+    if cached and not refresh and time.monotonic() - cached[0] < CLERK_JWKS_TTL:
+        return cached[1]
+
     async with httpx.AsyncClient() as client:
         response = await client.get(jwks_url)
         if response.status_code != 200:
             raise HTTPException(
                 status_code=500, detail=f"Failed to fetch Clerk JWKS from {jwks_url}"
             )
-        return response.json()
+        jwks = response.json()
+    _jwks_cache[jwks_url] = (time.monotonic(), jwks)
+    return jwks
 
 
 async def verify_clerk_token(
@@ -71,6 +86,13 @@ async def verify_clerk_token(
     Raises:
         HTTPException: If token is invalid or missing
     """
+    # jose/cryptography are only needed once a token is actually checked;
+    # importing them here keeps them off the worker's startup path
+    from jose import jwt, JWTError
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import serialization
+
     token = credentials.credentials
     
     if not token:
@@ -96,6 +118,11 @@ async def verify_clerk_token(
                 jwk = key
                 break
         
+        if not jwk:
+            # Not in the cached set - Clerk may have rotated its keys
+            jwks = await get_clerk_jwks(refresh=True)
+            jwk = next((key for key in jwks.get("keys", []) if key.get("kid") == kid), None)
+        
         if not jwk:
             raise HTTPException(status_code=401, detail="Token key not found")
         
@@ -176,3 +203,17 @@ async def get_current_user(user_info: dict = Depends(verify_clerk_token)) -> dic
     """
     return user_info
 
+
+async def get_request_user(request: Request) -> Optional[dict]:
+    """
+    Verified user for the request's bearer token, or None when none was sent.
+    Not a dependency: call it only on the paths that need the user, so routes
+    that work signed out don't verify (or reject) tokens they don't use.
+    The result is kept on the request, so later calls don't verify again.
+    """
+    if hasattr(request.state, "request_user"):
+        return request.state.request_user
+    credentials = await optional_security(request)
+    user = await verify_clerk_token(credentials) if credentials is not None else None
+    request.state.request_user = user
+    return user
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the address parsing and file import hot paths
+"""
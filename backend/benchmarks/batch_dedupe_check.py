@@ -0,0 +1,66 @@
+"""
+Regression check for request-wide dedupe in /parse-addresses
+
+A batch is scheduled in PARSE_CHUNK_SIZE pieces, but duplicates are removed
+across the whole request before that: every unique cleaned address goes
+through the pipeline once, even when its duplicates land in different chunks,
+and every row still gets its own result.
+
+Usage (from the backend directory):
+    python -m benchmarks.batch_dedupe_check
+"""
+import os
+import sys
+from collections import Counter
+
+os.environ["PARSE_CHUNK_SIZE"] = "50"  # several chunks from a small batch
+os.environ["WARMUP_ON_STARTUP"] = "false"
+
+UNIQUE = 120
+ROWS = 600
+
+
+def main():
+    from fastapi.testclient import TestClient
+    import main as app_main
+
+    parsed_texts = Counter()
+    run_cleaned_pipeline = app_main.run_cleaned_pipeline
+
+    def counting_pipeline(cleaned_texts):
+        parsed_texts.update(cleaned_texts)
+        return run_cleaned_pipeline(cleaned_texts)
+    app_main.run_cleaned_pipeline = counting_pipeline
+
+    # Row i repeats address i % UNIQUE, so each address shows up in several chunks
+    addresses = [f"{i % UNIQUE + 1} Main St, Springfield, IL 62701" for i in range(ROWS)]
+    with TestClient(app_main.app) as client:
+        response = client.post("/parse-addresses", json={
+            "import_type": "customer",
+            "addresses": [{"row_id": i, "address": address} for i, address in enumerate(addresses)],
+        })
+
+    failures = []
+    if response.status_code != 200:
+        failures.append(f"status {response.status_code}: {response.text[:200]}")
+    else:
+        results = response.json()["results"]
+        if [result["row_id"] for result in results] != list(range(ROWS)):
+            failures.append("rows missing or out of order")
+        elif any(results[i]["parsed_address"] != results[i % UNIQUE]["parsed_address"] for i in range(ROWS)):
+            failures.append("duplicate rows got different results")
+    if len(parsed_texts) != UNIQUE:
+        failures.append(f"{len(parsed_texts)} unique strings parsed, expected {UNIQUE}")
+    repeated = sum(1 for count in parsed_texts.values() if count > 1)
+    if repeated:
+        failures.append(f"{repeated} strings parsed more than once")
+
+    for failure in failures:
+        print(f"FAIL  {failure}")
+    if not failures:
+        print(f"ok    {ROWS} rows, {UNIQUE} unique addresses, each parsed once")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Regression checks for city candidate ranking in correct_city_name
+
+A misspelled city next to a correct ZIP should resolve to the city that
+serves the ZIP, even when another city's name scores slightly higher; a
+candidate that agrees with the ZIP but is spelled far worse should not win.
+The accuracy check misspells --count random uscities.csv cities (one dropped,
+swapped or doubled letter, same as synthetic.py), pairs each with one of its
+own ZIPs and no state, and fails below --min-accuracy.
+
+Usage (from the backend directory):
+    python -m benchmarks.city_rank_check
+    python -m benchmarks.city_rank_check --count 1500 --min-accuracy 0.85
+"""
+import sys
+import random
+import argparse
+
+import address_parsing
+from address_parsing import CITY_AGREEMENT_MARGIN, _rank_city_candidates, correct_city_name
+from benchmarks.synthetic import _misspell, load_city_rows
+
+# (state_id, county_name, population, prior, zips) - the shape of get_city_priors()
+PORTAL_ND = ("ND", "Burke", 126, 0.2, frozenset({"58772"}))
+PORTLAND_OR = ("OR", "Multnomah", 2052796, 0.95, frozenset({"97201"}))
+
+
+def check_zip_beats_slightly_higher_score():
+    """A ZIP-consistent candidate beats a slightly higher-scoring one that disagrees"""
+    candidates = [("Portal", 90.9, 0), ("Portland", 85.7, 1)]
+    match = _rank_city_candidates("Portlnd", candidates, [PORTAL_ND, PORTLAND_OR], "97201")
+    assert match[0] == "Portland", match
+
+
+def check_zip_does_not_beat_much_higher_score():
+    """Agreement only counts within CITY_AGREEMENT_MARGIN of the best score"""
+    candidates = [("Portal", 100.0, 0), ("Portland", 100.0 - CITY_AGREEMENT_MARGIN - 1, 1)]
+    match = _rank_city_candidates("Portal", candidates, [PORTAL_ND, PORTLAND_OR], "97201")
+    assert match[0] == "Portal", match
+
+
+def check_score_wins_without_zip():
+    candidates = [("Portal", 90.9, 0), ("Portland", 85.7, 1)]
+    match = _rank_city_candidates("Portlnd", candidates, [PORTAL_ND, PORTLAND_OR])
+    assert match[0] == "Portal", match
+
+
+def check_portland_end_to_end():
+    city, _ = correct_city_name("Portlnd", "", "97201")
+    assert city == "Portland", city
+
+
+CHECKS = [
+    check_zip_beats_slightly_higher_score,
+    check_zip_does_not_beat_much_higher_score,
+    check_score_wins_without_zip,
+    check_portland_end_to_end,
+]
+
+
+def accuracy(count: int, seed: int) -> float:
+    rng = random.Random(seed)
+    rows = load_city_rows()
+    correct = 0
+    checked = 0
+    while checked < count:
+        row = rng.choice(rows)
+        misspelled = _misspell(rng, row["city"])
+        if misspelled == row["city"]:
+            continue
+        checked += 1
+        city, _ = correct_city_name(misspelled, "", rng.choice(row["zips"]))
+        correct += city == row["city"]
+    return correct / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check city candidate ranking")
+    parser.add_argument("--count", type=int, default=1500, help="misspelled cities in the accuracy check")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-accuracy", type=float, default=0.85)
+    args = parser.parse_args()
+
+    address_parsing.get_cities_by_state()  # load the city index up front
+    failures = 0
+    for check in CHECKS:
+        try:
+            check()
+            print(f"ok    {check.__name__}")
+        except Exception as e:
+            failures += 1
+            print(f"FAIL  {check.__name__}: {type(e).__name__}: {e}")
+
+    rate = accuracy(args.count, args.seed)
+    status = "ok  " if rate >= args.min_accuracy else "FAIL"
+    failures += rate < args.min_accuracy
+    print(f"{status}  misspelled city + ZIP accuracy: {rate:.1%} of {args.count} (min {args.min_accuracy:.0%})")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
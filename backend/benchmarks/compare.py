@@ -0,0 +1,59 @@
+"""
+Compare two benchmark result files
+
+Usage:
+    python -m benchmarks.compare OLD.json NEW.json [--threshold 10] [--fail-on-regression]
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Metrics where a bigger number is better; everything else is a cost
+HIGHER_IS_BETTER = {"rows_per_sec", "values_per_sec_create"}
+
+
+def _load(path):
+    report = json.loads(Path(path).read_text())
+    return report["meta"], {(r["suite"], r["size"]): r for r in report["results"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("old", type=Path)
+    parser.add_argument("new", type=Path)
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    old_meta, old_results = _load(args.old)
+    new_meta, new_results = _load(args.new)
+    print(f"old: {old_meta.get('git_commit')} {old_meta.get('timestamp')}")
+    print(f"new: {new_meta.get('git_commit')} {new_meta.get('timestamp')}")
+    print(f"{'case':<20} {'metric':<22} {'old':>12} {'new':>12} {'change':>9}")
+
+    regressions = []
+    for key in sorted(set(old_results) & set(new_results)):
+        old, new = old_results[key], new_results[key]
+        case = f"{key[0]}@{key[1]}"
+        for metric in sorted(set(old) & set(new)):
+            if metric in ("suite", "size") or not isinstance(old[metric], (int, float)):
+                continue
+            if not old[metric]:
+                continue
+            change = (new[metric] - old[metric]) / old[metric] * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = "  <-- regression" if worse > args.threshold else ""
+            if flag:
+                regressions.append((case, metric))
+            print(f"{case:<20} {metric:<22} {old[metric]:>12} {new[metric]:>12} {change:>+8.1f}%{flag}")
+
+    for key in sorted(set(old_results) ^ set(new_results)):
+        print(f"{key[0]}@{key[1]}: only in {'old' if key in old_results else 'new'} run")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Startup import-time report and budget check
+
+Imports `main` in a fresh interpreter under `python -X importtime`, prints the
+slowest packages and fails (exit code 1) when:
+  - a module that should load lazily (pandas, libpostal, rapidfuzz, jose,
+    cryptography, the psycopg driver) is imported at startup, or
+  - the total import time of `main` exceeds --budget-ms (best of --repeat runs)
+
+Usage (from the backend directory):
+    python -m benchmarks.import_budget
+    python -m benchmarks.import_budget --budget-ms 800 --top 30
+
+Run it with DATABASE_URL set, as in production, so the database setup is
+measured too.
+"""
+import os
+import sys
+import argparse
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Heavy subsystems that must stay off the startup path (see address_parsing.py,
+# auth.py and database.py)
+DEFERRED_MODULES = ("pandas", "postal", "rapidfuzz", "jose", "cryptography", "psycopg")
+
+
+def measure_import(module: str = "main"):
+    """Import `module` in a fresh interpreter; return {module name: (self_us, cumulative_us)}"""
+    env = dict(os.environ, WARMUP_ON_STARTUP="false")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    timings = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header line
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def top_packages(timings, limit: int):
+    """Self time summed per top-level package, slowest first"""
+    totals = defaultdict(int)
+    for name, (self_us, _) in timings.items():
+        totals[name.split(".", 1)[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report and check the import time of main.py")
+    parser.add_argument("--budget-ms", type=float, default=900, help="max total import time of main")
+    parser.add_argument("--repeat", type=int, default=5, help="runs to take the best of")
+    parser.add_argument("--top", type=int, default=20, help="packages to list")
+    args = parser.parse_args()
+
+    runs = [measure_import() for _ in range(max(1, args.repeat))]
+    best = min(runs, key=lambda timings: timings["main"][1])
+    total_ms = best["main"][1] / 1000
+
+    print(f"{'package':<32} {'self ms':>10}")
+    for package, self_us in top_packages(best, args.top):
+        print(f"{package:<32} {self_us / 1000:>10.1f}")
+    print(f"\nimport main: {total_ms:.1f} ms (best of {len(runs)}), budget {args.budget_ms:.0f} ms")
+
+    failures = []
+    eager = sorted({name.split(".", 1)[0] for name in best} & set(DEFERRED_MODULES))
+    if eager:
+        failures.append(f"imported at startup but should load lazily: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failures.append(f"import time {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Regression checks for finalizing chunked import uploads
+
+Finalize reads the staged values back only through SQL and sorted streams,
+never as a list. This sends the same exports through POST /api/file-imports
+(which works on the values in memory) and through a chunked upload, full and
+then delta, and requires the same change report and the same stored values
+from both. COMPACT_VALUES_THRESHOLD and IMPORT_SEGMENT_SIZE are set low so the
+cases cover text[] rows, segmented rows and changes between the two, including
+values whose order depends on collation. A last case finalizes a large upload,
+full and delta, under tracemalloc and fails if the peak comes near the size of
+the values as a Python list.
+
+Needs BENCH_DATABASE_URL pointing at a throwaway Postgres (tables are created
+if missing), same as the import benchmarks.
+
+Usage (from the backend directory):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.import_upload_check
+"""
+import os
+import sys
+import json
+import uuid
+import hashlib
+import tracemalloc
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", "")
+os.environ["COMPACT_VALUES_THRESHOLD"] = "50"
+os.environ["IMPORT_SEGMENT_SIZE"] = "16"
+
+CHUNK_VALUES = 37  # values per data type per upload chunk
+MEMORY_CHECK_VALUES = 200_000
+
+
+def _values(prefix: str, count: int, start: int = 0):
+    return [f"{prefix}-{i:05d}" for i in range(start, start + count)]
+
+
+# Sorts differently under most database collations than by code point
+MIXED_CASE = ["b", "B", "a", "A", "é", "e", "Z", "z", "ä", "_x", "x_", "10", "9", " sp", "🙂", "ß", "ss"]
+LARGE = _values("P", 200)
+
+# (name, first export, second export sent as a delta)
+CASES = [
+    ("small unchanged", {"names": ["a", "b", "c"]}, {"names": ["a", "b", "c"]}),
+    ("small reordered", {"names": ["a", "b", "c"]}, {"names": ["c", "b", "a"]}),
+    ("small changed", {"names": ["a", "b", "b", "c"]}, {"names": ["b", "c", "d", "d"]}),
+    ("small to large", {"names": ["P-00001", "x"]}, {"names": LARGE}),
+    ("large to small", {"names": LARGE}, {"names": ["P-00001", "x", "x"]}),
+    ("large unchanged", {"names": LARGE}, {"names": list(reversed(LARGE)) + LARGE[:20]}),
+    ("large, a few values changed", {"names": LARGE},
+     {"names": LARGE[:40] + ["P-00040a", "A-first", "zz-last"] + LARGE[45:150] + _values("P", 30, 400)}),
+    ("large, collation-sensitive values", {"names": LARGE + MIXED_CASE},
+     {"names": LARGE[5:] + MIXED_CASE[3:] + ["Ä", "a-new"]}),
+    ("data types added and removed",
+     {"names": ["a"], "vendor_names": ["v1", "v1", "v2"], "part_numbers": LARGE},
+     {"names": ["a"], "customer_names": _values("C", 80) + ["C-00001"], "ids": ["i2", "i1"]}),
+]
+
+
+def _put_chunks(client, upload_id: str, data: dict, chunk_values: int = CHUNK_VALUES) -> int:
+    """Send data as upload chunks of chunk_values per data type; returns the chunk count"""
+    longest = max(len(values) for values in data.values())
+    seq = 0
+    for start in range(0, longest, chunk_values):
+        chunk = {
+            data_type: values[start:start + chunk_values]
+            for data_type, values in data.items() if values[start:start + chunk_values]
+        }
+        body = json.dumps(chunk).encode()
+        response = client.put(f"/api/import-uploads/{upload_id}/chunks/{seq}", content=body, headers={
+            "X-Chunk-Checksum": hashlib.sha256(body).hexdigest(),
+        })
+        assert response.status_code == 200, f"chunk {seq}: {response.status_code} {response.text[:200]}"
+        seq += 1
+    return seq
+
+
+def _direct_import(client, project_id: str, data: dict, replace_mode: str) -> dict:
+    response = client.post("/api/file-imports", json={
+        "project_id": project_id, "import_type": "check", "filename": "direct.csv",
+        "data": data, "replace_mode": replace_mode,
+    })
+    assert response.status_code == 201, f"file import: {response.status_code} {response.text[:200]}"
+    return response.json()
+
+
+def _start_upload(client, project_id: str, data: dict, replace_mode: str, chunk_values: int = CHUNK_VALUES):
+    """Create an upload and send all its chunks; returns (upload id, chunk count)"""
+    response = client.post("/api/import-uploads", json={
+        "project_id": project_id, "import_type": "check", "filename": "upload.csv", "replace_mode": replace_mode,
+    })
+    assert response.status_code == 201, f"upload: {response.status_code} {response.text[:200]}"
+    upload_id = response.json()["id"]
+    return upload_id, _put_chunks(client, upload_id, data, chunk_values)
+
+
+def _finalize(client, upload_id: str, chunk_count: int) -> dict:
+    response = client.post(f"/api/import-uploads/{upload_id}/finalize", json={"chunk_count": chunk_count})
+    assert response.status_code == 200, f"finalize: {response.status_code} {response.text[:200]}"
+    return response.json()
+
+
+def _upload_import(client, project_id: str, data: dict, replace_mode: str) -> dict:
+    return _finalize(client, *_start_upload(client, project_id, data, replace_mode))
+
+
+def _stored(client, project_id: str) -> dict:
+    response = client.get(f"/api/file-imports/{project_id}/check")
+    assert response.status_code == 200, f"fetch: {response.status_code} {response.text[:200]}"
+    return {item["data_type"]: item["values"] for item in response.json()}
+
+
+def _create_project(client) -> str:
+    response = client.post("/api/projects", json={"name": "upload check"})
+    assert response.status_code in (200, 201), f"project: {response.status_code} {response.text[:200]}"
+    return response.json()["id"]
+
+
+def check_case(client, first: dict, second: dict):
+    direct_project, upload_project = _create_project(client), _create_project(client)
+    _direct_import(client, direct_project, first, "full")
+    _upload_import(client, upload_project, first, "full")
+    assert _stored(client, upload_project) == _stored(client, direct_project), "full import stored different values"
+
+    expected = _direct_import(client, direct_project, second, "delta")["changes"]
+    actual = _upload_import(client, upload_project, second, "delta")["changes"]
+    assert actual == expected, f"changes {actual} != {expected}"
+    assert _stored(client, upload_project) == _stored(client, direct_project), "delta stored different values"
+
+
+def check_memory(client):
+    """Finalize peaks well below the staged values' size as a list, full and delta"""
+    import file_imports
+
+    values = [f"PART-{i:09d}-{'x' * 20}" for i in range(MEMORY_CHECK_VALUES)]
+    changed = values[:MEMORY_CHECK_VALUES // 2] + [f"NEW-{i:09d}" for i in range(1000)] \
+        + values[MEMORY_CHECK_VALUES // 2 + 1000:]
+    list_bytes = sum(sys.getsizeof(value) for value in values) + sys.getsizeof(values)
+    project_id = _create_project(client)
+
+    segment_size = file_imports.IMPORT_SEGMENT_SIZE
+    file_imports.IMPORT_SEGMENT_SIZE = 4096  # the default; 16 would make this case about ORM objects
+    try:
+        for replace_mode, data in (("full", values), ("delta", changed)):
+            upload_id, chunk_count = _start_upload(client, project_id, {"part_numbers": data}, replace_mode, 20000)
+            tracemalloc.start()
+            try:
+                response = _finalize(client, upload_id, chunk_count)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert peak < list_bytes / 2, \
+                f"{replace_mode} finalize peaked at {peak / 1e6:.1f} MB, the values as a list are {list_bytes / 1e6:.1f} MB"
+            print(f"      {replace_mode} finalize of {len(data)} values peaked at {peak / 1e6:.1f} MB "
+                  f"(as a list: {list_bytes / 1e6:.1f} MB)")
+        change = response["changes"]["part_numbers"]
+        assert (change["added_count"], change["removed_count"]) == (1000, 1000), f"delta changes {change}"
+    finally:
+        file_imports.IMPORT_SEGMENT_SIZE = segment_size
+
+
+def main():
+    if not os.environ["DATABASE_URL"]:
+        print("BENCH_DATABASE_URL is not set (a throwaway Postgres, see benchmarks/README.md)")
+        sys.exit(2)
+
+    from fastapi.testclient import TestClient
+    from database import Base, get_db
+    from auth import get_current_user
+    from models import User
+    import main as app_main
+
+    clerk_user_id = f"check_{uuid.uuid4().hex[:12]}"
+    app_main.app.dependency_overrides[get_current_user] = lambda: {
+        "user_id": clerk_user_id, "email": f"{clerk_user_id}@check.local",
+    }
+    db_gen = get_db()
+    db = next(db_gen)
+    Base.metadata.create_all(db.get_bind())
+
+    failures = 0
+    try:
+        with TestClient(app_main.app) as client:
+            for name, first, second in CASES:
+                try:
+                    check_case(client, first, second)
+                    print(f"ok    {name}")
+                except AssertionError as e:
+                    failures += 1
+                    print(f"FAIL  {name}: {e}")
+            try:
+                check_memory(client)
+                print("ok    finalize memory")
+            except AssertionError as e:
+                failures += 1
+                print(f"FAIL  finalize memory: {e}")
+    finally:
+        # Projects, imports and uploads go with the user via ON DELETE CASCADE
+        db.query(User).filter(User.clerk_user_id == clerk_user_id).delete(synchronize_session=False)
+        db.commit()
+        db_gen.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
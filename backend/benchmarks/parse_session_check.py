@@ -0,0 +1,162 @@
+"""
+Regression checks for /parse-addresses/sessions
+
+A session keeps each row's parse result keyed by row_id and a hash of the
+address. A PATCH must re-parse only the rows that are new or whose address
+changed, drop removed rows, and return just that diff with the session
+totals. Sessions belong to the user who created them: anyone else gets a 404
+and can't read, change or delete them.
+
+Needs BENCH_DATABASE_URL pointing at a throwaway Postgres (tables are created
+if missing), same as the import benchmarks.
+
+Usage (from the backend directory):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.parse_session_check
+"""
+import os
+import sys
+import uuid
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", "")
+os.environ["WARMUP_ON_STARTUP"] = "false"
+
+ROWS = [
+    {"row_id": 1, "address": "123 Main St, Springfield, IL 62701", "original_row_data": {"Name": "Acme"}},
+    {"row_id": 2, "address": "500 Market St, San Francisco, CA 94105"},
+    {"row_id": 3, "address": "1600 Pennsylvania Ave NW, Washington, DC 20500"},
+    {"row_id": 4, "address": "350 5th Ave, New York, NY 10118"},
+]
+
+
+def main():
+    if not os.environ["DATABASE_URL"]:
+        print("BENCH_DATABASE_URL is not set (a throwaway Postgres, see benchmarks/README.md)")
+        sys.exit(2)
+
+    from fastapi import Request
+    from fastapi.testclient import TestClient
+    from database import Base, get_db
+    from auth import get_current_user
+    from models import User
+    import main as app_main
+
+    # The X-Check-User header names the signed-in Clerk user
+    def fake_current_user(request: Request):
+        clerk_user_id = request.headers["x-check-user"]
+        return {"user_id": clerk_user_id, "email": f"{clerk_user_id}@check.local"}
+    app_main.app.dependency_overrides[get_current_user] = fake_current_user
+
+    # Every row that goes through the parser, by row_id
+    parsed_row_ids = []
+    build_address_results = app_main.build_address_results
+
+    async def recording_build(request, address_items, echo_row_data=True):
+        parsed_row_ids.extend(item.row_id for item in address_items)
+        return await build_address_results(request, address_items, echo_row_data)
+    app_main.build_address_results = recording_build
+
+    db_gen = get_db()
+    db = next(db_gen)
+    Base.metadata.create_all(db.get_bind())
+    owner_id = f"check_{uuid.uuid4().hex[:12]}"
+    other_id = f"check_{uuid.uuid4().hex[:12]}"
+    owner = {"X-Check-User": owner_id}
+    other = {"X-Check-User": other_id}
+
+    failures = 0
+
+    def check(name, condition, detail=""):
+        nonlocal failures
+        if condition:
+            print(f"ok    {name}")
+        else:
+            failures += 1
+            print(f"FAIL  {name}{': ' + detail if detail else ''}")
+
+    try:
+        with TestClient(app_main.app) as client:
+            base = "/parse-addresses/sessions"
+            response = client.post(base, headers=owner, json={"import_type": "customer", "addresses": ROWS})
+            check("create", response.status_code == 201, f"{response.status_code} {response.text[:200]}")
+            created = response.json()
+            session_id = created["session_id"]
+            check("create returns every row", [r["row_id"] for r in created["results"]] == [1, 2, 3, 4])
+            check("create parses every row once", sorted(parsed_row_ids) == [1, 2, 3, 4], str(parsed_row_ids))
+            check("create echoes row data", created["results"][0]["original_row_data"] == {"Name": "Acme"})
+
+            # Row 1 unchanged (only its other columns), row 2 edited, row 5 new, row 3 removed
+            parsed_row_ids.clear()
+            response = client.patch(f"{base}/{session_id}", headers=owner, json={
+                "addresses": [
+                    {"row_id": 1, "address": ROWS[0]["address"], "original_row_data": {"Name": "Acme Corp"}},
+                    {"row_id": 2, "address": "233 S Wacker Dr, Chicago, IL 60606"},
+                    {"row_id": 5, "address": "1 Infinite Loop, Cupertino, CA 95014"},
+                ],
+                "removed_row_ids": [3, 99],
+            })
+            check("patch", response.status_code == 200, f"{response.status_code} {response.text[:200]}")
+            diff = response.json()
+            check("patch re-parses only new and edited rows", sorted(parsed_row_ids) == [2, 5], str(parsed_row_ids))
+            check("diff lists only the re-parsed rows", [r["row_id"] for r in diff["changed"]] == [2, 5],
+                  str([r["row_id"] for r in diff["changed"]]))
+            check("diff carries the edited row's new parse",
+                  diff["changed"][0]["parsed_address"] != created["results"][1]["parsed_address"], str(diff["changed"][0]))
+            check("diff lists removed rows that existed", diff["removed_row_ids"] == [3], str(diff["removed_row_ids"]))
+            check("diff counts rows sent unchanged", diff["unchanged_count"] == 1, str(diff["unchanged_count"]))
+            check("diff totals cover the whole session", diff["processed_count"] + diff["error_count"] == 4,
+                  f"{diff['processed_count']} + {diff['error_count']}")
+
+            response = client.get(f"{base}/{session_id}", headers=owner)
+            stored = {r["row_id"]: r for r in response.json().get("results", [])}
+            check("session keeps the patched rows", sorted(stored) == [1, 2, 4, 5], str(sorted(stored)))
+            check("session stores the new parse", stored.get(2, {}).get("parsed_address") == diff["changed"][0]["parsed_address"])
+
+            parsed_row_ids.clear()
+            response = client.patch(f"{base}/{session_id}", headers=owner, json={"addresses": [
+                {"row_id": 2, "address": "233 S Wacker Dr, Chicago, IL 60606"},
+                {"row_id": 4, "address": ROWS[3]["address"]},
+            ]})
+            check("patch with no edits parses nothing",
+                  response.status_code == 200 and not parsed_row_ids and response.json()["changed"] == []
+                  and response.json()["unchanged_count"] == 2, f"{response.status_code} {parsed_row_ids}")
+
+            response = client.patch(f"{base}/{session_id}", headers=owner, json={
+                "addresses": [{"row_id": 4, "address": "x"}], "removed_row_ids": [4],
+            })
+            check("row both edited and removed is a 400", response.status_code == 400, str(response.status_code))
+            response = client.post(base, headers=owner, json={"import_type": "customer", "addresses": ROWS + ROWS[:1]})
+            check("duplicate row_id is a 400", response.status_code == 400, str(response.status_code))
+            response = client.post(base, headers=owner, json={"import_type": "ppvp", "addresses": ROWS})
+            check("non-address import type is a 400", response.status_code == 400, str(response.status_code))
+
+            # Someone else's session is invisible: 404 for every verb, and nothing changes
+            parsed_row_ids.clear()
+            statuses = [
+                client.get(f"{base}/{session_id}", headers=other).status_code,
+                client.patch(f"{base}/{session_id}", headers=other, json={
+                    "addresses": [{"row_id": 1, "address": "1 Other St, Austin, TX 78701"}], "removed_row_ids": [2],
+                }).status_code,
+                client.delete(f"{base}/{session_id}", headers=other).status_code,
+            ]
+            check("other user gets 404 for get, patch and delete", statuses == [404, 404, 404], str(statuses))
+            check("other user's patch parses nothing", not parsed_row_ids, str(parsed_row_ids))
+            response = client.get(f"{base}/{session_id}", headers=owner)
+            check("owner's session is untouched", response.status_code == 200
+                  and sorted(r["row_id"] for r in response.json()["results"]) == [1, 2, 4, 5])
+            response = client.get(f"{base}/{uuid.uuid4()}", headers=owner)
+            check("unknown session is a 404", response.status_code == 404, str(response.status_code))
+
+            response = client.delete(f"{base}/{session_id}", headers=owner)
+            check("owner deletes the session", response.status_code == 204, str(response.status_code))
+            response = client.get(f"{base}/{session_id}", headers=owner)
+            check("deleted session is gone", response.status_code == 404, str(response.status_code))
+    finally:
+        # Sessions go with their user via ON DELETE CASCADE
+        db.query(User).filter(User.clerk_user_id.in_([owner_id, other_id])).delete(synchronize_session=False)
+        db.commit()
+        db_gen.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Regression checks for best-effort parse stats on /parse-addresses
+
+Sending a project_id only asks for the batch's stats to be recorded. A
+malformed id, a missing or rejected token, or someone else's project must
+skip the stats and still return the parse results; the caller's own project
+gets its stats row.
+
+Needs BENCH_DATABASE_URL pointing at a throwaway Postgres (tables are created
+if missing), same as the import benchmarks.
+
+Usage (from the backend directory):
+    BENCH_DATABASE_URL=postgresql://... python -m benchmarks.parse_stats_check
+"""
+import os
+import sys
+import uuid
+
+os.environ["DATABASE_URL"] = os.environ.get("BENCH_DATABASE_URL", "")
+
+ADDRESSES = [
+    {"row_id": 1, "address": "123 Main St, Springfield, IL 62701"},
+    {"row_id": 2, "address": "500 Market St, San Francisco, CA 94105"},
+]
+
+
+def _parse(client, project_id, headers=None):
+    return client.post("/parse-addresses", headers=headers or {}, json={
+        "import_type": "customer",
+        "addresses": ADDRESSES,
+        "project_id": project_id,
+    })
+
+
+def main():
+    if not os.environ["DATABASE_URL"]:
+        print("BENCH_DATABASE_URL is not set (a throwaway Postgres, see benchmarks/README.md)")
+        sys.exit(2)
+
+    from fastapi.testclient import TestClient
+    from fastapi import HTTPException
+    from database import Base, get_db
+    from models import User, Project, ParseStat
+    import main as app_main
+
+    db_gen = get_db()
+    db = next(db_gen)
+    Base.metadata.create_all(db.get_bind())
+    owner = User(clerk_user_id=f"check_{uuid.uuid4().hex[:12]}", email="owner@check.local")
+    other = User(clerk_user_id=f"check_{uuid.uuid4().hex[:12]}", email="other@check.local")
+    db.add_all([owner, other])
+    db.commit()
+    project = Project(name="stats check", user_id=owner.id)
+    db.add(project)
+    db.commit()
+    project_id = str(project.id)
+
+    # get_request_user is called directly rather than as a dependency, so it's
+    # swapped on the module: the bearer token names the Clerk user, "expired" is rejected
+    async def fake_request_user(request):
+        auth = request.headers.get("authorization", "")
+        if not auth:
+            return None
+        token = auth.split(" ", 1)[1]
+        if token == "expired":
+            raise HTTPException(status_code=401, detail="Token has expired")
+        return {"user_id": token, "email": None}
+    app_main.get_request_user = fake_request_user
+
+    def stats_count():
+        db.expire_all()
+        return db.query(ParseStat).filter(ParseStat.project_id == project.id).count()
+
+    cases = [
+        ("malformed project_id", "not-a-uuid", None, 0),
+        ("signed out", project_id, None, 0),
+        ("expired token", project_id, {"Authorization": "Bearer expired"}, 0),
+        ("someone else's project", project_id, {"Authorization": f"Bearer {other.clerk_user_id}"}, 0),
+        ("unknown project", str(uuid.uuid4()), {"Authorization": f"Bearer {owner.clerk_user_id}"}, 0),
+        ("own project", project_id, {"Authorization": f"Bearer {owner.clerk_user_id}"}, 1),
+    ]
+    failures = 0
+    try:
+        with TestClient(app_main.app) as client:
+            for name, case_project_id, headers, recorded in cases:
+                before = stats_count()
+                response = _parse(client, case_project_id, headers)
+                try:
+                    assert response.status_code == 200, f"status {response.status_code}: {response.text[:200]}"
+                    assert len(response.json()["results"]) == len(ADDRESSES), "results missing"
+                    assert stats_count() - before == recorded, f"stats rows added: {stats_count() - before}"
+                    print(f"ok    {name}")
+                except AssertionError as e:
+                    failures += 1
+                    print(f"FAIL  {name}: {e}")
+    finally:
+        db.query(User).filter(User.id.in_([owner.id, other.id])).delete(synchronize_session=False)
+        db.commit()
+        db_gen.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+Run the parsing and import benchmarks and save the results as JSON
+
+Usage (from the backend directory):
+    python -m benchmarks.run                          # parse + imports at 1k/10k/100k
+    python -m benchmarks.run --suite parse --sizes 1000 10000
+    python -m benchmarks.run --output benchmarks/results/before.json
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+
+Every (suite, size) case runs in a fresh process so peak RSS is per case and
+one case's caches can't flatter the next. The import suite needs
+BENCH_DATABASE_URL pointing at a throwaway Postgres (tables are created if
+missing); the parse suite needs no database.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import resource
+import platform
+import argparse
+import statistics
+import subprocess
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import generate_addresses, generate_import_data
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+DEFAULT_SIZES = [1000, 10000, 100000]
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def bench_parse(size, seed, batch_size):
+    """rows/sec through /parse-addresses plus per-row pipeline latency"""
+    from fastapi.testclient import TestClient
+    from address_parsing import parse_and_correct
+    import main
+
+    addresses = generate_addresses(size, seed=seed)
+
+    with TestClient(main.app) as client:  # runs the warm-up lifespan hook
+        start = time.perf_counter()
+        error_count = 0
+        for offset in range(0, size, batch_size):
+            batch = addresses[offset:offset + batch_size]
+            response = client.post("/parse-addresses", json={
+                "import_type": "customer",
+                "addresses": [
+                    {"row_id": offset + i, "address": address, "original_row_data": {"Address": address}}
+                    for i, address in enumerate(batch)
+                ],
+            })
+            response.raise_for_status()
+            error_count += response.json()["error_count"]
+        endpoint_seconds = time.perf_counter() - start
+
+    # Per-row latency of the pipeline itself (no batching, no dedupe)
+    latencies = []
+    for address in addresses:
+        row_start = time.perf_counter()
+        try:
+            parse_and_correct(address)
+        except Exception:
+            pass
+        latencies.append((time.perf_counter() - row_start) * 1000)
+    latencies.sort()
+
+    return {
+        "rows_per_sec": round(size / endpoint_seconds, 1),
+        "endpoint_seconds": round(endpoint_seconds, 3),
+        "error_rate": round(error_count / size, 4),
+        "p50_row_ms": round(_percentile(latencies, 50), 4),
+        "p99_row_ms": round(_percentile(latencies, 99), 4),
+        "mean_row_ms": round(statistics.fmean(latencies), 4),
+    }
+
+
+def bench_imports(size, seed, repeat):
+    """create / replace / fetch latency for the file import endpoints"""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database import Base, get_db
+    from auth import get_current_user
+    from models import User, Project
+    import main
+
+    database_url = os.environ["BENCH_DATABASE_URL"]
+    if database_url.startswith("postgresql://"):
+        database_url = database_url.replace("postgresql://", "postgresql+psycopg://", 1)
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    clerk_user_id = f"bench_{uuid.uuid4().hex[:12]}"
+    with SessionLocal() as db:
+        user = User(clerk_user_id=clerk_user_id, email=f"{clerk_user_id}@bench.local")
+        db.add(user)
+        db.commit()
+        project = Project(name="benchmark", user_id=user.id)
+        db.add(project)
+        db.commit()
+        project_id = str(project.id)
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[get_db] = override_get_db
+    main.app.dependency_overrides[get_current_user] = lambda: {"user_id": clerk_user_id, "email": None}
+
+    data = generate_import_data(size, seed=seed)
+    # Re-export with ~1% of the values changed, like a typical vendor refresh
+    changed = {key: values[: size - size // 100] + [f"{v}-new" for v in values[size - size // 100:]]
+               for key, values in data.items()}
+    payload = {"project_id": project_id, "import_type": "ppvp", "filename": "bench.csv", "data": data}
+
+    timings = {"create_ms": [], "replace_ms": [], "fetch_ms": []}
+    try:
+        with TestClient(main.app) as client:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                client.post("/api/file-imports", json=payload).raise_for_status()
+                timings["create_ms"].append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                client.post("/api/file-imports", json={**payload, "data": changed}).raise_for_status()
+                timings["replace_ms"].append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                client.get(f"/api/file-imports/{project_id}/ppvp").raise_for_status()
+                timings["fetch_ms"].append((time.perf_counter() - start) * 1000)
+    finally:
+        main.app.dependency_overrides.clear()
+        engine.dispose()
+
+    result = {key: round(statistics.median(values), 2) for key, values in timings.items()}
+    result["values_per_sec_create"] = round(2 * size / (result["create_ms"] / 1000), 1)
+    return result
+
+
+SUITES = {"parse": bench_parse, "imports": bench_imports}
+
+
+def _run_case(queue, suite, size, args):
+    os.chdir(BACKEND_DIR)
+    sys.path.insert(0, str(BACKEND_DIR))
+    try:
+        if suite == "parse":
+            result = bench_parse(size, args["seed"], args["batch_size"])
+        else:
+            result = bench_imports(size, args["seed"], args["repeat"])
+        result["peak_rss_mb"] = _peak_rss_mb()
+        queue.put({"suite": suite, "size": size, **result})
+    except Exception as e:
+        queue.put({"suite": suite, "size": size, "error": f"{type(e).__name__}: {str(e)}"})
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark address parsing and file imports")
+    parser.add_argument("--suite", choices=["all", *SUITES], default="all")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per /parse-addresses request")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per import case (median is kept)")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    suites = list(SUITES) if args.suite == "all" else [args.suite]
+    if "imports" in suites and not os.getenv("BENCH_DATABASE_URL"):
+        parser.error("the imports suite needs BENCH_DATABASE_URL (a throwaway Postgres, see benchmarks/README.md)")
+    case_args = {"seed": args.seed, "batch_size": args.batch_size, "repeat": args.repeat}
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for suite in suites:
+        for size in args.sizes:
+            print(f"Running {suite} @ {size} rows...", flush=True)
+            queue = ctx.Queue()
+            process = ctx.Process(target=_run_case, args=(queue, suite, size, case_args))
+            process.start()
+            result = queue.get()
+            process.join()
+            print(f"  {json.dumps(result)}", flush=True)
+            results.append(result)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "batch_size": args.batch_size,
+        },
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Saved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Regression checks for the parse scheduler
+
+Cancellation: a queued waiter that is cancelled (client gone, SingleFlight with no waiters
+left, LatestOnly superseded) has its future cancelled immediately, but its
+cleanup only runs on a later loop tick. A release() in between must skip it
+rather than grant it the slot, and the cleanup must then be a no-op. Each
+check asserts the scheduler's counters are back to zero afterwards, so a
+leaked slot fails loudly.
+
+Fairness key: client_key must not trust what the client says about itself -
+an unverified token or an X-Forwarded-For header falls back to the peer
+address (uvicorn already resolved a trusted proxy's header into it).
+
+Usage (from the backend directory):
+    python -m benchmarks.scheduler_check
+"""
+import sys
+import asyncio
+
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import scheduling
+from scheduling import FairScheduler, client_key
+
+
+async def _hold(scheduler: FairScheduler, user: str, small: bool, granted: list, release: asyncio.Event):
+    async with scheduler.slot(user, small):
+        granted.append(user)
+        await release.wait()
+
+
+def _assert_idle(scheduler: FairScheduler) -> None:
+    assert scheduler._running == 0, f"running={scheduler._running}"
+    assert scheduler._running_batch == 0, f"running_batch={scheduler._running_batch}"
+    assert scheduler._waiting == 0, f"waiting={scheduler._waiting}"
+    assert not scheduler._small and not scheduler._batch, "waiters left queued"
+    assert not scheduler._running_by_user, f"running_by_user={scheduler._running_by_user}"
+
+
+async def check_cancel_then_release(small: bool) -> None:
+    """Cancel a queued waiter and release the running slot in the same tick"""
+    scheduler = FairScheduler(max_concurrency=1, reserved_slots=0, user_concurrency=1, queue_max=10)
+    release = asyncio.Event()
+    granted = []
+    await scheduler.acquire("a", small)
+    cancelled = asyncio.create_task(_hold(scheduler, "a", small, granted, asyncio.Event()))
+    waiting = asyncio.create_task(_hold(scheduler, "a", small, granted, release))
+    await asyncio.sleep(0)
+    assert scheduler._waiting == 2
+
+    # Cancel, then free the slot before the cancelled task gets to run its cleanup
+    cancelled.cancel()
+    scheduler.release("a", small, 0.0)
+    release.set()
+    await waiting
+    try:
+        await cancelled
+    except asyncio.CancelledError:
+        pass
+
+    assert granted == ["a"], granted
+    _assert_idle(scheduler)
+
+
+async def check_cancel_only_waiter_ahead(small: bool) -> None:
+    """A new request queued behind only-cancelled waiters still gets the free slot"""
+    scheduler = FairScheduler(max_concurrency=1, reserved_slots=0, user_concurrency=1, queue_max=10)
+    release = asyncio.Event()
+    granted = []
+    holder = asyncio.create_task(_hold(scheduler, "a", small, granted, release))
+    await asyncio.sleep(0)
+    cancelled = asyncio.create_task(_hold(scheduler, "a", small, granted, asyncio.Event()))
+    await asyncio.sleep(0)
+
+    release.set()
+    cancelled.cancel()
+    await holder
+    later = asyncio.create_task(_hold(scheduler, "a", small, granted, release))
+    await asyncio.wait_for(later, timeout=1)
+    try:
+        await cancelled
+    except asyncio.CancelledError:
+        pass
+
+    assert granted == ["a", "a"], granted
+    _assert_idle(scheduler)
+
+
+CHECKS = [check_cancel_then_release, check_cancel_only_waiter_ahead]
+
+
+def _request(headers: dict, peer: str = "10.0.0.5") -> Request:
+    return Request({
+        "type": "http",
+        "method": "POST",
+        "path": "/parse-addresses",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": (peer, 40000),
+    })
+
+
+async def _verify(request: Request):
+    # Stand-in for Clerk: only "valid-token" verifies
+    authorization = request.headers.get("authorization", "")
+    if not authorization:
+        return None
+    if authorization != "Bearer valid-token":
+        raise HTTPException(status_code=401, detail="Invalid token")
+    return {"user_id": "user_verified"}
+
+
+async def check_client_key() -> None:
+    """Verified user, else the peer address - never a forged header or unverified sub"""
+    scheduling.get_request_user = _verify
+    forged_jwt = "Bearer x.eyJzdWIiOiJ1c2VyX3NvbWVvbmVfZWxzZSJ9.y"  # {"sub": "user_someone_else"}
+    cases = [
+        ({"Authorization": "Bearer valid-token"}, "user:user_verified"),
+        ({"Authorization": forged_jwt}, "ip:10.0.0.5"),
+        ({"X-Forwarded-For": "203.0.113.9"}, "ip:10.0.0.5"),
+        ({}, "ip:10.0.0.5"),
+    ]
+    for headers, expected in cases:
+        key = await client_key(_request(headers))
+        assert key == expected, f"{headers}: {key} != {expected}"
+
+
+def main():
+    failures = 0
+    for check in CHECKS:
+        for small in (True, False):
+            name = f"{check.__name__}[{'small' if small else 'batch'}]"
+            try:
+                asyncio.run(check(small))
+                print(f"ok    {name}")
+            except Exception as e:
+                failures += 1
+                print(f"FAIL  {name}: {type(e).__name__}: {e}")
+    try:
+        asyncio.run(check_client_key())
+        print("ok    check_client_key")
+    except Exception as e:
+        failures += 1
+        print(f"FAIL  check_client_key: {type(e).__name__}: {e}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
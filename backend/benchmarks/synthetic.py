@@ -0,0 +1,105 @@
+"""
+Synthetic, seeded address and import data for the benchmarks
+
+Addresses are built from real rows of uscities.csv and then dirtied the way
+customer exports usually are: phone numbers, opening hours, "Attn" prefixes,
+misspelled city names, missing states and spelled-out country tokens.
+"""
+import csv
+import random
+from pathlib import Path
+from typing import Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+STREET_NAMES = [
+    "Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill",
+    "Park", "Sunset", "Ridge", "Church", "Mill", "River", "Highland", "Jefferson",
+]
+STREET_SUFFIXES = ["St", "Ave", "Blvd", "Rd", "Dr", "Ln", "Way", "Ct", "Pkwy"]
+UNITS = ["Suite 100", "Ste 210", "Unit 4B", "Apt 12", "#300"]
+
+# Fraction of rows that get each kind of noise
+NOISE_RATES = {
+    "phone": 0.15,
+    "hours": 0.05,
+    "attn": 0.05,
+    "misspell": 0.10,
+    "missing_state": 0.08,
+    "country": 0.20,
+    "unit": 0.15,
+}
+
+
+def load_city_rows() -> List[Dict[str, str]]:
+    """Read (city, state_id, zip) seeds straight from uscities.csv"""
+    rows = []
+    with open(BACKEND_DIR / "uscities.csv", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            zips = row["zips"].split()
+            if zips:
+                rows.append({
+                    "city": row["city"],
+                    "state": row["state_id"],
+                    "zips": zips,
+                    "population": int(row["population"] or 0),
+                })
+    return rows
+
+
+def _misspell(rng: random.Random, word: str) -> str:
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    choice = rng.random()
+    if choice < 0.4:
+        return word[:i] + word[i + 1:]                       # drop a letter
+    if choice < 0.8:
+        return word[:i] + word[i + 1] + word[i] + word[i + 2:]  # swap two letters
+    return word[:i] + word[i] + word[i:]                      # double a letter
+
+
+def generate_addresses(count: int, seed: int = 42) -> List[str]:
+    """Return `count` noisy single-line US addresses, deterministic for a seed"""
+    rng = random.Random(seed)
+    cities = load_city_rows()
+    # Weight towards bigger places, like real customer lists
+    weights = [max(c["population"], 100) ** 0.5 for c in cities]
+    picks = rng.choices(cities, weights=weights, k=count)
+
+    addresses = []
+    for city_row in picks:
+        street = f"{rng.randint(1, 9999)} {rng.choice(STREET_NAMES)} {rng.choice(STREET_SUFFIXES)}"
+        if rng.random() < NOISE_RATES["unit"]:
+            street = f"{street} {rng.choice(UNITS)}"
+
+        city = city_row["city"]
+        if rng.random() < NOISE_RATES["misspell"]:
+            city = _misspell(rng, city)
+
+        state = "" if rng.random() < NOISE_RATES["missing_state"] else city_row["state"]
+        zip_code = rng.choice(city_row["zips"])
+        address = f"{street}, {city}, {state} {zip_code}".replace(",  ", ", ")
+
+        if rng.random() < NOISE_RATES["country"]:
+            address = f"{address} {rng.choice(['USA', 'U.S.A.', 'US', 'United States'])}"
+        if rng.random() < NOISE_RATES["attn"]:
+            address = f"Attn: Receiving {address}"
+        if rng.random() < NOISE_RATES["phone"]:
+            address = f"{address} {rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}"
+            if rng.random() < 0.3:
+                address = f"{address} x{rng.randint(1, 999)}"
+        if rng.random() < NOISE_RATES["hours"]:
+            address = f"{address} {rng.randint(6, 9)}am-{rng.randint(4, 9)}pm"
+
+        addresses.append(address)
+    return addresses
+
+
+def generate_import_data(count: int, seed: int = 42) -> Dict[str, List[str]]:
+    """Return a create_file_import `data` payload with `count` values per data type"""
+    rng = random.Random(seed)
+    return {
+        "names": [f"Customer {i:07d} {rng.choice(STREET_NAMES)}" for i in range(count)],
+        "part_numbers": [f"PN-{rng.randint(0, 36 ** 6):06X}-{i}" for i in range(count)],
+    }
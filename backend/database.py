@@ -2,6 +2,7 @@
 Database connection and session management
 """
 import os
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
@@ -34,18 +35,11 @@ if DATABASE_URL:
     elif DATABASE_URL.startswith("postgres://"):
         DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg://", 1)
 
-# Create SQLAlchemy engine (only if DATABASE_URL is set)
-# During build, this might not be set yet, which is OK
+# The engine (and with it the psycopg driver) is created by the first get_db()
+# call rather than at import, so worker startup doesn't pay for it
 engine = None
-if DATABASE_URL:
-    engine = create_engine(DATABASE_URL)
-
-# Create SessionLocal class (will be recreated at runtime if engine is None)
-if engine:
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-else:
-    # Dummy sessionmaker for import time
-    SessionLocal = None
+SessionLocal = None
+_engine_lock = threading.Lock()
 
 # Create Base class for models
 Base = declarative_base()
@@ -61,21 +55,23 @@ def get_db():
         def get_items(db: Session = Depends(get_db)):
             ...
     """
-    # Recreate engine if it wasn't available at import time
+    # Create the engine on first use
     global engine, SessionLocal, DATABASE_URL
-    # Re-fetch DATABASE_URL in case it was set after import
-    if not DATABASE_URL:
-        DATABASE_URL = os.getenv("DATABASE_URL", "")
-    
-    if not engine and DATABASE_URL:
-        if DATABASE_URL.startswith("postgresql://"):
-            DATABASE_URL_fixed = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
-        elif DATABASE_URL.startswith("postgres://"):
-            DATABASE_URL_fixed = DATABASE_URL.replace("postgres://", "postgresql+psycopg://", 1)
-        else:
-            DATABASE_URL_fixed = DATABASE_URL
-        engine = create_engine(DATABASE_URL_fixed)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    if not engine:
+        with _engine_lock:
+            # Re-fetch DATABASE_URL in case it was set after import
+            if not DATABASE_URL:
+                DATABASE_URL = os.getenv("DATABASE_URL", "")
+            
+            if not engine and DATABASE_URL:
+                if DATABASE_URL.startswith("postgresql://"):
+                    DATABASE_URL_fixed = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+                elif DATABASE_URL.startswith("postgres://"):
+                    DATABASE_URL_fixed = DATABASE_URL.replace("postgres://", "postgresql+psycopg://", 1)
+                else:
+                    DATABASE_URL_fixed = DATABASE_URL
+                engine = create_engine(DATABASE_URL_fixed)
+                SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     
     if not SessionLocal:
         raise ValueError("Database not configured. DATABASE_URL environment variable is required.")
@@ -1,21 +1,166 @@
 """
 File import management endpoints
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, delete
-from pydantic import BaseModel, model_validator
-from typing import List, Optional
+import os
+import json
+import time
+import hashlib
+from bisect import bisect_right
+from itertools import chain, islice
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, object_session
+from sqlalchemy import and_, delete, func, select
+from pydantic import BaseModel
+from typing import Dict, Iterable, Iterator, List, Optional
 from uuid import UUID
 from datetime import datetime
 
 from database import get_db
-from models import FileImport, ImportData, Project, User
+from models import FileImport, ImportData, ImportDataSegment, Project, User
 from auth import get_current_user
 from projects import get_or_create_user
+from parse_stats import record_batch_stats
+from value_codec import CompactValues, encode_values
 
 router = APIRouter(prefix="/api/file-imports", tags=["file-imports"])
 
+# Value sets larger than this are stored as compact segments instead of text[]
+COMPACT_VALUES_THRESHOLD = int(os.getenv("COMPACT_VALUES_THRESHOLD", "50000"))
+# Values per compact segment: a delta import re-encodes only the segments it touches
+IMPORT_SEGMENT_SIZE = int(os.getenv("IMPORT_SEGMENT_SIZE", "4096"))
+
+
+def _values_checksum(sorted_values: List[str]) -> str:
+    return hashlib.blake2b(json.dumps(sorted_values).encode(), digest_size=16).hexdigest()
+
+
+def _build_segments(sorted_values: Iterable[str]) -> Iterator[ImportDataSegment]:
+    """Split sorted, de-duplicated values (a list or a stream) into compact segments of IMPORT_SEGMENT_SIZE"""
+    values = iter(sorted_values)
+    while True:
+        chunk = list(islice(values, IMPORT_SEGMENT_SIZE))
+        if not chunk:
+            return
+        yield ImportDataSegment(
+            first_value=chunk[0],
+            value_count=len(chunk),
+            checksum=_values_checksum(chunk),
+            values_blob=encode_values(chunk),
+        )
+
+
+def add_segments(import_data: ImportData, sorted_values: Iterable[str]) -> int:
+    """Append sorted, de-duplicated values to a row as compact segments; returns how many were stored"""
+    count = 0
+    for segment in _build_segments(sorted_values):
+        import_data.segments.add(segment)
+        count += segment.value_count
+    return count
+
+
+def set_import_data_values(import_data: ImportData, values: List[str]) -> None:
+    """Store values as text[], or as sorted/de-duplicated compact segments when large"""
+    session = object_session(import_data)
+    if session is not None and import_data.id is not None:
+        # Replacing the values of a stored row: its old segments go
+        session.execute(delete(ImportDataSegment).where(ImportDataSegment.import_data_id == import_data.id))
+    if len(values) > COMPACT_VALUES_THRESHOLD:
+        import_data.values = None
+        import_data.value_count = add_segments(import_data, sorted(set(values)))
+    else:
+        import_data.values = values
+        import_data.value_count = None
+
+
+def segment_index(db: Session, import_data_id) -> list:
+    """A row's segments (first_value, id, value_count, checksum) in value order, without their blobs"""
+    # Sorted here rather than by the database, whose collation needn't match Python's order
+    return sorted(db.query(
+        ImportDataSegment.first_value, ImportDataSegment.id,
+        ImportDataSegment.value_count, ImportDataSegment.checksum,
+    ).filter(ImportDataSegment.import_data_id == import_data_id).all())
+
+
+def _segment_values(db: Session, segment_id) -> CompactValues:
+    return CompactValues(db.query(ImportDataSegment.values_blob).filter(ImportDataSegment.id == segment_id).scalar())
+
+
+def iter_segment_values(db: Session, import_data_id, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+    """Values of a segmented row in sorted order from offset, decoding only the segments needed"""
+    remaining = limit
+    for _, segment_id, value_count, _ in segment_index(db, import_data_id):
+        if remaining is not None and remaining <= 0:
+            return
+        if offset >= value_count:
+            offset -= value_count
+            continue
+        taken = value_count - offset if remaining is None else min(remaining, value_count - offset)
+        yield from _segment_values(db, segment_id).iter_values(offset, taken)
+        if remaining is not None:
+            remaining -= taken
+        offset = 0
+
+
+def read_import_data_values(import_data: ImportData) -> List[str]:
+    """Materialize all values of a row regardless of how they're stored"""
+    if import_data.values is not None:
+        return import_data.values
+    return list(iter_segment_values(object_session(import_data), import_data.id))
+
+
+def _count_kept(values: Iterable[str], old_values: set, kept: list) -> Iterator[str]:
+    """Pass values through, counting in kept[0] the ones already in old_values"""
+    for value in values:
+        if value in old_values:
+            kept[0] += 1
+        yield value
+
+
+def apply_segment_delta(db: Session, import_data: ImportData, sorted_values: Iterable[str]):
+    """
+    Bring a segmented row to a new value set, given as sorted, de-duplicated
+    values (a list or a stream), by re-encoding only the segments whose range
+    gained or lost values. Returns (added_count, removed_count).
+
+    The values are consumed once, in order; at most one segment's worth is
+    held before it's known whether that segment changed.
+    """
+    index = segment_index(db, import_data.id)
+    if not index:
+        import_data.value_count = add_segments(import_data, sorted_values)
+        return import_data.value_count, 0
+
+    values = iter(sorted_values)
+    pending = next(values, None)  # the next value not yet handed to a segment
+
+    def values_below(upper):
+        nonlocal pending
+        while pending is not None and (upper is None or pending < upper):
+            value = pending
+            pending = next(values, None)
+            yield value
+
+    added_count = removed_count = value_count = 0
+    for position, (_, segment_id, segment_count, checksum) in enumerate(index):
+        # Each segment owns [its first value, the next segment's first value);
+        # the first one also takes anything below it, the last anything above
+        upper = index[position + 1][0] if position + 1 < len(index) else None
+        owned = values_below(upper)
+        head = list(islice(owned, segment_count + 1))
+        if len(head) == segment_count and _values_checksum(head) == checksum:
+            value_count += segment_count
+            continue  # untouched - not decoded, not written
+        old_values = set(_segment_values(db, segment_id))
+        kept = [0]
+        owned_count = add_segments(import_data, _count_kept(chain(head, owned), old_values, kept))
+        added_count += owned_count - kept[0]
+        removed_count += len(old_values) - kept[0]
+        value_count += owned_count
+        db.execute(delete(ImportDataSegment).where(ImportDataSegment.id == segment_id))
+    import_data.value_count = value_count
+    return added_count, removed_count
+
 
 # Pydantic models for request/response
 class FileImportCreate(BaseModel):
@@ -23,45 +168,51 @@ class FileImportCreate(BaseModel):
     import_type: str
     filename: str
     data: dict  # { "names": [...], "part_numbers": [...], "vendor_names": [...] }
+    # "full": delete the previous import and write everything again
+    # "delta": keep the previous import and only write data types whose values changed;
+    #          large (segmented) sets only rewrite the segments holding added/removed values
+    replace_mode: str = "full"
+
+
+class ImportDataChange(BaseModel):
+    status: str  # 'added', 'updated', 'unchanged' or 'removed'
+    added_count: int
+    removed_count: int
 
 
 class FileImportResponse(BaseModel):
-    id: str
-    project_id: str
+    id: UUID
+    project_id: UUID
     import_type: str
     filename: str
     exported_at: datetime
     created_at: datetime
+    changes: Optional[Dict[str, ImportDataChange]] = None  # only set for replace_mode="delta"
 
     class Config:
         from_attributes = True
 
-    @model_validator(mode='before')
-    @classmethod
-    def convert_uuid_to_str(cls, data):
-        """Convert UUID objects to strings before validation"""
-        if isinstance(data, dict):
-            if 'id' in data and isinstance(data['id'], UUID):
-                data['id'] = str(data['id'])
-            if 'project_id' in data and isinstance(data['project_id'], UUID):
-                data['project_id'] = str(data['project_id'])
-        elif hasattr(data, 'id') and hasattr(data, 'project_id'):
-            return {
-                'id': str(data.id),
-                'project_id': str(data.project_id),
-                'import_type': data.import_type,
-                'filename': data.filename,
-                'exported_at': data.exported_at,
-                'created_at': data.created_at
-            }
-        return data
-
 
 class ImportDataResponse(BaseModel):
     data_type: str
     values: List[str]
 
 
+class ImportDataPage(BaseModel):
+    data_type: str
+    values: List[str]
+    offset: int
+    limit: int
+    total: int
+    next_offset: Optional[int] = None  # None on the last page
+
+
+class ImportDataMembership(BaseModel):
+    data_type: str
+    value: str
+    present: bool
+
+
 @router.post("", response_model=FileImportResponse, status_code=201)
 async def create_file_import(
     file_import_data: FileImportCreate,
@@ -72,6 +223,8 @@ async def create_file_import(
     Create a new file import record and store extracted data
     Replaces any existing file import of the same type for the project
     """
+    started = time.perf_counter()
+
     # Get or create user
     email = current_user.get("email") or ""
     user = get_or_create_user(db, current_user["user_id"], email)
@@ -87,6 +240,9 @@ async def create_file_import(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    if file_import_data.replace_mode not in ("full", "delta"):
+        raise HTTPException(status_code=400, detail="replace_mode must be 'full' or 'delta'")
+
     # Delete existing file import of the same type for this project (keep latest)
     existing_import = db.query(FileImport).filter(
         and_(
@@ -95,12 +251,14 @@ async def create_file_import(
         )
     ).first()
 
+    if existing_import and file_import_data.replace_mode == "delta":
+        response = apply_import_delta(db, existing_import, file_import_data)
+        record_import_stats(db, project.id, file_import_data.import_type, "delta",
+                            value_counts(file_import_data.data), time.perf_counter() - started)
+        return response
+
     if existing_import:
-        # Delete associated import data
-        db.query(ImportData).filter(
-            ImportData.file_import_id == existing_import.id
-        ).delete()
-        # Delete the file import
+        # Delete the file import; its import data goes with it via ON DELETE CASCADE
         db.delete(existing_import)
         db.commit()
 
@@ -119,27 +277,137 @@ async def create_file_import(
         if values and len(values) > 0:
             import_data = ImportData(
                 file_import_id=file_import.id,
-                data_type=data_type,
-                values=values
+                data_type=data_type
             )
+            set_import_data_values(import_data, values)
             db.add(import_data)
 
     db.commit()
     db.refresh(file_import)
 
+    record_import_stats(db, project.id, file_import_data.import_type, "full",
+                        value_counts(file_import_data.data), time.perf_counter() - started)
     return file_import
 
 
+def value_counts(data: dict) -> Dict[str, int]:
+    """Number of values per non-empty data type"""
+    return {data_type: len(values) for data_type, values in data.items() if values}
+
+
+def record_import_stats(
+    db: Session, project_id, import_type: str, replace_mode: str, data_types: Dict[str, int], duration: float
+) -> None:
+    """Record the import as one batch in parse_stats: every stored value counts as a row"""
+    row_count = sum(data_types.values())
+    record_batch_stats(
+        db, project_id, "file_import", import_type,
+        row_count, row_count, 0, duration,
+        {"data_types": data_types, "replace_mode": replace_mode},
+    )
+
+
+def apply_import_delta(db: Session, file_import: FileImport, file_import_data: FileImportCreate) -> dict:
+    """
+    Update an existing file import in place, writing only the data types whose
+    values changed, in a single transaction. Returns the response with a
+    per-data-type change report.
+
+    Small sets (text[]) that changed at all are rewritten whole, including
+    order-only or duplicate-only changes. Large sets are stored as sorted,
+    de-duplicated segments, so order and duplicates aren't kept and only the
+    segments covering added or removed values are rewritten.
+    """
+    new_data = {
+        data_type: values
+        for data_type, values in file_import_data.data.items()
+        if values and len(values) > 0
+    }
+    stored_rows = {
+        import_data.data_type: import_data
+        for import_data in db.query(ImportData).filter(
+            ImportData.file_import_id == file_import.id
+        ).all()
+    }
+
+    changes = {}
+    try:
+        for data_type, values in new_data.items():
+            stored = stored_rows.get(data_type)
+            if stored is None:
+                import_data = ImportData(file_import_id=file_import.id, data_type=data_type)
+                set_import_data_values(import_data, values)
+                db.add(import_data)
+                changes[data_type] = ImportDataChange(
+                    status="added", added_count=len(set(values)), removed_count=0
+                )
+                continue
+
+            if stored.values is None and len(values) > COMPACT_VALUES_THRESHOLD:
+                # Large set staying large: only the segments that changed are rewritten
+                added_count, removed_count = apply_segment_delta(db, stored, sorted(set(values)))
+                changed = added_count or removed_count
+            else:
+                old_values = read_import_data_values(stored)
+                old_set = set(old_values)
+                new_set = set(values)
+                added_count = len(new_set - old_set)
+                removed_count = len(old_set - new_set)
+                # text[] keeps order and duplicates, so any difference in the list is
+                # a change (reported as "updated" with zero counts if membership is equal)
+                changed = stored.values is None or len(values) > COMPACT_VALUES_THRESHOLD or old_values != values
+                if changed:
+                    set_import_data_values(stored, values)
+            status = "updated" if changed else "unchanged"  # unchanged: no write at all
+            changes[data_type] = ImportDataChange(
+                status=status, added_count=added_count, removed_count=removed_count
+            )
+
+        # Data types missing from the new export are dropped, same as a full replace
+        for data_type, stored in stored_rows.items():
+            if data_type not in new_data:
+                db.delete(stored)
+                removed_count = stored.value_count if stored.values is None else len(set(stored.values))
+                changes[data_type] = ImportDataChange(
+                    status="removed", added_count=0, removed_count=removed_count
+                )
+
+        file_import.filename = file_import_data.filename
+        file_import.exported_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(file_import)
+
+    return delta_response(file_import, changes)
+
+
+def delta_response(file_import: FileImport, changes: Dict[str, ImportDataChange]) -> dict:
+    """FileImportResponse fields of a delta import, with its per-data-type change report"""
+    return {
+        "id": file_import.id,
+        "project_id": file_import.project_id,
+        "import_type": file_import.import_type,
+        "filename": file_import.filename,
+        "exported_at": file_import.exported_at,
+        "created_at": file_import.created_at,
+        "changes": changes,
+    }
+
+
 @router.get("/{project_id}/{import_type}", response_model=List[ImportDataResponse])
 async def get_import_data(
     project_id: UUID,
     import_type: str,
+    data_type: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user),
 ):
     """
     Get import data for cross-validation
     Returns data from other import types for the same project
+    Pass data_type to fetch a single data type only
     """
     # Get or create user
     email = current_user.get("email") or ""
@@ -167,15 +435,210 @@ async def get_import_data(
     # Get all import data for these file imports
     result = []
     for file_import in file_imports:
-        import_data_list = db.query(ImportData).filter(
+        import_data_query = db.query(ImportData).filter(
             ImportData.file_import_id == file_import.id
-        ).all()
+        )
+        if data_type:
+            import_data_query = import_data_query.filter(ImportData.data_type == data_type)
+        import_data_list = import_data_query.all()
 
         for import_data in import_data_list:
             result.append({
                 "data_type": import_data.data_type,
-                "values": import_data.values
+                "values": read_import_data_values(import_data)
             })
 
     return result
 
+
+def _latest_import_data_id(db: Session, project_id: UUID, import_type: str, data_type: str):
+    """Id of the newest ImportData row for a project/import type/data type, or None"""
+    row = db.query(ImportData.id).join(FileImport).filter(
+        and_(
+            FileImport.project_id == project_id,
+            FileImport.import_type == import_type,
+            ImportData.data_type == data_type
+        )
+    ).order_by(FileImport.created_at.desc()).first()
+    return row[0] if row else None
+
+
+@router.get("/{project_id}/{import_type}/values", response_model=ImportDataPage)
+async def get_import_data_page(
+    project_id: UUID,
+    import_type: str,
+    data_type: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Get one page of values for a single data type
+    Only the requested slice leaves the database (text[]) or gets decoded (compact segments)
+    """
+    # Get or create user
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    # Verify project belongs to user
+    project = db.query(Project).filter(
+        and_(
+            Project.id == project_id,
+            Project.user_id == user.id
+        )
+    ).first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    import_data_id = _latest_import_data_id(db, project_id, import_type, data_type)
+    if import_data_id is None:
+        raise HTTPException(status_code=404, detail="Import data not found")
+
+    segment_total, array_total, page = db.query(
+        ImportData.value_count,
+        func.cardinality(ImportData.values),
+        # Postgres arrays are 1-based and slices are inclusive
+        ImportData.values[offset + 1:offset + limit],
+    ).filter(ImportData.id == import_data_id).one()
+
+    if array_total is None and segment_total is not None:
+        total = segment_total
+        page = list(iter_segment_values(db, import_data_id, offset, limit))
+    else:
+        total = array_total or 0
+        page = page or []
+
+    next_offset = offset + len(page) if offset + len(page) < total else None
+    return {
+        "data_type": data_type,
+        "values": page,
+        "offset": offset,
+        "limit": limit,
+        "total": total,
+        "next_offset": next_offset,
+    }
+
+
+@router.get("/{project_id}/{import_type}/stream")
+async def stream_import_data(
+    project_id: UUID,
+    import_type: str,
+    data_type: str,
+    chunk_size: int = Query(5000, ge=100, le=50000),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Stream all values of a single data type as NDJSON
+    Each line is {"data_type": ..., "values": [...]} with up to chunk_size values,
+    read from a server-side cursor so server memory stays bounded
+    """
+    # Get or create user
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    # Verify project belongs to user
+    project = db.query(Project).filter(
+        and_(
+            Project.id == project_id,
+            Project.user_id == user.id
+        )
+    ).first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    import_data_id = _latest_import_data_id(db, project_id, import_type, data_type)
+    if import_data_id is None:
+        raise HTTPException(status_code=404, detail="Import data not found")
+
+    def generate():
+        # Own session: the request's session may be closed before streaming finishes
+        db_gen = get_db()
+        stream_db = next(db_gen)
+        try:
+            segmented = stream_db.query(ImportData.values.is_(None)).filter(
+                ImportData.id == import_data_id
+            ).scalar()
+            if segmented:
+                chunk = []
+                for value in iter_segment_values(stream_db, import_data_id):
+                    chunk.append(value)
+                    if len(chunk) >= chunk_size:
+                        yield json.dumps({"data_type": data_type, "values": chunk}) + "\n"
+                        chunk = []
+                if chunk:
+                    yield json.dumps({"data_type": data_type, "values": chunk}) + "\n"
+                return
+
+            result = stream_db.execute(
+                select(func.unnest(ImportData.values))
+                .where(ImportData.id == import_data_id)
+                .execution_options(yield_per=chunk_size)
+            )
+            for partition in result.partitions():
+                yield json.dumps({"data_type": data_type, "values": [row[0] for row in partition]}) + "\n"
+        finally:
+            db_gen.close()
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+
+@router.get("/{project_id}/{import_type}/contains", response_model=ImportDataMembership)
+async def check_import_value(
+    project_id: UUID,
+    import_type: str,
+    data_type: str,
+    value: str,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Check whether a single value is present in an import's data type
+    without sending (or materializing) the whole value list
+    """
+    # Get or create user
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    # Verify project belongs to user
+    project = db.query(Project).filter(
+        and_(
+            Project.id == project_id,
+            Project.user_id == user.id
+        )
+    ).first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    import_filter = and_(
+        FileImport.project_id == project_id,
+        FileImport.import_type == import_type,
+        ImportData.data_type == data_type
+    )
+
+    # text[] rows: let Postgres check membership with = ANY(values)
+    present = db.query(ImportData.id).join(FileImport).filter(
+        import_filter,
+        ImportData.values.any(value)
+    ).first() is not None
+
+    # Segmented rows: pick the one segment whose range covers the value, then
+    # binary search its block index and decode a single block
+    if not present:
+        segmented_ids = db.query(ImportData.id).join(FileImport).filter(
+            import_filter,
+            ImportData.values.is_(None)
+        ).all()
+        for (import_data_id,) in segmented_ids:
+            index = segment_index(db, import_data_id)
+            position = bisect_right([first_value for first_value, _, _, _ in index], value) - 1
+            if position >= 0 and value in _segment_values(db, index[position][1]):
+                present = True
+                break
+
+    return {"data_type": data_type, "value": value, "present": present}
+
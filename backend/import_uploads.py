@@ -0,0 +1,537 @@
+"""
+Chunked, resumable upload for file imports
+
+POST /api/file-imports takes the whole data dict in one body, so a dropped
+connection on a big part-number list means sending all of it again. This is the
+alternative for large imports:
+
+    POST /api/import-uploads                      start; returns the upload id
+    PUT  /api/import-uploads/{id}/chunks/{seq}    body {data_type: [values]},
+                                                  X-Chunk-Checksum: sha256 hex of the body
+    GET  /api/import-uploads/{id}                 which chunks arrived (to resume)
+    POST /api/import-uploads/{id}/finalize        {"chunk_count": n}
+
+Chunks are COPY'd into the import_upload_values staging table as they arrive,
+so a request only ever holds one chunk. Re-sending a chunk with the same
+checksum is a no-op; a different body for a sequence number already received
+is a 409. Finalize checks every chunk 0..n-1 arrived, then replaces the import
+in one transaction with INSERT ... SELECT array_agg from the staging rows. Value
+sets over COMPACT_VALUES_THRESHOLD are encoded as compact segments, same as
+POST /api/file-imports, from the distinct values the database sorts and streams
+back; a delta upload is compared with the stored import in SQL, so finalize never
+holds an upload's values in a list. Uploads untouched for IMPORT_UPLOAD_TTL_HOURS
+are removed along with their staged values.
+"""
+import os
+import re
+import json
+import time
+import uuid
+import hashlib
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, cast, delete, except_, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, aggregate_order_by
+from pydantic import BaseModel
+from typing import Dict, Iterator, List, Optional
+from datetime import datetime, timedelta
+
+from database import get_db
+from models import (
+    FileImport, ImportData, ImportDataSegment, ImportUpload, ImportUploadChunk, ImportUploadValue, Project,
+)
+from auth import get_current_user
+from projects import get_or_create_user
+from file_imports import (
+    COMPACT_VALUES_THRESHOLD,
+    FileImportResponse,
+    ImportDataChange,
+    add_segments,
+    apply_segment_delta,
+    delta_response,
+    iter_segment_values,
+    record_import_stats,
+)
+
+router = APIRouter(prefix="/api/import-uploads", tags=["import-uploads"])
+
+IMPORT_UPLOAD_CHUNK_MAX_BYTES = int(os.getenv("IMPORT_UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024)))
+IMPORT_UPLOAD_TTL_HOURS = int(os.getenv("IMPORT_UPLOAD_TTL_HOURS", "24"))
+
+CHECKSUM_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+# Pydantic models for request/response
+class ImportUploadCreate(BaseModel):
+    project_id: str
+    import_type: str
+    filename: str
+    replace_mode: str = "full"  # same as FileImportCreate.replace_mode
+
+
+class ImportUploadFinalize(BaseModel):
+    chunk_count: int
+
+
+class ImportUploadResponse(BaseModel):
+    id: uuid.UUID
+    project_id: uuid.UUID
+    import_type: str
+    filename: str
+    replace_mode: str
+    status: str  # 'open' or 'finalized'
+    received: List[int]  # sequence numbers of the chunks stored so far
+    value_count: int
+    max_chunk_bytes: int
+    file_import_id: Optional[uuid.UUID] = None
+
+
+class ImportUploadChunkResponse(BaseModel):
+    seq: int
+    checksum: str
+    value_count: int
+    duplicate: bool  # True when this chunk had already been stored
+
+
+def _get_owned_upload(db: Session, upload_id: uuid.UUID, current_user: dict, lock: bool = False) -> ImportUpload:
+    """The upload if it belongs to one of the user's projects, else 404"""
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    query = db.query(ImportUpload).join(Project, Project.id == ImportUpload.project_id).filter(
+        and_(ImportUpload.id == upload_id, Project.user_id == user.id)
+    )
+    if lock:
+        # Serializes chunk writes and finalize for the same upload
+        query = query.with_for_update(of=ImportUpload)
+    upload = query.first()
+
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return upload
+
+
+def _upload_response(db: Session, upload: ImportUpload) -> ImportUploadResponse:
+    chunks = db.query(ImportUploadChunk.seq, ImportUploadChunk.value_count).filter(
+        ImportUploadChunk.upload_id == upload.id
+    ).order_by(ImportUploadChunk.seq).all()
+    return ImportUploadResponse(
+        id=upload.id,
+        project_id=upload.project_id,
+        import_type=upload.import_type,
+        filename=upload.filename,
+        replace_mode=upload.replace_mode,
+        status=upload.status,
+        received=[seq for seq, _ in chunks],
+        value_count=sum(count for _, count in chunks),
+        max_chunk_bytes=IMPORT_UPLOAD_CHUNK_MAX_BYTES,
+        file_import_id=upload.file_import_id,
+    )
+
+
+def _parse_chunk(body: bytes) -> dict:
+    """Decode a chunk body into {data_type: [str, ...]}, or 400"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Chunk body must be JSON")
+    if not isinstance(data, dict) or not all(
+        isinstance(values, list) and all(isinstance(value, str) for value in values)
+        for values in data.values()
+    ):
+        raise HTTPException(status_code=400, detail="Chunk body must map data types to lists of strings")
+    return data
+
+
+def _staged(upload_id: uuid.UUID, data_type: str):
+    """WHERE clause for the staged values of one data type"""
+    return and_(ImportUploadValue.upload_id == upload_id, ImportUploadValue.data_type == data_type)
+
+
+def _staged_array(upload_id: uuid.UUID, data_type: str):
+    """Scalar subquery: the staged values of one data type as an import_data.values array, in upload order"""
+    return select(cast(func.array_agg(aggregate_order_by(
+        ImportUploadValue.value, ImportUploadValue.seq, ImportUploadValue.position
+    )), ImportData.values.type)).where(_staged(upload_id, data_type)).scalar_subquery()
+
+
+def _staged_sorted_unique(db: Session, upload_id: uuid.UUID, data_type: str) -> Iterator[str]:
+    """
+    The distinct staged values of one data type in the order compact segments
+    use, sorted by the database and read from a server-side cursor
+    """
+    # COLLATE "C" compares UTF-8 bytes, which is the same order as Python's str comparison
+    value = ImportUploadValue.value.collate("C")
+    result = db.execute(
+        select(value).where(_staged(upload_id, data_type)).distinct().order_by(value)
+        .execution_options(yield_per=10000)
+    )
+    for (staged_value,) in result:
+        yield staged_value
+
+
+def _count_distinct(db: Session, query) -> int:
+    """Number of distinct values of a one-column query"""
+    values = query.subquery()
+    return db.scalar(select(func.count(func.distinct(values.c[0]))))
+
+
+def _count_except(db: Session, query, other) -> int:
+    """Number of distinct values in query that aren't in other"""
+    return db.scalar(select(func.count()).select_from(except_(query, other).subquery()))
+
+
+def _sorted_diff_counts(old_values: Iterator[str], new_values: Iterator[str]):
+    """(added, removed) between two sorted, de-duplicated streams, merged in one pass"""
+    added = removed = 0
+    old = next(old_values, None)
+    new = next(new_values, None)
+    while old is not None or new is not None:
+        if new is None or (old is not None and old < new):
+            removed += 1
+            old = next(old_values, None)
+        elif old is None or new < old:
+            added += 1
+            new = next(new_values, None)
+        else:
+            old = next(old_values, None)
+            new = next(new_values, None)
+    return added, removed
+
+
+def _insert_staged_array(db: Session, upload_id: uuid.UUID, file_import_id: uuid.UUID, data_type: str) -> None:
+    """Build the data type's text[] row in the database, straight from the staging rows"""
+    db.execute(insert(ImportData).from_select(
+        ["id", "file_import_id", "data_type", "values", "created_at"],
+        select(
+            literal(uuid.uuid4(), PG_UUID(as_uuid=True)),
+            literal(file_import_id, PG_UUID(as_uuid=True)),
+            literal(data_type),
+            func.array_agg(aggregate_order_by(
+                ImportUploadValue.value, ImportUploadValue.seq, ImportUploadValue.position
+            )),
+            literal(datetime.utcnow()),
+        ).where(_staged(upload_id, data_type)),
+    ))
+
+
+def _apply_staged_delta(db: Session, upload: ImportUpload, file_import: FileImport, data_types: Dict[str, int]) -> dict:
+    """
+    apply_import_delta for a staged upload, with the same per-data-type
+    results, without reading the staged values into a list: text[] rows are
+    compared and rewritten in SQL, and large sets stream the distinct staged
+    values in sorted order into the segment builder.
+    """
+    stored_rows = {
+        data_type: (import_data_id, segmented, value_count)
+        for import_data_id, data_type, segmented, value_count in db.query(
+            ImportData.id, ImportData.data_type, ImportData.values.is_(None), ImportData.value_count
+        ).filter(ImportData.file_import_id == file_import.id)
+    }
+
+    changes = {}
+    try:
+        for data_type, count in data_types.items():
+            staged = select(ImportUploadValue.value).where(_staged(upload.id, data_type))
+            large = count > COMPACT_VALUES_THRESHOLD
+            if data_type not in stored_rows:
+                if large:
+                    import_data = ImportData(file_import_id=file_import.id, data_type=data_type)
+                    db.add(import_data)
+                    import_data.value_count = add_segments(import_data, _staged_sorted_unique(db, upload.id, data_type))
+                    added_count = import_data.value_count
+                else:
+                    _insert_staged_array(db, upload.id, file_import.id, data_type)
+                    added_count = _count_distinct(db, staged)
+                changes[data_type] = ImportDataChange(status="added", added_count=added_count, removed_count=0)
+                continue
+
+            import_data_id, segmented, _ = stored_rows[data_type]
+            if segmented and large:
+                # Large set staying large: only the segments that changed are rewritten
+                import_data = db.get(ImportData, import_data_id)
+                added_count, removed_count = apply_segment_delta(
+                    db, import_data, _staged_sorted_unique(db, upload.id, data_type)
+                )
+                changed = added_count or removed_count
+            else:
+                if segmented:
+                    added_count, removed_count = _sorted_diff_counts(
+                        iter_segment_values(db, import_data_id), _staged_sorted_unique(db, upload.id, data_type)
+                    )
+                    changed = True
+                else:
+                    stored = select(func.unnest(ImportData.values)).where(ImportData.id == import_data_id)
+                    added_count = _count_except(db, staged, stored)
+                    removed_count = _count_except(db, stored, staged)
+                    # text[] keeps order and duplicates, so any difference in the list is a change
+                    changed = large or not db.scalar(select(
+                        ImportData.values == _staged_array(upload.id, data_type)
+                    ).where(ImportData.id == import_data_id))
+                if changed:
+                    db.execute(delete(ImportDataSegment).where(ImportDataSegment.import_data_id == import_data_id))
+                    if large:
+                        import_data = db.get(ImportData, import_data_id)
+                        import_data.values = None
+                        import_data.value_count = add_segments(
+                            import_data, _staged_sorted_unique(db, upload.id, data_type)
+                        )
+                    else:
+                        db.execute(update(ImportData).where(ImportData.id == import_data_id).values(
+                            values=_staged_array(upload.id, data_type), value_count=None
+                        ))
+            status = "updated" if changed else "unchanged"  # unchanged: no write at all
+            changes[data_type] = ImportDataChange(
+                status=status, added_count=added_count, removed_count=removed_count
+            )
+
+        # Data types missing from the upload are dropped, same as a full replace
+        for data_type, (import_data_id, segmented, value_count) in stored_rows.items():
+            if data_type in data_types:
+                continue
+            removed_count = value_count if segmented else _count_distinct(
+                db, select(func.unnest(ImportData.values)).where(ImportData.id == import_data_id)
+            )
+            db.execute(delete(ImportData).where(ImportData.id == import_data_id))
+            changes[data_type] = ImportDataChange(status="removed", added_count=0, removed_count=removed_count)
+
+        db.query(ImportUploadValue).filter(ImportUploadValue.upload_id == upload.id).delete(synchronize_session=False)
+        upload.status = "finalized"
+        upload.file_import_id = file_import.id
+        file_import.filename = upload.filename
+        file_import.exported_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(file_import)
+
+    return delta_response(file_import, changes)
+
+
+@router.post("", response_model=ImportUploadResponse, status_code=201)
+async def create_import_upload(
+    upload_data: ImportUploadCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Start a chunked upload for a file import
+    """
+    # Get or create user
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    # Verify project belongs to user
+    project = db.query(Project).filter(
+        and_(
+            Project.id == uuid.UUID(upload_data.project_id),
+            Project.user_id == user.id
+        )
+    ).first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    if upload_data.replace_mode not in ("full", "delta"):
+        raise HTTPException(status_code=400, detail="replace_mode must be 'full' or 'delta'")
+
+    # Drop abandoned uploads; their chunks and staged values go with them via ON DELETE CASCADE
+    cutoff = datetime.utcnow() - timedelta(hours=IMPORT_UPLOAD_TTL_HOURS)
+    db.query(ImportUpload).filter(ImportUpload.updated_at < cutoff).delete(synchronize_session=False)
+
+    upload = ImportUpload(
+        project_id=project.id,
+        import_type=upload_data.import_type,
+        filename=upload_data.filename,
+        replace_mode=upload_data.replace_mode,
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+
+    return _upload_response(db, upload)
+
+
+@router.get("/{upload_id}", response_model=ImportUploadResponse)
+async def get_import_upload(
+    upload_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Get an upload's status, including which chunks have been received
+    """
+    upload = _get_owned_upload(db, upload_id, current_user)
+    return _upload_response(db, upload)
+
+
+@router.put("/{upload_id}/chunks/{seq}", response_model=ImportUploadChunkResponse)
+async def put_import_upload_chunk(
+    upload_id: uuid.UUID,
+    seq: int,
+    request: Request,
+    x_chunk_checksum: str = Header(...),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Store one chunk of an upload. Safe to retry: a chunk that was already
+    stored with the same checksum is acknowledged without writing again.
+    """
+    if seq < 0:
+        raise HTTPException(status_code=400, detail="seq must be 0 or greater")
+    checksum = x_chunk_checksum.lower()
+    if not CHECKSUM_PATTERN.match(checksum):
+        raise HTTPException(status_code=400, detail="X-Chunk-Checksum must be a sha256 hex digest")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > IMPORT_UPLOAD_CHUNK_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {IMPORT_UPLOAD_CHUNK_MAX_BYTES} bytes")
+    body = await request.body()
+    if len(body) > IMPORT_UPLOAD_CHUNK_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"Chunks are limited to {IMPORT_UPLOAD_CHUNK_MAX_BYTES} bytes")
+    if hashlib.sha256(body).hexdigest() != checksum:
+        raise HTTPException(status_code=400, detail="Checksum does not match the chunk body")
+    data = _parse_chunk(body)
+
+    upload = _get_owned_upload(db, upload_id, current_user, lock=True)
+    if upload.status != "open":
+        raise HTTPException(status_code=409, detail="Upload is already finalized")
+
+    stored = db.query(ImportUploadChunk).filter(
+        and_(ImportUploadChunk.upload_id == upload.id, ImportUploadChunk.seq == seq)
+    ).first()
+    if stored:
+        db.rollback()  # release the upload lock
+        if stored.checksum != checksum:
+            raise HTTPException(status_code=409, detail=f"Chunk {seq} was already received with a different checksum")
+        return ImportUploadChunkResponse(seq=seq, checksum=checksum, value_count=stored.value_count, duplicate=True)
+
+    # Stream the values into the staging table on the session's own connection,
+    # so they commit (or roll back) together with the chunk record
+    value_count = 0
+    cursor = db.connection().connection.cursor()
+    with cursor.copy(
+        "COPY import_upload_values (upload_id, data_type, seq, position, value) FROM STDIN"
+    ) as copy:
+        for data_type, values in data.items():
+            for position, value in enumerate(values):
+                copy.write_row((upload.id, data_type, seq, position, value))
+            value_count += len(values)
+
+    db.add(ImportUploadChunk(upload_id=upload.id, seq=seq, checksum=checksum, value_count=value_count))
+    upload.updated_at = datetime.utcnow()
+    db.commit()
+
+    return ImportUploadChunkResponse(seq=seq, checksum=checksum, value_count=value_count, duplicate=False)
+
+
+@router.post("/{upload_id}/finalize", response_model=FileImportResponse)
+async def finalize_import_upload(
+    upload_id: uuid.UUID,
+    finalize_data: ImportUploadFinalize,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Turn a complete upload into the project's file import for its type,
+    replacing the previous one in a single transaction. Finalizing again
+    returns the same file import.
+    """
+    if finalize_data.chunk_count < 1:
+        raise HTTPException(status_code=400, detail="chunk_count must be 1 or greater")
+    started = time.perf_counter()
+    upload = _get_owned_upload(db, upload_id, current_user, lock=True)
+
+    if upload.status == "finalized":
+        file_import = db.query(FileImport).filter(FileImport.id == upload.file_import_id).first() \
+            if upload.file_import_id else None
+        if not file_import:
+            raise HTTPException(status_code=409, detail="Upload was finalized but its file import no longer exists")
+        return file_import
+
+    received = {
+        seq for (seq,) in db.query(ImportUploadChunk.seq).filter(ImportUploadChunk.upload_id == upload.id)
+    }
+    expected = set(range(finalize_data.chunk_count))
+    if received != expected:
+        missing = sorted(expected - received)
+        unexpected = sorted(received - expected)
+        detail = "Upload is incomplete"
+        if missing:
+            detail += f"; missing chunks: {missing[:20]}"
+        if unexpected:
+            detail += f"; chunks beyond chunk_count: {unexpected[:20]}"
+        raise HTTPException(status_code=409, detail=detail)
+
+    data_types = dict(
+        db.query(ImportUploadValue.data_type, func.count()).filter(
+            ImportUploadValue.upload_id == upload.id
+        ).group_by(ImportUploadValue.data_type).all()
+    )
+
+    existing_import = db.query(FileImport).filter(
+        and_(
+            FileImport.project_id == upload.project_id,
+            FileImport.import_type == upload.import_type
+        )
+    ).first()
+
+    if existing_import and upload.replace_mode == "delta":
+        if not data_types:
+            # Data types missing from a delta are removed, so this would wipe the import
+            raise HTTPException(status_code=400, detail="A delta upload must contain at least one value")
+        # Commits the upload bookkeeping together with the changes
+        response = _apply_staged_delta(db, upload, existing_import, data_types)
+        record_import_stats(db, upload.project_id, upload.import_type, "delta", data_types, time.perf_counter() - started)
+        return response
+
+    try:
+        if existing_import:
+            # Its import data goes with it via ON DELETE CASCADE
+            db.delete(existing_import)
+
+        file_import = FileImport(
+            project_id=upload.project_id,
+            import_type=upload.import_type,
+            filename=upload.filename,
+        )
+        db.add(file_import)
+        db.flush()
+
+        for data_type, count in data_types.items():
+            if count > COMPACT_VALUES_THRESHOLD:
+                # Sorted and de-duplicated by the database, streamed into the segment builder
+                import_data = ImportData(file_import_id=file_import.id, data_type=data_type)
+                db.add(import_data)
+                import_data.value_count = add_segments(import_data, _staged_sorted_unique(db, upload.id, data_type))
+                continue
+            _insert_staged_array(db, upload.id, file_import.id, data_type)
+
+        db.query(ImportUploadValue).filter(ImportUploadValue.upload_id == upload.id).delete(synchronize_session=False)
+        upload.status = "finalized"
+        upload.file_import_id = file_import.id
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(file_import)
+
+    record_import_stats(db, upload.project_id, upload.import_type, "full", data_types, time.perf_counter() - started)
+    return file_import
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def delete_import_upload(
+    upload_id: uuid.UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Abandon an upload and drop its staged values
+    """
+    upload = _get_owned_upload(db, upload_id, current_user)
+    db.delete(upload)
+    db.commit()
+    return None
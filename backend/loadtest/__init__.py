@@ -0,0 +1,3 @@
+"""
+Load-test harness for the authenticated API routes
+"""
@@ -0,0 +1,112 @@
+"""
+Local Clerk stand-in: a JWKS endpoint and a token minter
+
+auth.verify_clerk_token fetches the JWKS from CLERK_JWKS_URL on every request,
+so pointing CLERK_JWKS_URL at this server makes the API accept tokens minted
+here - the real verification code runs unchanged, including the JWKS fetch.
+
+Standalone use (prints a token you can paste into curl):
+    python -m loadtest.clerk_stub --port 8787 --user user_loadtest_1
+    CLERK_JWKS_URL=http://127.0.0.1:8787/.well-known/jwks.json uvicorn main:app
+"""
+import json
+import time
+import uuid
+import base64
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives import serialization
+from jose import jwt
+
+
+def _base64url_uint(value: int) -> str:
+    raw = value.to_bytes((value.bit_length() + 7) // 8, byteorder="big")
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+class ClerkStub:
+    """Holds one RSA signing key, its JWKS and a minting helper"""
+
+    def __init__(self):
+        self.kid = f"loadtest-{uuid.uuid4().hex[:8]}"
+        self._private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = self._private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption(),
+        )
+        public_numbers = self._private_key.public_key().public_numbers()
+        self.jwks = {
+            "keys": [{
+                "kty": "RSA",
+                "use": "sig",
+                "alg": "RS256",
+                "kid": self.kid,
+                "n": _base64url_uint(public_numbers.n),
+                "e": _base64url_uint(public_numbers.e),
+            }]
+        }
+        self._server = None
+
+    def mint_token(self, user_id: str, email: str = None, ttl: int = 3600) -> str:
+        """Mint an RS256 session token shaped like Clerk's"""
+        now = int(time.time())
+        claims = {
+            "sub": user_id,
+            "sid": f"sess_{uuid.uuid4().hex[:16]}",
+            "iat": now,
+            "nbf": now,
+            "exp": now + ttl,
+            "iss": "http://127.0.0.1/loadtest",
+        }
+        if email:
+            claims["email"] = email
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": self.kid})
+
+    def serve(self, host: str = "127.0.0.1", port: int = 8787) -> str:
+        """Serve the JWKS in a background thread and return its URL"""
+        body = json.dumps(self.jwks).encode("utf-8")
+
+        class JWKSHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep load-test output readable
+
+        self._server = ThreadingHTTPServer((host, port), JWKSHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://{host}:{self._server.server_port}/.well-known/jwks.json"
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a local JWKS and mint a test token")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--user", default="user_loadtest_1")
+    parser.add_argument("--ttl", type=int, default=24 * 3600)
+    args = parser.parse_args()
+
+    stub = ClerkStub()
+    url = stub.serve(args.host, args.port)
+    print(f"CLERK_JWKS_URL={url}")
+    print(f"Token for {args.user}:")
+    print(stub.mint_token(args.user, f"{args.user}@loadtest.local", ttl=args.ttl))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.shutdown()
@@ -0,0 +1,229 @@
+"""
+Concurrent load test against a running API, authenticated through the Clerk stand-in
+
+Usage (from the backend directory):
+    # Spawn uvicorn with 1 worker, then again with 4, and compare the ceilings
+    python -m loadtest.run --spawn-server --workers 1 --users 50 --duration 60
+    python -m loadtest.run --spawn-server --workers 4 --users 50 --duration 60
+
+    # Or drive a server you started yourself with
+    #   CLERK_JWKS_URL=http://127.0.0.1:8787/.well-known/jwks.json uvicorn main:app
+    python -m loadtest.run --base-url http://127.0.0.1:8000 --scenario project_crud
+
+Scenarios: project_crud, file_import_replace, cross_validation_fetch,
+address_batch, or "mixed" (weighted mix of all four). The database behind the
+API needs to be a local/throwaway one: every virtual user creates its own
+Clerk user, project and imports.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import subprocess
+from pathlib import Path
+
+import httpx
+
+from loadtest.clerk_stub import ClerkStub
+from benchmarks.synthetic import generate_addresses, generate_import_data
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+MIXED_WEIGHTS = {
+    "project_crud": 3,
+    "file_import_replace": 2,
+    "cross_validation_fetch": 4,
+    "address_batch": 1,
+}
+
+
+class VirtualUser:
+    def __init__(self, index, stub, args):
+        self.user_id = f"user_loadtest_{uuid.uuid4().hex[:10]}"
+        self.headers = {"Authorization": f"Bearer {stub.mint_token(self.user_id, f'{self.user_id}@loadtest.local')}"}
+        self.rng = random.Random(args.seed + index)
+        self.project_id = None
+        self.import_data = generate_import_data(args.import_size, seed=args.seed + index)
+        self.addresses = generate_addresses(args.address_batch, seed=args.seed + index)
+
+    async def setup(self, client):
+        response = await client.post("/api/projects", json={"name": "loadtest"}, headers=self.headers)
+        response.raise_for_status()
+        self.project_id = response.json()["id"]
+        response = await client.post("/api/file-imports", headers=self.headers, json={
+            "project_id": self.project_id, "import_type": "customer",
+            "filename": "customers.csv", "data": {"names": self.import_data["names"]},
+        })
+        response.raise_for_status()
+
+    async def teardown(self, client):
+        if self.project_id:
+            await client.delete(f"/api/projects/{self.project_id}", headers=self.headers)
+
+    async def project_crud(self, client):
+        response = await client.post("/api/projects", json={"name": "crud"}, headers=self.headers)
+        response.raise_for_status()
+        project_id = response.json()["id"]
+        (await client.get(f"/api/projects/{project_id}", headers=self.headers)).raise_for_status()
+        (await client.put(f"/api/projects/{project_id}", json={"name": "crud-renamed"}, headers=self.headers)).raise_for_status()
+        (await client.get("/api/projects", headers=self.headers)).raise_for_status()
+        (await client.delete(f"/api/projects/{project_id}", headers=self.headers)).raise_for_status()
+
+    async def file_import_replace(self, client):
+        part_numbers = list(self.import_data["part_numbers"])
+        # Touch ~1% of the values so each replace is a realistic re-export
+        for _ in range(max(1, len(part_numbers) // 100)):
+            part_numbers[self.rng.randrange(len(part_numbers))] = f"PN-{uuid.uuid4().hex[:8]}"
+        response = await client.post("/api/file-imports", headers=self.headers, json={
+            "project_id": self.project_id, "import_type": "ppvp",
+            "filename": "ppvp.csv", "data": {"part_numbers": part_numbers},
+        })
+        response.raise_for_status()
+
+    async def cross_validation_fetch(self, client):
+        response = await client.get(f"/api/file-imports/{self.project_id}/customer", headers=self.headers)
+        response.raise_for_status()
+
+    async def address_batch(self, client):
+        response = await client.post("/parse-addresses", headers=self.headers, json={
+            "import_type": "customer",
+            "addresses": [
+                {"row_id": i, "address": address, "original_row_data": {"Address": address}}
+                for i, address in enumerate(self.addresses)
+            ],
+        })
+        response.raise_for_status()
+
+
+async def _user_loop(user, client, scenarios, weights, deadline, stats):
+    while time.monotonic() < deadline:
+        scenario = user.rng.choices(scenarios, weights=weights)[0]
+        start = time.perf_counter()
+        try:
+            await getattr(user, scenario)(client)
+            stats[scenario]["latencies"].append(time.perf_counter() - start)
+        except Exception as e:
+            stats[scenario]["errors"] += 1
+            stats[scenario]["last_error"] = f"{type(e).__name__}: {str(e)[:200]}"
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, round(pct / 100 * (len(sorted_values) - 1)))]
+
+
+async def run_load(base_url, stub, args):
+    scenarios = list(MIXED_WEIGHTS) if args.scenario == "mixed" else [args.scenario]
+    weights = [MIXED_WEIGHTS[s] for s in scenarios]
+    stats = {s: {"latencies": [], "errors": 0, "last_error": None} for s in scenarios}
+
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        users = [VirtualUser(i, stub, args) for i in range(args.users)]
+        await asyncio.gather(*(user.setup(client) for user in users))
+
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            _user_loop(user, client, scenarios, weights, deadline, stats) for user in users
+        ))
+        elapsed = time.monotonic() - started
+
+        await asyncio.gather(*(user.teardown(client) for user in users), return_exceptions=True)
+
+    summary = {}
+    for scenario, data in stats.items():
+        latencies = sorted(data["latencies"])
+        summary[scenario] = {
+            "completed": len(latencies),
+            "errors": data["errors"],
+            "throughput_per_sec": round(len(latencies) / elapsed, 2),
+            "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+            "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+            "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+            "last_error": data["last_error"],
+        }
+    return summary
+
+
+def _spawn_server(args, jwks_url):
+    env = dict(os.environ, CLERK_JWKS_URL=jwks_url)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1",
+         "--port", str(args.port), "--workers", str(args.workers)],
+        cwd=BACKEND_DIR, env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become ready in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the authenticated API routes")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn-server", action="store_true", help="start uvicorn wired to the Clerk stand-in")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when spawning")
+    parser.add_argument("--port", type=int, default=8100, help="uvicorn port when spawning")
+    parser.add_argument("--jwks-port", type=int, default=8787)
+    parser.add_argument("--scenario", choices=["mixed", *MIXED_WEIGHTS], default="mixed")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--import-size", type=int, default=5000, help="values per uploaded data type")
+    parser.add_argument("--address-batch", type=int, default=100, help="rows per /parse-addresses call")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--startup-timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="write the summary as JSON")
+    args = parser.parse_args()
+
+    stub = ClerkStub()
+    jwks_url = stub.serve(port=args.jwks_port)
+    print(f"Clerk stand-in serving JWKS at {jwks_url}")
+
+    server = None
+    base_url = args.base_url
+    try:
+        if args.spawn_server:
+            server, base_url = _spawn_server(args, jwks_url)
+            print(f"uvicorn ready at {base_url} with {args.workers} worker(s)")
+        summary = asyncio.run(run_load(base_url, stub, args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        stub.shutdown()
+
+    print(f"{'scenario':<24} {'done':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for scenario, row in summary.items():
+        print(f"{scenario:<24} {row['completed']:>7} {row['errors']:>5} {row['throughput_per_sec']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+        if row["last_error"]:
+            print(f"  last error: {row['last_error']}")
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            "workers": args.workers if args.spawn_server else None,
+            "users": args.users,
+            "duration": args.duration,
+            "scenario": args.scenario,
+            "results": summary,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
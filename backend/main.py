@@ -1,55 +1,95 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
-from postal.parser import parse_address
-from rapidfuzz import process, fuzz
-import re
-import math
-import pandas as pd
 from typing import List, Optional, Dict, Any
-from auth import get_current_user
+from uuid import UUID
+from auth import get_current_user, get_request_user
 from projects import router as projects_router
 from file_imports import router as file_imports_router
+from import_uploads import router as import_uploads_router
+from parse_stats import router as parse_stats_router, record_batch_stats
+from projects import get_or_create_user
+from database import get_db
+from models import Project, ParseSession, ParseSessionRow
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
 import traceback
-
-# Lazy load US cities database (only when needed)
-_cities_df = None
-_cities_by_state = None
-_state_name_to_code = None
-_state_code_to_name = None
-
-def _load_cities_data():
-    """Load cities data on first access"""
-    global _cities_df, _cities_by_state, _state_name_to_code, _state_code_to_name
-    if _cities_df is None:
-        import os
-        from pathlib import Path
-        csv_path = Path(__file__).parent / 'uscities.csv'
-        _cities_df = pd.read_csv(csv_path)
-        _cities_by_state = _cities_df.groupby('state_id')['city'].apply(list).to_dict()
-        _state_name_to_code = _cities_df.set_index('state_name')['state_id'].to_dict()
-        _state_code_to_name = _cities_df.set_index('state_id')['state_name'].to_dict()
-    return _cities_df, _cities_by_state, _state_name_to_code, _state_code_to_name
-
-def get_cities_by_state():
-    _, cities_by_state, _, _ = _load_cities_data()
-    return cities_by_state
-
-def get_state_name_to_code():
-    _, _, state_name_to_code, _ = _load_cities_data()
-    return state_name_to_code
-
-def get_state_code_to_name():
-    _, _, _, state_code_to_name = _load_cities_data()
-    return state_code_to_name
-
-def get_all_cities():
-    cities_df, _, _, _ = _load_cities_data()
-    return cities_df['city'].tolist()
+import hashlib
+import json
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+import time
+from address_parsing import (
+    get_confidence_score, parse_and_correct_many, clean_address_text,
+    clean_many, lookup_cached, parse_cleaned_many, fan_out,
+)
+from parser_service import get_parser_client
+import metrics
+from metrics import stage_timer
+import profiling
+from scheduling import parse_scheduler, client_key, PARSE_CHUNK_SIZE, PARSE_SMALL_BATCH
+from single_flight import SingleFlight, LatestOnly
+
+# Readiness flag - flipped once libpostal and the city index are loaded
+_ready = False
+
+def warm_up():
+    """Load the parsing pipeline (or wait for the parser service) before serving."""
+    client = get_parser_client()
+    if client is None:
+        from address_parsing import warm_up as warm_up_pipeline
+        warm_up_pipeline()
+        return
+    # Parser-service mode: the service owns libpostal, just wait until it answers
+    deadline = time.monotonic() + float(os.getenv("PARSER_SERVICE_WAIT", "600"))
+    while True:
+        try:
+            if client.ping():
+                return
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(1)
+
+def run_address_pipeline(texts: List[str]):
+    """Parse a batch locally, or through the parser service when one is configured."""
+    client = get_parser_client()
+    if client is not None:
+        with stage_timer("parser_service"):
+            return client.parse_and_correct_many(texts)
+    return parse_and_correct_many(texts)
+
+def run_cleaned_pipeline(cleaned_texts: List[str]):
+    """Parse unique cleaned strings locally, or through the parser service when one is configured."""
+    client = get_parser_client()
+    if client is not None:
+        with stage_timer("parser_service"):
+            return client.parse_cleaned_many(cleaned_texts)
+    return parse_cleaned_many(cleaned_texts)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up the parsing pipeline before the worker accepts traffic."""
+    global _ready
+    if os.getenv("WARMUP_ON_STARTUP", "true").lower() in ("1", "true", "yes"):
+        try:
+            await run_in_threadpool(warm_up)
+        except Exception as e:
+            # Stay "not ready" so the load balancer keeps traffic away from this worker
+            print(f"Warm-up failed: {str(e)}")
+            print(traceback.format_exc())
+            yield
+            return
+    _ready = True
+    yield
 
 
-app = FastAPI(title="Fishbowl Flex API")
+app = FastAPI(title="Fishbowl Flex API", lifespan=lifespan)
 
 # Add CORS middleware - MUST be added before other middleware
 app.add_middleware(
@@ -77,176 +117,53 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+# Per-request Server-Timing header (only installed when enabled, so it costs nothing otherwise)
+if metrics.SERVER_TIMING_ENABLED:
+    @app.middleware("http")
+    async def server_timing_middleware(request: Request, call_next):
+        token = metrics.start_request_timings()
+        try:
+            response = await call_next(request)
+        finally:
+            header = metrics.finish_request_timings(token)
+        if header:
+            response.headers["Server-Timing"] = header
+        return response
+
+# On-demand request profiling (only installed when PROFILING_ENABLED is set)
+if profiling.PROFILING_ENABLED:
+    app.add_middleware(profiling.ProfilingMiddleware)
+    app.include_router(profiling.router)
+
 # Include project routes
 app.include_router(projects_router)
 # Include file import routes
 app.include_router(file_imports_router)
-
-# --- Helper functions ---
-def clean_address_text(text: str) -> str:
-    """Remove non-address noise and normalize tokens before parsing."""
-    t = text.strip()
-
-    # Strip common prefixes / noise
-    t = re.sub(r'(?i)\battn:?|attention\b', '', t)
-
-    # Remove phone numbers and extensions (x304, ext. 55)
-    t = re.sub(r'\b\d{3}[-.\s]?\d{3}[-.\s]?\d{4}\b', '', t)
-    t = re.sub(r'(?i)\b(?:x|ext\.?)\s*\d{1,5}\b', '', t)
-
-    # Remove hours like 7am-8pm
-    t = re.sub(r'(?i)\b\d{1,2}\s?(am|pm)\s?-\s?\d{1,2}\s?(am|pm)\b', '', t)
-
-    # Normalize country tokens and common misspellings
-    t = re.sub(r'(?i)\bU\.?\s*S\.?\s*A\.?\b', 'USA', t)
-    t = re.sub(r'(?i)\bpheonix\b', 'Phoenix', t)
-
-    # Drop stray punctuation (keep commas), collapse whitespace, tidy commas
-    t = re.sub(r'[^\w\s,]', ' ', t)
-    t = re.sub(r'\s*,\s*', ', ', t)
-    t = re.sub(r'\s{2,}', ' ', t)
-
-    return t.strip(' ,.-')
-
-def parse_with_libpostal(text: str) -> dict:
-    parsed_pairs = parse_address(text)
-    result = {"Street": "", "City": "", "State": "", "Zip": "", "Country": ""}
-    mapping = {
-        "house_number": "Street",
-        "road": "Street",
-        "unit": "Street",
-        "suburb": "City",
-        "city": "City",
-        "state": "State",
-        "postcode": "Zip",
-        "country": "Country"
-    }
-
-    # if Libpostal returns nothing, parsed_pairs will be empty list
-    if parsed_pairs:
-        for val, comp in parsed_pairs:  # Note: postal returns (value, component)
-            if comp in mapping:
-                key = mapping[comp]
-                if result[key]:  # If there's already content, add a space
-                    result[key] = f"{result[key]} {val}".strip()
-                else:  # If empty, just set the value
-                    result[key] = val.strip()
-
-    # Check if this is an international address
-    country = result.get("Country", "").upper()
-    is_international = country and country not in ['USA', 'US', 'UNITED STATES', 'U.S.A.', 'U.S.', '']
-    
-    if is_international:
-        if country == "CANADA":
-            # For Canada: use libpostal parsing but skip US city matching
-            # Keep the parsed components as-is (libpostal handles Canadian addresses well)
-            # No additional processing needed - result already has parsed components
-            pass
-        else:
-            # For other international addresses: keep everything in Street field
-            result = {
-                "Street": text.strip(),  # Keep original address
-                "City": "",
-                "State": "", 
-                "Zip": "",
-                "Country": result["Country"]  # Keep the detected country
-            }
-    else:
-        # For US addresses: use existing enhanced parsing logic
-        
-        # ✅ fallback runs when result is still empty
-        if not any(result.values()):
-            m = re.search(
-                r'(\d{1,5}\s+[A-Za-z0-9\s]+?)\s+([A-Za-z][A-Za-z\s]+?)\s+([A-Za-z]{2})[,\s]+(\d{5}(?:-\d{4})?)',
-                text,
-                flags=re.IGNORECASE,
-            )
-            if m:
-                street, city, state, z = m.groups()
-                result["Street"] = street.strip()
-                result["City"] = city.strip().title()
-                result["State"] = state.upper()
-                result["Zip"] = z
-                if re.search(r'\bUSA\b', text, flags=re.IGNORECASE):
-                    result["Country"] = "USA"
-
-        # Final normalization for casing/labels (US addresses only)
-        if result["City"]:
-            result["City"] = result["City"].title()
-        if result["State"]:
-            result["State"] = result["State"].upper()
-        if result["Country"]:
-            if re.search(r'(?i)\b(usa|u\.s\.a|united states|us)\b', result["Country"], flags=re.IGNORECASE):
-                result["Country"] = "USA"
-            else:
-                result["Country"] = result["Country"].title()
-
-    return result
-
-def get_confidence_score(parsed):
-    """Compute a 1–10 confidence score."""
-    score = 0
-    if parsed.get("Street"): score += 3
-    if parsed.get("City"): score += 2
-    if parsed.get("State"): score += 2
-    if parsed.get("Zip"): score += 2
-    if parsed.get("Country"): score += 1
-    return min(score, 10)
-
-def correct_city_name(city, state=None):
-    """Enhanced city matching with state-specific lookup for better accuracy."""
-    if not city:
-        return city, 0
-    
-    # Normalize state code (handle both full names and abbreviations)
-    state_code = None
-    if state:
-        state_upper = state.upper()
-        cities_by_state = get_cities_by_state()
-        state_name_to_code = get_state_name_to_code()
-        # Check if it's already a state code
-        if state_upper in cities_by_state:
-            state_code = state_upper
-        # Check if it's a state name that needs conversion
-        elif state_upper in state_name_to_code:
-            state_code = state_name_to_code[state_upper]
-        # Try common state name variations
-        elif state_upper in ['CALIFORNIA', 'CA']:
-            state_code = 'CA'
-        elif state_upper in ['TEXAS', 'TX']:
-            state_code = 'TX'
-        elif state_upper in ['NEW YORK', 'NY']:
-            state_code = 'NY'
-        # Add more common mappings as needed
-    
-    # If we have a valid state, search only within that state
-    cities_by_state = get_cities_by_state()
-    if state_code and state_code in cities_by_state:
-        state_cities = cities_by_state[state_code]
-        match = process.extractOne(city, state_cities, scorer=fuzz.partial_ratio)
-        if match and match[1] > 60:  # Higher threshold for state-specific matching
-            return match[0], match[1]
-    
-    # Fallback: search all cities if no state or no good match found
-    all_cities = get_all_cities()
-    match = process.extractOne(city, all_cities, scorer=fuzz.partial_ratio)
-    if match and match[1] > 50:  # Lower threshold for fallback
-        return match[0], match[1]
-    
-    return city, 0
+# Include chunked file import upload routes
+app.include_router(import_uploads_router)
+# Include parse stats routes
+app.include_router(parse_stats_router)
 
 # --- FastAPI Models ---
 class AddressRequest(BaseModel):
     text: str
+    # Optional id for successive versions of one input (e.g. a field being typed into):
+    # a newer request with the same key supersedes this one, which then gets a 409
+    supersede_key: Optional[str] = None
 
 class AddressItem(BaseModel):
     row_id: int
     address: str
-    original_row_data: Dict[str, Any]  # Preserve all original columns
+    original_row_data: Optional[Dict[str, Any]] = None  # Preserve all original columns (echoed back)
 
 class CSVParseRequest(BaseModel):
     import_type: str
     addresses: List[AddressItem]
+    # False: results carry only row_id, success, parsed_address and error_message -
+    # for clients that already hold the original rows
+    echo_row_data: bool = True
+    # Record this batch's stats against a project (best-effort, needs signing in)
+    project_id: Optional[str] = None
 
 class ParsedAddress(BaseModel):
     street: str
@@ -258,8 +175,8 @@ class ParsedAddress(BaseModel):
 class AddressResult(BaseModel):
     row_id: int
     success: bool
-    original_address: str
-    original_row_data: Dict[str, Any]  # Preserve all original columns
+    original_address: Optional[str] = None  # omitted when echo_row_data is false
+    original_row_data: Optional[Dict[str, Any]] = None  # Preserve all original columns
     parsed_address: Optional[ParsedAddress] = None
     error_message: Optional[str] = None
 
@@ -269,6 +186,72 @@ class CSVParseResponse(BaseModel):
     error_count: int
     results: List[AddressResult]
 
+class ParseSessionCreate(BaseModel):
+    import_type: str
+    addresses: List[AddressItem]  # row_ids must be unique within the session
+    echo_row_data: bool = True
+
+class ParseSessionResponse(CSVParseResponse):
+    session_id: UUID
+
+class ParseSessionUpdate(BaseModel):
+    addresses: List[AddressItem] = []  # rows that were added or edited
+    removed_row_ids: List[int] = []
+    echo_row_data: bool = True
+
+class ParseSessionDiff(BaseModel):
+    session_id: UUID
+    changed: List[AddressResult]  # rows re-parsed because their address is new or changed
+    removed_row_ids: List[int]
+    unchanged_count: int  # rows sent with the address they already had - not re-parsed
+    processed_count: int  # totals across the whole session
+    error_count: int
+
+# --- Internal row record ---
+PARSED_FIELDS = ("street", "city", "state", "zip", "country")
+
+class ParsedRow:
+    """One parsed row of a batch.
+
+    Slotted, with the parsed components in a tuple, so a big batch costs one
+    small object per row instead of several dicts and models. The original
+    address and row data are only kept when they will be echoed back.
+    """
+    __slots__ = ("row_id", "address", "row_data", "parsed", "error_message")
+
+    def __init__(self, row_id: int, address: Optional[str] = None, row_data: Optional[Dict[str, Any]] = None):
+        self.row_id = row_id
+        self.address = address
+        self.row_data = row_data
+        self.parsed = None  # (street, city, state, zip, country) when parsing succeeded
+        self.error_message = None
+
+    def to_dict(self, echo_row_data: bool = True) -> Dict[str, Any]:
+        """The row in the AddressResult shape"""
+        result = {"row_id": self.row_id, "success": self.parsed is not None}
+        if echo_row_data:
+            result["original_address"] = self.address
+            result["original_row_data"] = self.row_data
+        result["parsed_address"] = None if self.parsed is None else dict(zip(PARSED_FIELDS, self.parsed))
+        result["error_message"] = self.error_message
+        return result
+
+# Readiness endpoint for the load balancer
+@app.get("/ready")
+async def readiness():
+    """Report whether this worker has finished warming up"""
+    if not _ready:
+        return JSONResponse(status_code=503, content={"status": "not ready"})
+    return {"status": "ready"}
+
+# Prometheus-style metrics for the address pipeline
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Expose per-stage histograms and pipeline counters"""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return metrics.render_prometheus()
+
 # Authentication endpoint
 @app.get("/api/auth/me")
 async def get_current_user_info(user: dict = Depends(get_current_user)):
@@ -279,101 +262,411 @@ async def get_current_user_info(user: dict = Depends(get_current_user)):
         "authenticated": True
     }
 
-@app.post("/parse-address")
-def parse_address_api(req: AddressRequest):
-    raw = req.text.strip()
-    cleaned = clean_address_text(raw)
-    parsed = parse_with_libpostal(cleaned)
-
-    # Fuzzy-correct city if needed (pass state for state-specific matching)
-    parsed["City"], city_conf = correct_city_name(parsed.get("City", ""), parsed.get("State", ""))
+# Concurrent /parse-address calls for the same cleaned text share one parse
+_address_flights = SingleFlight()
+_latest_address_requests = LatestOnly()
 
-    # Compute confidence
+async def _parse_single(user: str, raw: str):
+    # Single addresses always go in the scheduler's priority lane
+    async with parse_scheduler.slot(user, small=True):
+        work = asyncio.ensure_future(run_in_threadpool(run_address_pipeline, [raw]))
+        try:
+            return (await asyncio.shield(work))[0]
+        except asyncio.CancelledError:
+            # libpostal can't be interrupted - keep the slot until the thread is done
+            await asyncio.wait({work})
+            raise
+
+def overall_confidence(parsed: dict, city_conf: int) -> int:
+    """1-10 confidence for a parse: component coverage adjusted for fuzzy match quality"""
     confidence = get_confidence_score(parsed)
-
-    # Adjust for fuzzy match quality
     if city_conf < 60:
         confidence -= 2
     elif city_conf < 80:
         confidence -= 1
-    confidence = max(1, min(confidence, 10))
+    return max(1, min(confidence, 10))
+
+def _pipeline_path(parsed: dict, city_conf: int) -> str:
+    """Which way a row went through the pipeline, for the batch stats"""
+    country = parsed.get("Country", "")
+    if country and country.upper() != "USA":
+        return "international"
+    if not parsed.get("City"):
+        return "no_city"
+    if city_conf >= 100:
+        return "city_exact"
+    return "city_fuzzy" if city_conf > 0 else "city_unmatched"
+
+@app.post("/parse-address")
+async def parse_address_api(req: AddressRequest, request: Request):
+    raw = req.text.strip()
+    user = await client_key(request)
+    try:
+        flight_key = clean_address_text(raw)
+    except Exception:
+        flight_key = raw
+    parse = _address_flights.do(flight_key, lambda: _parse_single(user, raw))
+    if req.supersede_key:
+        result = await _latest_address_requests.run(user, req.supersede_key, parse)
+    else:
+        result = await parse
+    metrics.inc("addresses_total")
+    if isinstance(result, Exception):
+        metrics.inc("address_errors_total")
+        raise result
+    cleaned, parsed, city_conf = result
 
     return {
         "raw": raw,
         "cleaned": cleaned,
         "parsed": parsed,
         "city_confidence": city_conf,
-        "overall_confidence": confidence
+        "overall_confidence": overall_confidence(parsed, city_conf)
     }
 
-@app.post("/parse-addresses", response_model=CSVParseResponse)
-def parse_addresses_csv(req: CSVParseRequest):
-    """Parse multiple addresses from CSV data with error handling."""
-    
+def _check_address_import_type(import_type: str):
     # Only process Customer and Vendor import types
-    if req.import_type.lower() not in ['customer', 'vendor']:
+    if import_type.lower() not in ['customer', 'vendor']:
         raise HTTPException(
             status_code=400, 
             detail="Address parsing only supported for 'customer' and 'vendor' import types"
         )
-    
-    results = []
+
+def _build_rows(address_items: List[AddressItem], cleaned_texts: list, unique_results: dict, echo_row_data: bool = True):
+    """Fan a batch's per-unique-string results back out into ParsedRow records (runs in the threadpool).
+
+    Returns (rows, processed_count, error_count, quality), quality being the
+    confidence histogram and per-path counts that go into the batch stats.
+    """
+    rows = []
     processed_count = 0
     error_count = 0
+    confidence_counts = [0] * 10
+    path_counts = {}
+    pipeline_results = fan_out(cleaned_texts, unique_results)
     
-    for address_item in req.addresses:
-        try:
-            # Clean and parse the address
-            cleaned = clean_address_text(address_item.address)
-            parsed = parse_with_libpostal(cleaned)
-            
-            # Fuzzy-correct city if needed (pass state for state-specific matching)
-            parsed["City"], city_conf = correct_city_name(parsed.get("City", ""), parsed.get("State", ""))
-            
-            # Create parsed address object
-            parsed_address = ParsedAddress(
-                street=parsed.get("Street", ""),
-                city=parsed.get("City", ""),
-                state=parsed.get("State", ""),
-                zip=parsed.get("Zip", ""),
-                country=parsed.get("Country", "")
-            )
-            
-            # Check if parsing was successful (has at least street or city)
-            if parsed_address.street or parsed_address.city:
-                results.append(AddressResult(
-                    row_id=address_item.row_id,
-                    success=True,
-                    original_address=address_item.address,
-                    original_row_data=address_item.original_row_data,  # Preserve original data
-                    parsed_address=parsed_address
-                ))
-                processed_count += 1
+    with stage_timer("response"):
+        for address_item, pipeline_result in zip(address_items, pipeline_results):
+            if echo_row_data:
+                row = ParsedRow(address_item.row_id, address_item.address, address_item.original_row_data)
             else:
-                # Parsing failed - return original address, leave City/State/Zip/Country empty
-                results.append(AddressResult(
-                    row_id=address_item.row_id,
-                    success=False,
-                    original_address=address_item.address,
-                    original_row_data=address_item.original_row_data,  # Preserve original data
-                    error_message="Address parsing failed - no valid components found"
-                ))
+                row = ParsedRow(address_item.row_id)
+            if isinstance(pipeline_result, Exception):
+                # Any error during parsing - return original address, leave City/State/Zip/Country empty
+                row.error_message = f"Parsing error: {str(pipeline_result)}"
                 error_count += 1
-                
-        except Exception as e:
-            # Any error during parsing - return original address, leave City/State/Zip/Country empty
-            results.append(AddressResult(
-                row_id=address_item.row_id,
-                success=False,
-                original_address=address_item.address,
-                original_row_data=address_item.original_row_data,  # Preserve original data
-                error_message=f"Parsing error: {str(e)}"
-            ))
-            error_count += 1
+                path_counts["error"] = path_counts.get("error", 0) + 1
+            else:
+                _, parsed, city_conf = pipeline_result
+                confidence_counts[overall_confidence(parsed, city_conf) - 1] += 1
+                path = _pipeline_path(parsed, city_conf)
+                path_counts[path] = path_counts.get(path, 0) + 1
+                street = parsed.get("Street", "")
+                city = parsed.get("City", "")
+                # Check if parsing was successful (has at least street or city)
+                if street or city:
+                    row.parsed = (street, city, parsed.get("State", ""), parsed.get("Zip", ""), parsed.get("Country", ""))
+                    processed_count += 1
+                else:
+                    # Parsing failed - return original address, leave City/State/Zip/Country empty
+                    row.error_message = "Address parsing failed - no valid components found"
+                    error_count += 1
+            rows.append(row)
+
+    metrics.inc("addresses_total", len(address_items))
+    metrics.inc("address_errors_total", error_count)
+    return rows, processed_count, error_count, {"confidence": confidence_counts, "paths": path_counts}
+
+async def build_address_results(request: Request, address_items: List[AddressItem], echo_row_data: bool = True):
+    """Parse a batch through the scheduler, one PARSE_CHUNK_SIZE chunk per slot.
+
+    Rows are cleaned in chunks, then deduplicated and looked up in the parse
+    cache across the whole request; only the unique cache misses go through
+    libpostal and city correction, again a chunk per slot. Small batches share
+    the priority lane with /parse-address; bigger ones are queued per user so
+    they can't starve everyone else. Only the first chunk is subject to the
+    queue limit - an accepted batch always finishes.
+    Returns (rows, processed_count, error_count, quality).
+    """
+    user = await client_key(request)
+    small = len(address_items) <= PARSE_SMALL_BATCH
+    texts = [item.address for item in address_items]
+
+    cleaned_texts = []
+    for start in range(0, len(texts), PARSE_CHUNK_SIZE):
+        async with parse_scheduler.slot(user, small, admit=start == 0):
+            cleaned_texts.extend(await run_in_threadpool(clean_many, texts[start:start + PARSE_CHUNK_SIZE]))
+
+    unique_results = await run_in_threadpool(lookup_cached, cleaned_texts)
+    misses = [
+        cleaned for cleaned in dict.fromkeys(cleaned_texts)
+        if not isinstance(cleaned, Exception) and cleaned not in unique_results
+    ]
+    for start in range(0, len(misses), PARSE_CHUNK_SIZE):
+        async with parse_scheduler.slot(user, small, admit=False):
+            unique_results.update(await run_in_threadpool(run_cleaned_pipeline, misses[start:start + PARSE_CHUNK_SIZE]))
+
+    return await run_in_threadpool(_build_rows, address_items, cleaned_texts, unique_results, echo_row_data)
+
+def _rows_response(payload: Dict[str, Any], key: str, rows: List[ParsedRow], echo_row_data: bool, status_code: int = 200):
+    """Serialize rows straight into a JSONResponse (runs in the threadpool for big batches).
+
+    Returned as a Response so FastAPI skips re-validating every row against
+    the route's response_model, which still documents the shape.
+    """
+    with stage_timer("serialize"):
+        payload[key] = [row.to_dict(echo_row_data) for row in rows]
+        return JSONResponse(payload, status_code=status_code)
+
+async def _stats_project_id(request: Request, project_id: str) -> Optional[UUID]:
+    """Id of the caller's project to record batch stats against, or None.
+
+    Stats are best-effort: a malformed id, a missing or expired token, someone
+    else's project or a database error only skips recording (and is logged) -
+    the parse itself never fails because of them.
+    """
+    try:
+        project_uuid = UUID(project_id)
+    except ValueError:
+        print(f"Skipping parse stats: invalid project id {project_id!r}")
+        return None
+    try:
+        current_user = await get_request_user(request)
+    except Exception as e:
+        print(f"Skipping parse stats for project {project_id}: {getattr(e, 'detail', str(e))}")
+        return None
+    if current_user is None:
+        print(f"Skipping parse stats for project {project_id}: not signed in")
+        return None
+    db_gen = get_db()
+    db = next(db_gen)
+    try:
+        user = get_or_create_user(db, current_user["user_id"], current_user.get("email") or "")
+        project = db.query(Project).filter(
+            Project.id == project_uuid, Project.user_id == user.id
+        ).first()
+        if not project:
+            print(f"Skipping parse stats for project {project_id}: not found for this user")
+            return None
+        return project.id
+    except Exception as e:
+        print(f"Skipping parse stats for project {project_id}: {str(e)}")
+        return None
+    finally:
+        db_gen.close()
+
+@app.post("/parse-addresses", response_model=CSVParseResponse)
+async def parse_addresses_csv(req: CSVParseRequest, request: Request):
+    """Parse multiple addresses from CSV data with error handling."""
+    _check_address_import_type(req.import_type)
     
-    return CSVParseResponse(
-        success=True,
-        processed_count=processed_count,
-        error_count=error_count,
-        results=results
-    )
\ No newline at end of file
+    # Auth and the database are only involved when stats go to a project, and
+    # even then only for the stats; the parse works without either
+    project_id = None
+    if req.project_id:
+        project_id = await _stats_project_id(request, req.project_id)
+    
+    started = time.perf_counter()
+    rows, processed_count, error_count, quality = await build_address_results(request, req.addresses, req.echo_row_data)
+    if project_id is not None:
+        db_gen = get_db()
+        db = next(db_gen)
+        try:
+            record_batch_stats(
+                db, project_id, "parse_addresses", req.import_type.lower(),
+                len(rows), processed_count, error_count, time.perf_counter() - started, quality,
+            )
+        finally:
+            db_gen.close()
+    
+    return await run_in_threadpool(_rows_response, {
+        "success": True,
+        "processed_count": processed_count,
+        "error_count": error_count,
+    }, "results", rows, req.echo_row_data)
+
+# --- Parse sessions ---
+# A session keeps every row's parse result in the database, keyed by row_id
+# with a hash of the address it was parsed from, so the DataValidation page can
+# send only the rows the user edited and get back just the rows that changed.
+PARSE_SESSION_TTL_HOURS = int(os.getenv("PARSE_SESSION_TTL_HOURS", "24"))
+ROW_ID_BATCH = 10000  # row ids per IN (...) / rows per INSERT
+
+def content_hash(address: str) -> str:
+    """Hash of a row's address text - the row is only parsed again when it changes"""
+    return hashlib.blake2b(address.encode("utf-8"), digest_size=16).hexdigest()
+
+def _check_unique_row_ids(row_ids: List[int]):
+    if len(set(row_ids)) != len(row_ids):
+        raise HTTPException(status_code=400, detail="Each row_id may appear only once per request")
+
+def _get_owned_session(db: Session, session_id: UUID, current_user: dict, lock: bool = False) -> ParseSession:
+    """The parse session if it belongs to the signed-in user, else 404"""
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    query = db.query(ParseSession).filter(ParseSession.id == session_id, ParseSession.user_id == user.id)
+    if lock:
+        # Serializes updates to the same session
+        query = query.with_for_update()
+    session = query.first()
+
+    if not session:
+        raise HTTPException(status_code=404, detail="Parse session not found")
+    return session
+
+def _copy_session_rows(db: Session, session_id: UUID, hashes: List[str], rows: List[ParsedRow]):
+    """COPY a new session's rows on the session's own connection (runs in the threadpool)"""
+    cursor = db.connection().connection.cursor()
+    with cursor.copy(
+        "COPY parse_session_rows (session_id, row_id, content_hash, success, result) FROM STDIN"
+    ) as copy:
+        for row_hash, row in zip(hashes, rows):
+            copy.write_row((session_id, row.row_id, row_hash, row.parsed is not None, json.dumps(row.to_dict(echo_row_data=False))))
+
+def _store_session_rows(db: Session, session_id: UUID, hashes: List[str], rows: List[ParsedRow]):
+    """Insert or replace session rows with their address hash and result (runs in the threadpool)"""
+    values = [
+        {
+            "session_id": session_id,
+            "row_id": row.row_id,
+            "content_hash": row_hash,
+            "success": row.parsed is not None,
+            "result": row.to_dict(echo_row_data=False),
+        }
+        for row_hash, row in zip(hashes, rows)
+    ]
+    stmt = pg_insert(ParseSessionRow)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ParseSessionRow.session_id, ParseSessionRow.row_id],
+        set_={"content_hash": stmt.excluded.content_hash, "success": stmt.excluded.success, "result": stmt.excluded.result},
+    )
+    for start in range(0, len(values), ROW_ID_BATCH):
+        db.execute(stmt, values[start:start + ROW_ID_BATCH])
+
+def _session_totals(db: Session, session_id: UUID):
+    """(processed_count, error_count) across every row of a session"""
+    counts = dict(db.query(ParseSessionRow.success, func.count()).filter(
+        ParseSessionRow.session_id == session_id
+    ).group_by(ParseSessionRow.success).all())
+    return counts.get(True, 0), counts.get(False, 0)
+
+@app.post("/parse-addresses/sessions", response_model=ParseSessionResponse, status_code=201)
+async def create_parse_session(
+    req: ParseSessionCreate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Parse a batch like /parse-addresses and keep the results for PATCH re-validation."""
+    _check_address_import_type(req.import_type)
+    _check_unique_row_ids([item.row_id for item in req.addresses])
+
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    rows, processed_count, error_count, _ = await build_address_results(request, req.addresses, req.echo_row_data)
+
+    # Drop sessions nobody has touched for a while; their rows go with them via ON DELETE CASCADE
+    cutoff = datetime.utcnow() - timedelta(hours=PARSE_SESSION_TTL_HOURS)
+    db.query(ParseSession).filter(ParseSession.updated_at < cutoff).delete(synchronize_session=False)
+
+    session = ParseSession(user_id=user.id, import_type=req.import_type.lower())
+    db.add(session)
+    db.flush()
+    hashes = [content_hash(item.address) for item in req.addresses]
+    await run_in_threadpool(_copy_session_rows, db, session.id, hashes, rows)
+    db.commit()
+
+    return await run_in_threadpool(_rows_response, {
+        "session_id": str(session.id),
+        "success": True,
+        "processed_count": processed_count,
+        "error_count": error_count,
+    }, "results", rows, req.echo_row_data, 201)
+
+@app.get("/parse-addresses/sessions/{session_id}", response_model=ParseSessionResponse)
+async def get_parse_session(
+    session_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Every stored row of a session (without echoed row data), e.g. to restore the page after a reload."""
+    session = _get_owned_session(db, session_id, current_user)
+    results = [
+        result for (result,) in db.query(ParseSessionRow.result).filter(
+            ParseSessionRow.session_id == session.id
+        ).order_by(ParseSessionRow.row_id)
+    ]
+    processed_count = sum(1 for result in results if result["success"])
+    return JSONResponse({
+        "session_id": str(session.id),
+        "success": True,
+        "processed_count": processed_count,
+        "error_count": len(results) - processed_count,
+        "results": results,
+    })
+
+@app.patch("/parse-addresses/sessions/{session_id}", response_model=ParseSessionDiff)
+async def update_parse_session(
+    session_id: UUID,
+    req: ParseSessionUpdate,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Re-parse only the rows whose address is new or changed, drop removed rows, and return the diff."""
+    row_ids = [item.row_id for item in req.addresses]
+    # Also rejects a row that is both edited and removed
+    _check_unique_row_ids(row_ids + req.removed_row_ids)
+    session = _get_owned_session(db, session_id, current_user, lock=True)
+
+    stored_hashes = {}
+    for start in range(0, len(row_ids), ROW_ID_BATCH):
+        stored_hashes.update(db.query(ParseSessionRow.row_id, ParseSessionRow.content_hash).filter(
+            ParseSessionRow.session_id == session.id,
+            ParseSessionRow.row_id.in_(row_ids[start:start + ROW_ID_BATCH]),
+        ).all())
+    changed_items = []
+    changed_hashes = []
+    for item in req.addresses:
+        item_hash = content_hash(item.address)
+        if stored_hashes.get(item.row_id) != item_hash:
+            changed_items.append(item)
+            changed_hashes.append(item_hash)
+
+    rows = []
+    if changed_items:
+        rows, _, _, _ = await build_address_results(request, changed_items, req.echo_row_data)
+        await run_in_threadpool(_store_session_rows, db, session.id, changed_hashes, rows)
+
+    removed_row_ids = []
+    for start in range(0, len(req.removed_row_ids), ROW_ID_BATCH):
+        removed_row_ids.extend(db.execute(delete(ParseSessionRow).where(
+            ParseSessionRow.session_id == session.id,
+            ParseSessionRow.row_id.in_(req.removed_row_ids[start:start + ROW_ID_BATCH]),
+        ).returning(ParseSessionRow.row_id)).scalars())
+
+    session.updated_at = datetime.utcnow()
+    processed_count, error_count = _session_totals(db, session.id)
+    db.commit()
+
+    return await run_in_threadpool(_rows_response, {
+        "session_id": str(session_id),
+        "removed_row_ids": sorted(removed_row_ids),
+        "unchanged_count": len(req.addresses) - len(changed_items),
+        "processed_count": processed_count,
+        "error_count": error_count,
+    }, "changed", rows, req.echo_row_data)
+
+@app.delete("/parse-addresses/sessions/{session_id}", status_code=204)
+async def delete_parse_session(
+    session_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """Drop a parse session once the user is done with the file."""
+    session = _get_owned_session(db, session_id, current_user)
+    db.delete(session)
+    db.commit()
+    return None
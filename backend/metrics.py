@@ -0,0 +1,162 @@
+"""
+Per-stage latency metrics for the address pipeline
+
+Stage timers feed Prometheus-style histograms (exposed on /metrics) and, when
+SERVER_TIMING_ENABLED is set, a per-request Server-Timing header. With both
+switches off stage_timer() hands back a shared no-op object, so instrumented
+code pays one function call and a bool check.
+
+Metrics are per process: with several uvicorn workers each one reports its own
+numbers. In parser-service mode the pipeline stages are recorded inside the
+service process; workers only see the round trip as the "parser_service" stage.
+"""
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() in ("1", "true", "yes")
+_enabled = METRICS_ENABLED or SERVER_TIMING_ENABLED
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+COUNTER_HELP = {
+    "addresses_total": "Addresses run through the parsing pipeline",
+    "address_errors_total": "Addresses that failed to parse",
+    "city_exact_total": "City lookups answered by the exact-match fast path",
+    "city_fallback_total": "City lookups that fell back to the national city list",
+    "international_total": "Addresses routed past US city matching as non-US",
+    "parse_rejected_total": "Parse requests turned away with a 429 because the queue was full",
+    "parse_coalesced_total": "Single-address requests that joined an identical in-flight parse",
+    "parse_superseded_total": "Single-address requests dropped because a newer one replaced them",
+    "parse_cache_hits_total": "Unique cleaned addresses answered by the on-disk parse cache",
+    "parse_cache_misses_total": "Unique cleaned addresses the on-disk parse cache didn't have",
+}
+
+# Stage timings for the current request (only set by the Server-Timing middleware)
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms: Dict[str, _Histogram] = {}
+_counters: Dict[str, int] = {}
+
+
+def observe(stage: str, seconds: float) -> None:
+    """Record one timing for a pipeline stage"""
+    if METRICS_ENABLED:
+        with _lock:
+            histogram = _histograms.get(stage)
+            if histogram is None:
+                histogram = _histograms[stage] = _Histogram()
+            histogram.observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+def inc(name: str, amount: int = 1) -> None:
+    """Increment a counter"""
+    if not METRICS_ENABLED or not amount:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def stage_timer(stage: str):
+    """Context manager timing one stage; a no-op when instrumentation is off"""
+    if not _enabled:
+        return _NULL_TIMER
+    return _StageTimer(stage)
+
+
+def start_request_timings():
+    """Begin collecting Server-Timing entries for the current request"""
+    return _request_timings.set({})
+
+
+def finish_request_timings(token) -> str:
+    """Stop collecting and return the Server-Timing header value"""
+    timings = _request_timings.get() or {}
+    _request_timings.reset(token)
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items())
+
+
+def _format_le(bound: float) -> str:
+    return repr(bound) if bound < 1 else f"{bound:.1f}"
+
+
+def render_prometheus() -> str:
+    """Render all histograms and counters in the Prometheus text format"""
+    with _lock:
+        histograms = {stage: (list(h.counts), h.total, h.count) for stage, h in _histograms.items()}
+        counters = dict(_counters)
+
+    lines = [
+        "# HELP fishbowl_stage_seconds Time spent in each address pipeline stage",
+        "# TYPE fishbowl_stage_seconds histogram",
+    ]
+    for stage in sorted(histograms):
+        counts, total, count = histograms[stage]
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS, counts):
+            cumulative += bucket_count
+            lines.append(f'fishbowl_stage_seconds_bucket{{stage="{stage}",le="{_format_le(bound)}"}} {cumulative}')
+        lines.append(f'fishbowl_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {count}')
+        lines.append(f'fishbowl_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+        lines.append(f'fishbowl_stage_seconds_count{{stage="{stage}"}} {count}')
+
+    for name in sorted(set(COUNTER_HELP) | set(counters)):
+        metric = f"fishbowl_{name}"
+        if name in COUNTER_HELP:
+            lines.append(f"# HELP {metric} {COUNTER_HELP[name]}")
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {counters.get(name, 0)}")
+
+    return "\n".join(lines) + "\n"
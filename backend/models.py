@@ -1,7 +1,7 @@
 """
 Database models using SQLAlchemy
 """
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, JSON, Integer, BigInteger, Boolean, LargeBinary, Index
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -21,7 +21,7 @@ class User(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationship to projects
-    projects = relationship("Project", back_populates="user", cascade="all, delete-orphan")
+    projects = relationship("Project", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class Project(Base):
@@ -32,14 +32,14 @@ class Project(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String, nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationship to user
     user = relationship("User", back_populates="projects")
-    # Relationships to file imports
-    file_imports = relationship("FileImport", back_populates="project", cascade="all, delete-orphan")
+    # Relationships to file imports (deleted by the database's ON DELETE CASCADE, not loaded first)
+    file_imports = relationship("FileImport", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class FileImport(Base):
@@ -49,7 +49,7 @@ class FileImport(Base):
     __tablename__ = "file_imports"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id"), nullable=False, index=True)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
     import_type = Column(String, nullable=False)  # 'customer', 'vendor', 'ppvp', etc.
     filename = Column(String, nullable=False)
     exported_at = Column(DateTime, default=datetime.utcnow)
@@ -58,7 +58,7 @@ class FileImport(Base):
     # Relationship to project
     project = relationship("Project", back_populates="file_imports")
     # Relationship to import data
-    import_data = relationship("ImportData", back_populates="file_import", cascade="all, delete-orphan")
+    import_data = relationship("ImportData", back_populates="file_import", cascade="all, delete-orphan", passive_deletes=True)
 
 
 class ImportData(Base):
@@ -68,12 +68,122 @@ class ImportData(Base):
     __tablename__ = "import_data"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    file_import_id = Column(UUID(as_uuid=True), ForeignKey("file_imports.id"), nullable=False, index=True)
+    file_import_id = Column(UUID(as_uuid=True), ForeignKey("file_imports.id", ondelete="CASCADE"), nullable=False, index=True)
     data_type = Column(String, nullable=False)  # 'name', 'part_number', 'vendor_name'
-    values = Column(ARRAY(String), nullable=False)  # Array of names/part numbers
+    # NULL when the set is stored compactly in segments instead
+    values = Column(ARRAY(String), nullable=True)  # Array of names/part numbers
+    value_count = Column(Integer, nullable=True)  # number of values across the segments
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # Relationship to file import
     file_import = relationship("FileImport", back_populates="import_data")
+    # Compact segments of a very large set; write-only so they're never loaded as a whole
+    segments = relationship("ImportDataSegment", lazy="write_only", cascade="all, delete-orphan", passive_deletes=True)
 
 
+class ImportDataSegment(Base):
+    """
+    Import data segment - a sorted range of a large value set, as a compact blob
+    Segments of one ImportData cover disjoint value ranges, so a delta import
+    only re-encodes the segments whose range gained or lost values
+    """
+    __tablename__ = "import_data_segments"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    import_data_id = Column(UUID(as_uuid=True), ForeignKey("import_data.id", ondelete="CASCADE"), nullable=False, index=True)
+    first_value = Column(Text, nullable=False)  # lowest value in the segment
+    value_count = Column(Integer, nullable=False)
+    checksum = Column(String, nullable=False)  # of the segment's values, to skip unchanged segments
+    # Sorted, de-duplicated, front-coded blob (see value_codec.py)
+    values_blob = Column(LargeBinary, nullable=False)
+
+
+class ParseStat(Base):
+    """
+    Parse stats model - one compact row per /parse-addresses batch or file import
+    """
+    __tablename__ = "parse_stats"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    source = Column(String, nullable=False)  # 'parse_addresses' or 'file_import'
+    import_type = Column(String, nullable=True)
+    row_count = Column(Integer, nullable=False)
+    success_count = Column(Integer, nullable=False)
+    error_count = Column(Integer, nullable=False)
+    duration_ms = Column(Integer, nullable=False)
+    # Confidence histogram (counts for scores 1-10) and per-path / per-data-type counts
+    details = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (Index("ix_parse_stats_project_id_created_at", "project_id", "created_at"),)
+
+
+class ImportUpload(Base):
+    """
+    Chunked file import upload - collects values in import_upload_values until finalized
+    """
+    __tablename__ = "import_uploads"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    import_type = Column(String, nullable=False)
+    filename = Column(String, nullable=False)
+    replace_mode = Column(String, nullable=False, default="full")
+    status = Column(String, nullable=False, default="open")  # 'open' or 'finalized'
+    # The file import it became; kept so a repeated finalize returns the same one
+    file_import_id = Column(UUID(as_uuid=True), ForeignKey("file_imports.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ImportUploadChunk(Base):
+    """
+    One received chunk of an upload - its checksum makes re-sending it a no-op
+    """
+    __tablename__ = "import_upload_chunks"
+
+    upload_id = Column(UUID(as_uuid=True), ForeignKey("import_uploads.id", ondelete="CASCADE"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    checksum = Column(String, nullable=False)  # sha256 hex of the chunk body
+    value_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ImportUploadValue(Base):
+    """
+    Staging row for an open upload, loaded with COPY; moved into import_data on finalize
+    """
+    __tablename__ = "import_upload_values"
+
+    upload_id = Column(UUID(as_uuid=True), ForeignKey("import_uploads.id", ondelete="CASCADE"), primary_key=True)
+    data_type = Column(String, primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    position = Column(Integer, primary_key=True)  # index within the chunk's list for this data type
+    value = Column(Text, nullable=False)
+
+
+class ParseSession(Base):
+    """
+    Parsed rows of one /parse-addresses batch, kept so later edits only re-parse the rows that changed
+    """
+    __tablename__ = "parse_sessions"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    import_type = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ParseSessionRow(Base):
+    """
+    One row of a parse session: the hash of the address it was parsed from, and the result
+    """
+    __tablename__ = "parse_session_rows"
+
+    session_id = Column(UUID(as_uuid=True), ForeignKey("parse_sessions.id", ondelete="CASCADE"), primary_key=True)
+    row_id = Column(BigInteger, primary_key=True)
+    content_hash = Column(String, nullable=False)  # of the address text
+    success = Column(Boolean, nullable=False)
+    result = Column(JSON, nullable=False)  # the row's AddressResult without the echoed row data
@@ -0,0 +1,143 @@
+"""
+Optional on-disk cache of parse results that survives restarts
+
+When PARSE_CACHE_PATH is set, parse_and_correct_many looks every unique
+cleaned address up in a local SQLite file before running libpostal and city
+correction, and stores what it had to compute. All workers on the machine
+share the file (WAL mode, so readers don't block the writer).
+
+Entries are keyed by the cleaned text plus a pipeline version: a hash of
+address_parsing.py (cleaning rules, component mapping, city ranking), of
+uscities.csv and of the installed libpostal binding. Changing any of them
+changes the version, and rows from other versions are purged the next time a
+worker opens the cache. The cache holds at most PARSE_CACHE_MAX_ENTRIES rows;
+the oldest are evicted first.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from metrics import inc
+
+PARSE_CACHE_PATH = os.getenv("PARSE_CACHE_PATH", "")  # empty: cache disabled
+PARSE_CACHE_MAX_ENTRIES = int(os.getenv("PARSE_CACHE_MAX_ENTRIES", "500000"))
+
+BACKEND_DIR = Path(__file__).resolve().parent
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS parses (
+    version TEXT NOT NULL,
+    cleaned TEXT NOT NULL,
+    result TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (version, cleaned)
+);
+CREATE INDEX IF NOT EXISTS parses_created_at ON parses (created_at);
+"""
+
+
+def pipeline_version() -> str:
+    """Hash of everything a cached parse depends on"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in ("address_parsing.py", "uscities.csv"):
+        digest.update((BACKEND_DIR / name).read_bytes())
+    try:
+        from importlib.metadata import version
+        digest.update(version("postal").encode())
+    except Exception:
+        pass  # binding not installed as a distribution - sources and data still count
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """SQLite-backed map of cleaned address -> (parsed, city_confidence)"""
+
+    def __init__(self, path: str, max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.version = pipeline_version()
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        db = self._connection()
+        with db:
+            db.executescript(_SCHEMA)
+            # Results from another pipeline version are stale
+            db.execute("DELETE FROM parses WHERE version != ?", (self.version,))
+        self._count = db.execute("SELECT count(*) FROM parses").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Tuple[dict, int]]:
+        keys = list(keys)
+        found = {}
+        db = self._connection()
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for cleaned, result in db.execute(
+                f"SELECT cleaned, result FROM parses WHERE version = ? AND cleaned IN ({placeholders})",
+                (self.version, *chunk),
+            ):
+                parsed, city_conf = json.loads(result)
+                found[cleaned] = (parsed, city_conf)
+        inc("parse_cache_hits_total", len(found))
+        inc("parse_cache_misses_total", len(keys) - len(found))
+        return found
+
+    def put_many(self, items: Dict[str, Tuple[dict, int]]) -> None:
+        if not items:
+            return
+        now = time.time()
+        db = self._connection()
+        with db:
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO parses (version, cleaned, result, created_at) VALUES (?, ?, ?, ?)",
+                [(self.version, cleaned, json.dumps(result), now) for cleaned, result in items.items()],
+            )
+            self._count += db.total_changes - before
+        if self._count > self.max_entries:
+            self._evict(db)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Drop the oldest entries down to 90% of the cap"""
+        with self._evict_lock, db:
+            # Other workers write to the same file, so recount before deleting
+            self._count = db.execute("SELECT count(*) FROM parses").fetchone()[0]
+            excess = self._count - int(self.max_entries * 0.9)
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM parses WHERE rowid IN (SELECT rowid FROM parses ORDER BY created_at LIMIT ?)",
+                    (excess,),
+                )
+                self._count -= excess
+
+
+_cache: Optional[ParseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """The shared cache, or None when PARSE_CACHE_PATH isn't set"""
+    global _cache
+    if not PARSE_CACHE_PATH:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ParseCache(PARSE_CACHE_PATH)
+    return _cache
@@ -0,0 +1,185 @@
+"""
+Per-batch parse statistics and the per-project dashboard endpoint
+
+Every /parse-addresses batch sent with a project_id, and every file import,
+leaves one compact row in parse_stats: row/success/error counts, duration, a
+10-bucket confidence histogram and per-path counts. The endpoint below rolls
+those rows up into a time series plus percentile summaries, so a throughput
+regression or a bad input file shows up without re-running anything.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from sqlalchemy import and_, func
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from uuid import UUID
+from datetime import datetime, timedelta
+
+from database import get_db
+from models import ParseStat, Project
+from auth import get_current_user
+from projects import get_or_create_user
+
+router = APIRouter(prefix="/api/parse-stats", tags=["parse-stats"])
+
+BUCKETS = ("hour", "day")  # date_trunc fields; buckets are calendar hours/days (UTC)
+
+
+def record_batch_stats(
+    db: Session,
+    project_id,
+    source: str,
+    import_type: Optional[str],
+    row_count: int,
+    success_count: int,
+    error_count: int,
+    duration: float,
+    details: Optional[dict] = None,
+) -> None:
+    """Store one batch's stats; failures are logged, never raised to the caller"""
+    try:
+        db.add(ParseStat(
+            project_id=project_id,
+            source=source,
+            import_type=import_type,
+            row_count=row_count,
+            success_count=success_count,
+            error_count=error_count,
+            duration_ms=int(duration * 1000),
+            details=details,
+        ))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Failed to record parse stats: {str(e)}")
+
+
+# Pydantic models for response
+class Percentiles(BaseModel):
+    p50: float
+    p90: float
+    p99: float
+
+
+class StatsBucket(BaseModel):
+    start: datetime
+    batches: int
+    rows: int
+    success_rate: float
+    rows_per_sec: float
+
+
+class StatsSummary(BaseModel):
+    batches: int
+    rows: int
+    success_rate: float
+    rows_per_sec: Percentiles  # per batch
+    duration_ms: Percentiles  # per batch
+    batch_success_rate: Percentiles  # spread of success rate across batches
+    confidence_histogram: List[int]  # rows per overall confidence score 1-10
+    paths: Dict[str, int]  # rows per pipeline path (exact, fuzzy, international, ...)
+
+
+class ParseStatsResponse(BaseModel):
+    project_id: UUID
+    since: datetime
+    bucket: str
+    summary: StatsSummary
+    series: List[StatsBucket]
+
+
+def _percentiles(values: List[float]) -> Percentiles:
+    if not values:
+        return Percentiles(p50=0, p90=0, p99=0)
+    ordered = sorted(values)
+
+    def pick(pct):
+        return round(ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))], 2)
+
+    return Percentiles(p50=pick(50), p90=pick(90), p99=pick(99))
+
+
+def _rate(rows: int, duration_ms: int) -> float:
+    return round(rows * 1000 / duration_ms, 2) if duration_ms else 0.0
+
+
+@router.get("/{project_id}", response_model=ParseStatsResponse)
+async def get_parse_stats(
+    project_id: UUID,
+    days: int = Query(30, ge=1, le=365),
+    bucket: str = "day",
+    source: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Time series and percentile summary of a project's parse/import batches
+    """
+    if bucket not in BUCKETS:
+        raise HTTPException(status_code=400, detail="bucket must be 'hour' or 'day'")
+
+    # Get or create user in database
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    # Verify project belongs to user
+    project = db.query(Project).filter(
+        and_(Project.id == project_id, Project.user_id == user.id)
+    ).first()
+
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    since = datetime.utcnow() - timedelta(days=days)
+    query = db.query(
+        func.date_trunc(bucket, ParseStat.created_at), ParseStat.row_count, ParseStat.success_count,
+        ParseStat.duration_ms, ParseStat.details,
+    ).filter(
+        and_(ParseStat.project_id == project_id, ParseStat.created_at >= since)
+    )
+    if source:
+        query = query.filter(ParseStat.source == source)
+    stats = query.order_by(ParseStat.created_at).all()
+
+    series: Dict[datetime, List[int]] = {}  # bucket start -> [batches, rows, successes, duration_ms]
+    histogram = [0] * 10
+    paths: Dict[str, int] = {}
+    for start, row_count, success_count, duration_ms, details in stats:
+        totals = series.setdefault(start, [0, 0, 0, 0])
+        totals[0] += 1
+        totals[1] += row_count
+        totals[2] += success_count
+        totals[3] += duration_ms
+        details = details or {}
+        for score, count in enumerate(details.get("confidence", [])[:10]):
+            histogram[score] += count
+        for path, count in details.get("paths", {}).items():
+            paths[path] = paths.get(path, 0) + count
+
+    total_rows = sum(row_count for _, row_count, _, _, _ in stats)
+    total_successes = sum(success_count for _, _, success_count, _, _ in stats)
+    return ParseStatsResponse(
+        project_id=project_id,
+        since=since,
+        bucket=bucket,
+        summary=StatsSummary(
+            batches=len(stats),
+            rows=total_rows,
+            success_rate=round(total_successes / total_rows, 4) if total_rows else 0.0,
+            rows_per_sec=_percentiles([_rate(rows, ms) for _, rows, _, ms, _ in stats if ms]),
+            duration_ms=_percentiles([ms for _, _, _, ms, _ in stats]),
+            batch_success_rate=_percentiles([ok / rows for _, rows, ok, _, _ in stats if rows]),
+            confidence_histogram=histogram,
+            paths=paths,
+        ),
+        series=[
+            StatsBucket(
+                start=start,
+                batches=batches,
+                rows=rows,
+                success_rate=round(successes / rows, 4) if rows else 0.0,
+                rows_per_sec=_rate(rows, duration_ms),
+            )
+            for start, (batches, rows, successes, duration_ms) in series.items()
+        ],
+    )
@@ -0,0 +1,224 @@
+"""
+Local parser service - one process owns libpostal and the city index
+
+Every uvicorn worker normally loads its own copy of libpostal's model and the
+pandas city DataFrame. In parser-service mode a single process loads them once
+and API workers send it batches over a Unix socket instead; the workers never
+import postal.parser (which loads the model at import time) or pandas.
+
+Run the service:
+    python parser_service.py --socket /tmp/fishbowl-parser.sock
+
+Point the API workers at it:
+    PARSER_SERVICE_SOCKET=/tmp/fishbowl-parser.sock uvicorn main:app --workers 4
+
+Wire format: each message is a 4-byte big-endian length followed by a UTF-8
+JSON document.
+    {"op": "ping"}                     -> {"status": "ready"}
+    {"op": "parse", "texts": [...]}    -> {"results": [[cleaned, parsed, city_conf] | {"error": msg}, ...]}
+    {"op": "parse_cleaned", "texts": [...]}
+                                       -> {"results": [[parsed, city_conf] | {"error": msg}, ...]}
+
+parse_cleaned takes strings the worker already cleaned, deduplicated and
+looked up in the parse cache, so only the misses cross the socket.
+"""
+import os
+import json
+import socket
+import struct
+import threading
+import socketserver
+from typing import List, Optional
+
+_HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 256 * 1024 * 1024  # refuse anything bigger than 256 MB
+
+
+class ParserServiceError(Exception):
+    """Raised when the parser service can't be reached or returns an error"""
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("Parser service connection closed")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, payload: dict) -> None:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(body)) + body)
+
+
+def recv_message(sock: socket.socket) -> dict:
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if size > MAX_MESSAGE_BYTES:
+        raise ConnectionError(f"Parser service message too large ({size} bytes)")
+    return json.loads(_recv_exact(sock, size).decode("utf-8"))
+
+
+# --- Server side ---
+class _ParserRequestHandler(socketserver.BaseRequestHandler):
+    """Serve messages on one client connection until it closes"""
+
+    def handle(self):
+        from address_parsing import parse_and_correct_many, parse_cleaned_many
+
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            op = message.get("op")
+            if op == "ping":
+                response = {"status": "ready"}
+            elif op == "parse":
+                results = []
+                for item in parse_and_correct_many(message.get("texts", [])):
+                    if isinstance(item, Exception):
+                        results.append({"error": str(item)})
+                    else:
+                        results.append(list(item))
+                response = {"results": results}
+            elif op == "parse_cleaned":
+                texts = message.get("texts", [])
+                unique_results = parse_cleaned_many(texts)
+                results = []
+                for cleaned in texts:
+                    item = unique_results[cleaned]
+                    if isinstance(item, Exception):
+                        results.append({"error": str(item)})
+                    else:
+                        results.append(list(item))
+                response = {"results": results}
+            else:
+                response = {"error": f"Unknown op: {op}"}
+
+            try:
+                send_message(self.request, response)
+            except OSError:
+                return
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(socket_path: str) -> None:
+    """Warm up the pipeline once, then serve parse requests on socket_path"""
+    from address_parsing import warm_up
+
+    print("Parser service warming up libpostal and the city index...")
+    warm_up()
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    with _ThreadingUnixServer(socket_path, _ParserRequestHandler) as server:
+        os.chmod(socket_path, 0o660)
+        print(f"Parser service listening on {socket_path}")
+        server.serve_forever()
+
+
+# --- Client side ---
+class ParserServiceClient:
+    """Thin client used by API workers; keeps one connection per thread"""
+
+    def __init__(self, socket_path: str, timeout: float = 120.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _close(self) -> None:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            self._local.sock = None
+
+    def _request(self, payload: dict) -> dict:
+        # Retry once on a fresh connection - the service may have restarted
+        for attempt in range(2):
+            try:
+                sock = getattr(self._local, "sock", None)
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                send_message(sock, payload)
+                response = recv_message(sock)
+                break
+            except (ConnectionError, OSError) as e:
+                self._close()
+                if attempt:
+                    raise ParserServiceError(f"Parser service unavailable: {str(e)}")
+        if "error" in response:
+            raise ParserServiceError(response["error"])
+        return response
+
+    def ping(self) -> bool:
+        return self._request({"op": "ping"}).get("status") == "ready"
+
+    def parse_and_correct_many(self, texts: List[str]):
+        """Same contract as address_parsing.parse_and_correct_many"""
+        results = []
+        for item in self._request({"op": "parse", "texts": list(texts)})["results"]:
+            if isinstance(item, dict):
+                results.append(ParserServiceError(item["error"]))
+            else:
+                cleaned, parsed, city_conf = item
+                results.append((cleaned, parsed, city_conf))
+        return results
+
+    def parse_cleaned_many(self, texts: List[str]):
+        """Same contract as address_parsing.parse_cleaned_many"""
+        texts = list(texts)
+        response = self._request({"op": "parse_cleaned", "texts": texts})
+        unique_results = {}
+        for cleaned, item in zip(texts, response["results"]):
+            if isinstance(item, dict):
+                unique_results[cleaned] = ParserServiceError(item["error"])
+            else:
+                parsed, city_conf = item
+                unique_results[cleaned] = (parsed, city_conf)
+        return unique_results
+
+
+_client = None
+
+
+def get_parser_client() -> Optional[ParserServiceClient]:
+    """Return the shared client when PARSER_SERVICE_SOCKET is set, else None"""
+    global _client
+    socket_path = os.getenv("PARSER_SERVICE_SOCKET")
+    if not socket_path:
+        return None
+    if _client is None or _client.socket_path != socket_path:
+        _client = ParserServiceClient(
+            socket_path, timeout=float(os.getenv("PARSER_SERVICE_TIMEOUT", "120"))
+        )
+    return _client
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the shared libpostal parser service")
+    parser.add_argument(
+        "--socket",
+        default=os.getenv("PARSER_SERVICE_SOCKET", "/tmp/fishbowl-parser.sock"),
+        help="Unix socket path to listen on",
+    )
+    args = parser.parse_args()
+    serve(args.socket)
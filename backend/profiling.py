@@ -0,0 +1,210 @@
+"""
+On-demand request profiling
+
+When PROFILING_ENABLED is set, a middleware can profile individual requests:
+either on demand (X-Profile: 1 plus X-Profile-Token matching PROFILING_TOKEN)
+or for a random PROFILING_SAMPLE_RATE fraction of traffic. Without the switch
+the middleware isn't installed at all.
+
+Profiles are statistical: a sampler thread snapshots every thread's Python
+stack while the request runs, so sync endpoints running in the threadpool are
+covered too. Time inside libpostal and rapidfuzz shows up on the line that
+calls into them (e.g. parse_with_libpostal or correct_city_name). Only stacks
+that pass through backend code are kept; other requests running in the same
+worker at the same moment can appear in the profile.
+
+Each profile is saved as a collapsed-stack file (flamegraph.pl / speedscope
+input) plus a JSON summary, and can be downloaded from /api/admin/profiles.
+"""
+import os
+import re
+import sys
+import hmac
+import json
+import time
+import uuid
+import random
+import threading
+from collections import Counter
+from pathlib import Path
+
+from fastapi import APIRouter, Header, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.005"))  # seconds between samples
+PROFILING_DIR = Path(os.getenv("PROFILING_DIR", "/tmp/fishbowl-profiles"))
+PROFILING_MAX_FILES = int(os.getenv("PROFILING_MAX_FILES", "200"))
+
+BACKEND_DIR = str(Path(__file__).resolve().parent)
+_THIS_FILE = str(Path(__file__).resolve())
+
+# One profile at a time per worker keeps overhead bounded
+_profile_lock = threading.Lock()
+
+router = APIRouter(prefix="/api/admin/profiles", tags=["profiling"])
+
+
+class StackSampler(threading.Thread):
+    """Sample all threads' stacks every `interval` seconds until stopped"""
+
+    def __init__(self, interval: float):
+        super().__init__(daemon=True, name="request-profiler")
+        self.interval = interval
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.sample_count += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                in_app = False
+                while frame is not None:
+                    code = frame.f_code
+                    filename = code.co_filename
+                    if (filename.startswith(BACKEND_DIR) and filename != _THIS_FILE
+                            and "site-packages" not in filename):
+                        in_app = True
+                    stack.append(f"{code.co_name} ({os.path.basename(filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if in_app:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _should_profile(request: Request) -> bool:
+    if request.url.path.startswith(router.prefix):
+        return False
+    if request.headers.get("x-profile") == "1" and PROFILING_TOKEN:
+        token = request.headers.get("x-profile-token", "")
+        if hmac.compare_digest(token, PROFILING_TOKEN):
+            return True
+    return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+
+def _top_functions(samples: Counter, limit: int = 25):
+    """Self-time by leaf frame, as a share of all kept samples"""
+    total = sum(samples.values()) or 1
+    leaves = Counter()
+    for stack, count in samples.items():
+        leaves[stack.rsplit(";", 1)[-1]] += count
+    return [
+        {"frame": frame, "samples": count, "percent": round(count * 100 / total, 1)}
+        for frame, count in leaves.most_common(limit)
+    ]
+
+
+def _save_profile(profile_id: str, method: str, path: str, status_code: int, duration: float, sampler: StackSampler):
+    """Write the profile files and prune old ones (blocking file I/O - run it in the threadpool)"""
+    PROFILING_DIR.mkdir(parents=True, exist_ok=True)
+    with open(PROFILING_DIR / f"{profile_id}.folded", "w") as f:
+        for stack, count in sampler.samples.most_common():
+            f.write(f"{stack} {count}\n")
+    summary = {
+        "id": profile_id,
+        "method": method,
+        "path": path,
+        "status_code": status_code,
+        "duration_ms": round(duration * 1000, 1),
+        "interval_ms": PROFILING_INTERVAL * 1000,
+        "samples": sampler.sample_count,
+        "created_at": time.time(),
+        "top_functions": _top_functions(sampler.samples),
+    }
+    (PROFILING_DIR / f"{profile_id}.json").write_text(json.dumps(summary, indent=2))
+
+    # Keep the directory bounded - drop the oldest profiles
+    summaries = sorted(PROFILING_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in summaries[:-PROFILING_MAX_FILES]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".folded").unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    """Profile the request if it was asked for (or sampled) and nothing else is being profiled.
+
+    A plain ASGI middleware rather than @app.middleware("http"): the profile
+    runs until the last body chunk has been sent, so streamed responses
+    (e.g. the file import /stream endpoint) are covered end to end.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = Request(scope)
+        if not _should_profile(request) or not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        sampler = StackSampler(PROFILING_INTERVAL)
+        status_code = 500
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            duration = time.perf_counter() - start
+            try:
+                await run_in_threadpool(
+                    _save_profile, profile_id, request.method, request.url.path, status_code, duration, sampler
+                )
+            except Exception as e:
+                print(f"Failed to save profile {profile_id}: {str(e)}")
+            finally:
+                _profile_lock.release()
+
+
+def _require_token(token: str):
+    if not PROFILING_TOKEN or not hmac.compare_digest(token or "", PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+@router.get("")
+def list_profiles(x_profile_token: str = Header("")):
+    """List stored profiles, newest first"""
+    _require_token(x_profile_token)
+    summaries = sorted(PROFILING_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    profiles = []
+    for path in summaries:
+        summary = json.loads(path.read_text())
+        summary.pop("top_functions", None)
+        profiles.append(summary)
+    return profiles
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str, format: str = "json", x_profile_token: str = Header("")):
+    """Download one profile: its JSON summary, or the collapsed stacks with ?format=folded"""
+    _require_token(x_profile_token)
+    if format not in ("json", "folded") or not re.fullmatch(r"[\w-]+", profile_id):
+        raise HTTPException(status_code=400, detail="Invalid profile request")
+    path = PROFILING_DIR / f"{profile_id}.{format}"
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Profile not found")
+    media_type = "application/json" if format == "json" else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=path.name)
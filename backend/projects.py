@@ -3,14 +3,14 @@ Project management endpoints
 """
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from pydantic import BaseModel, model_validator
-from typing import List, Optional
+from sqlalchemy import and_, func
+from pydantic import BaseModel
+from typing import Dict, List, Optional
 from uuid import UUID
 from datetime import datetime
 
 from database import get_db
-from models import Project, User
+from models import Project, User, FileImport, ImportData
 from auth import get_current_user
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
@@ -26,34 +26,64 @@ class ProjectUpdate(BaseModel):
 
 
 class ProjectResponse(BaseModel):
-    id: str
+    # UUIDs are serialized natively (as strings in JSON); no per-row conversion needed
+    id: UUID
     name: str
-    user_id: str
+    user_id: UUID
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
-    
-    @model_validator(mode='before')
-    @classmethod
-    def convert_uuid_to_str(cls, data):
-        """Convert UUID objects to strings before validation"""
-        if isinstance(data, dict):
-            if 'id' in data and isinstance(data['id'], UUID):
-                data['id'] = str(data['id'])
-            if 'user_id' in data and isinstance(data['user_id'], UUID):
-                data['user_id'] = str(data['user_id'])
-        elif hasattr(data, 'id') and hasattr(data, 'user_id'):
-            # Handle ORM objects
-            return {
-                'id': str(data.id),
-                'name': data.name,
-                'user_id': str(data.user_id),
-                'created_at': data.created_at,
-                'updated_at': data.updated_at
-            }
-        return data
+
+
+class ProjectRename(BaseModel):
+    id: UUID
+    name: str
+
+
+class ProjectBulkCreate(BaseModel):
+    projects: List[ProjectCreate]
+
+
+class ProjectBulkUpdate(BaseModel):
+    projects: List[ProjectRename]
+
+
+class ProjectBulkDelete(BaseModel):
+    project_ids: List[UUID]
+
+
+# Cap on items per bulk request so one call can't hold a transaction forever
+BULK_MAX_ITEMS = 500
+
+
+def _check_bulk_size(count: int):
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} projects per bulk request")
+
+
+def _get_owned_projects(db: Session, user: User, project_ids) -> List[Project]:
+    """Load the given projects in one query; 404 unless every one belongs to the user"""
+    project_ids = set(project_ids)
+    projects = db.query(Project).filter(
+        and_(Project.id.in_(project_ids), Project.user_id == user.id)
+    ).all()
+    if len(projects) != len(project_ids):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return projects
+
+
+class ImportTypeSummary(BaseModel):
+    import_type: str
+    filename: str
+    exported_at: Optional[datetime] = None
+    value_counts: Dict[str, int]  # data_type -> number of values
+
+
+class ProjectSummary(BaseModel):
+    project: ProjectResponse
+    imports: List[ImportTypeSummary]
 
 
 def get_or_create_user(db: Session, clerk_user_id: str, email: str) -> User:
@@ -128,6 +158,84 @@ async def create_project(
     return project
 
 
+@router.post("/bulk", response_model=List[ProjectResponse], status_code=201)
+async def bulk_create_projects(
+    bulk_data: ProjectBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Create several projects for the current user in one transaction
+    """
+    _check_bulk_size(len(bulk_data.projects))
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    projects = [Project(name=item.name, user_id=user.id) for item in bulk_data.projects]
+    db.add_all(projects)
+    db.flush()
+    # Column defaults are filled in Python, so the rows are complete after the flush;
+    # build the response now instead of refreshing every row after the commit
+    response = [ProjectResponse.model_validate(project) for project in projects]
+    db.commit()
+
+    return response
+
+
+@router.put("/bulk", response_model=List[ProjectResponse])
+async def bulk_update_projects(
+    bulk_data: ProjectBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Rename several projects in one transaction (all of them must belong to the current user)
+    """
+    _check_bulk_size(len(bulk_data.projects))
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    names = {item.id: item.name for item in bulk_data.projects}
+    projects = _get_owned_projects(db, user, names)
+
+    now = datetime.utcnow()
+    for project in projects:
+        project.name = names[project.id]
+        project.updated_at = now
+    db.flush()
+    response = [ProjectResponse.model_validate(project) for project in projects]
+    db.commit()
+
+    return response
+
+
+@router.post("/bulk-delete", status_code=204)
+async def bulk_delete_projects(
+    bulk_data: ProjectBulkDelete,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Delete several projects and everything imported into them, in one transaction
+    """
+    _check_bulk_size(len(bulk_data.project_ids))
+    email = current_user.get("email") or ""
+    user = get_or_create_user(db, current_user["user_id"], email)
+
+    project_ids = set(bulk_data.project_ids)
+    owned = db.query(Project.id).filter(
+        and_(Project.id.in_(project_ids), Project.user_id == user.id)
+    ).count()
+    if owned != len(project_ids):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # One set-based DELETE; file_imports and import_data go with it via ON DELETE CASCADE
+    db.query(Project).filter(Project.id.in_(project_ids)).delete(synchronize_session=False)
+    db.commit()
+
+    return None
+
+
 @router.get("/{project_id}", response_model=ProjectResponse)
 async def get_project(
     project_id: UUID,
@@ -153,6 +261,62 @@ async def get_project(
     return project
 
 
+@router.get("/{project_id}/summary", response_model=ProjectSummary)
+async def get_project_summary(
+    project_id: UUID,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Get a project with, per import type, the latest filename, exported_at and
+    value counts per data type - in one query, counting arrays in the database
+    """
+    rows = db.query(
+        Project,
+        FileImport.import_type,
+        FileImport.filename,
+        FileImport.exported_at,
+        FileImport.created_at,
+        ImportData.data_type,
+        func.coalesce(ImportData.value_count, func.cardinality(ImportData.values)),
+    ).join(
+        User, Project.user_id == User.id
+    ).outerjoin(
+        FileImport, FileImport.project_id == Project.id
+    ).outerjoin(
+        ImportData, ImportData.file_import_id == FileImport.id
+    ).filter(
+        and_(Project.id == project_id, User.clerk_user_id == current_user["user_id"])
+    ).all()
+
+    if not rows:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    # Keep only the newest file import per import type
+    imports = {}
+    for _, import_type, filename, exported_at, created_at, data_type, value_count in rows:
+        if import_type is None:
+            continue
+        summary = imports.get(import_type)
+        if summary is None or created_at > summary["created_at"]:
+            summary = imports[import_type] = {
+                "import_type": import_type,
+                "filename": filename,
+                "exported_at": exported_at,
+                "created_at": created_at,
+                "value_counts": {},
+            }
+        elif created_at < summary["created_at"]:
+            continue
+        if data_type is not None:
+            summary["value_counts"][data_type] = value_count or 0
+
+    return {
+        "project": rows[0][0],
+        "imports": sorted(imports.values(), key=lambda summary: summary["import_type"]),
+    }
+
+
 @router.put("/{project_id}", response_model=ProjectResponse)
 async def update_project(
     project_id: UUID,
@@ -199,16 +363,15 @@ async def delete_project(
     email = current_user.get("email") or ""
     user = get_or_create_user(db, current_user["user_id"], email)
     
-    # Get project and verify ownership
-    project = db.query(Project).filter(
+    # Delete the project if the user owns it - a single statement; the database
+    # cascades to file_imports and import_data without loading them
+    deleted = db.query(Project).filter(
         and_(Project.id == project_id, Project.user_id == user.id)
-    ).first()
+    ).delete(synchronize_session=False)
     
-    if not project:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Delete project
-    db.delete(project)
     db.commit()
     
     return None
@@ -0,0 +1,195 @@
+"""
+Fair scheduling of address parsing work
+
+Every call into the parsing pipeline takes a slot from the worker's scheduler
+first. Big batches are split into chunks and take one slot per chunk, so they
+give the pipeline up between chunks instead of holding it for the whole job.
+
+- Small requests (/parse-address, or batches of at most PARSE_SMALL_BATCH rows)
+  go in a priority lane: they are granted before any waiting batch chunk, and
+  PARSE_RESERVED_SLOTS slots are kept free of batch work so they never wait
+  behind a running chunk.
+- Batch chunks are granted round-robin across users, with at most
+  PARSE_USER_CONCURRENCY chunks per user running at once.
+- When PARSE_QUEUE_MAX requests are already waiting, new requests get a 429
+  with a Retry-After estimate instead of piling up.
+
+Users are told apart by their verified Clerk user when the request carries a
+valid token, and by client address otherwise. The address is the TCP peer:
+uvicorn only swaps in the X-Forwarded-For client when the peer is a trusted
+proxy (FORWARDED_ALLOW_IPS), so a client can't pick its own lane with headers
+or an unverified token. The scheduler is per worker and lives on its event loop.
+"""
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+from fastapi import HTTPException, Request
+
+import metrics
+from auth import get_request_user
+
+PARSE_MAX_CONCURRENCY = int(os.getenv("PARSE_MAX_CONCURRENCY", "4"))  # pipeline calls running at once
+PARSE_RESERVED_SLOTS = int(os.getenv("PARSE_RESERVED_SLOTS", "1"))  # slots batch chunks can't take
+PARSE_USER_CONCURRENCY = int(os.getenv("PARSE_USER_CONCURRENCY", "1"))  # batch chunks per user at once
+PARSE_QUEUE_MAX = int(os.getenv("PARSE_QUEUE_MAX", "64"))  # waiting requests before 429s
+PARSE_SMALL_BATCH = int(os.getenv("PARSE_SMALL_BATCH", "25"))  # rows that still count as interactive
+PARSE_CHUNK_SIZE = int(os.getenv("PARSE_CHUNK_SIZE", "500"))  # rows per batch chunk
+
+
+async def client_key(request: Request) -> str:
+    """Who a request counts against: the verified user if there is one, else the client address"""
+    try:
+        user = await get_request_user(request)
+    except Exception:
+        user = None  # invalid or expired token - parsing works signed out, so use the address
+    if user and user.get("user_id"):
+        return f"user:{user['user_id']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+class FairScheduler:
+    """Slot scheduler with a priority lane and per-user round-robin for batches"""
+
+    def __init__(
+        self,
+        max_concurrency: int = PARSE_MAX_CONCURRENCY,
+        reserved_slots: int = PARSE_RESERVED_SLOTS,
+        user_concurrency: int = PARSE_USER_CONCURRENCY,
+        queue_max: int = PARSE_QUEUE_MAX,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_slots = max(1, self.max_concurrency - max(0, reserved_slots))
+        self.user_concurrency = max(1, user_concurrency)
+        self.queue_max = queue_max
+        self._running = 0
+        self._running_batch = 0
+        self._running_by_user: Dict[str, int] = {}
+        self._small: Deque[asyncio.Future] = deque()
+        # user -> waiting chunks; order of the dict is the round-robin order
+        self._batch: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self._waiting = 0
+        self._hold_seconds = 0.1  # moving average of how long a slot is held
+
+    def _can_run(self, user: str, small: bool) -> bool:
+        if self._running >= self.max_concurrency:
+            return False
+        if small:
+            return True
+        return (self._running_batch < self.batch_slots
+                and self._running_by_user.get(user, 0) < self.user_concurrency)
+
+    def _grant(self, user: str, small: bool) -> None:
+        self._running += 1
+        if not small:
+            self._running_batch += 1
+            self._running_by_user[user] = self._running_by_user.get(user, 0) + 1
+
+    def _drop_cancelled(self, waiters: Deque[asyncio.Future]) -> None:
+        """Pop waiters at the head whose task was cancelled but hasn't cleaned up yet"""
+        while waiters and waiters[0].cancelled():
+            waiters.popleft()
+            self._waiting -= 1
+
+    def _dispatch(self) -> None:
+        while True:
+            self._drop_cancelled(self._small)
+            if not self._small or not self._can_run("", True):
+                break
+            self._waiting -= 1
+            self._grant("", True)
+            self._small.popleft().set_result(None)
+        # Round-robin: serve the first user that may run, then move them to the back
+        progressed = True
+        while progressed and self._batch:
+            progressed = False
+            for user in list(self._batch):
+                waiters = self._batch[user]
+                self._drop_cancelled(waiters)
+                if not waiters:
+                    del self._batch[user]
+                    continue
+                if not self._can_run(user, False):
+                    continue
+                self._waiting -= 1
+                self._grant(user, False)
+                waiters.popleft().set_result(None)
+                if waiters:
+                    self._batch.move_to_end(user)
+                else:
+                    del self._batch[user]
+                progressed = True
+                break
+
+    def retry_after(self) -> int:
+        """Seconds until a queued request would likely get a slot"""
+        return max(1, math.ceil(self._waiting * self._hold_seconds / self.max_concurrency))
+
+    def release(self, user: str, small: bool, held: float) -> None:
+        self._running -= 1
+        if not small:
+            self._running_batch -= 1
+            remaining = self._running_by_user.get(user, 1) - 1
+            if remaining:
+                self._running_by_user[user] = remaining
+            else:
+                self._running_by_user.pop(user, None)
+        self._hold_seconds = 0.8 * self._hold_seconds + 0.2 * held
+        self._dispatch()
+
+    async def acquire(self, user: str, small: bool, admit: bool = True) -> None:
+        """Wait for a slot. `admit` applies the queue limit (first chunk of a request only)."""
+        queued_ahead = self._small if small else self._batch.get(user)
+        if not queued_ahead and self._can_run(user, small):
+            self._grant(user, small)
+            return
+        if admit and self._waiting >= self.queue_max:
+            metrics.inc("parse_rejected_total")
+            raise HTTPException(
+                status_code=429,
+                detail="Address parsing is busy - retry shortly",
+                headers={"Retry-After": str(self.retry_after())},
+            )
+        future = asyncio.get_running_loop().create_future()
+        if small:
+            self._small.append(future)
+        else:
+            self._batch.setdefault(user, deque()).append(future)
+        self._waiting += 1
+        # Anything queued ahead may just be cancelled waiters - let the dispatcher decide
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(user, small, 0.0)  # granted just as we were cancelled
+            else:
+                self._discard(user, small, future)
+            raise
+
+    def _discard(self, user: str, small: bool, future: asyncio.Future) -> None:
+        """Take a cancelled waiter out of its queue, unless _dispatch already dropped it"""
+        waiters = self._small if small else self._batch.get(user)
+        if waiters is not None and future in waiters:
+            waiters.remove(future)
+            self._waiting -= 1
+            if not small and not waiters:
+                del self._batch[user]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, user: str, small: bool, admit: bool = True):
+        with metrics.stage_timer("queue"):
+            await self.acquire(user, small, admit)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(user, small, time.monotonic() - start)
+
+
+parse_scheduler = FairScheduler()
@@ -0,0 +1,87 @@
+"""
+Request coalescing for interactive address lookups
+
+SingleFlight shares one computation between concurrent callers asking for the
+same key: the first caller starts it, later callers just wait on it. If every
+caller goes away before it finishes, the computation is cancelled too, so work
+still queued in the scheduler is dropped instead of run for nobody.
+
+LatestOnly lets a client mark requests as successive versions of the same
+thing (e.g. one address field being typed into). A newer request for the same
+user and key supersedes the older one, which stops waiting and gets a 409.
+
+Both are per worker and live on its event loop.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from fastapi import HTTPException
+
+import metrics
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            metrics.inc("parse_coalesced_total")
+        flight.waiters += 1
+        try:
+            # shield: one caller leaving mustn't cancel the others' result
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()  # nobody is waiting for it any more
+
+
+class LatestOnly:
+    """Only the newest request per (user, key) gets an answer"""
+
+    def __init__(self):
+        self._latest: Dict[Tuple[str, str], asyncio.Event] = {}
+
+    async def run(self, user: str, key: str, awaitable: Awaitable[Any]) -> Any:
+        slot = (user, key)
+        superseded = asyncio.Event()
+        previous = self._latest.get(slot)
+        if previous is not None:
+            previous.set()
+        self._latest[slot] = superseded
+
+        work = asyncio.ensure_future(awaitable)
+        stop = asyncio.ensure_future(superseded.wait())
+        try:
+            done, _ = await asyncio.wait({work, stop}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop.cancel()
+            if not work.done():
+                work.cancel()
+            if self._latest.get(slot) is superseded:
+                del self._latest[slot]
+
+        if work not in done:
+            metrics.inc("parse_superseded_total")
+            raise HTTPException(status_code=409, detail="Superseded by a newer request")
+        return work.result()
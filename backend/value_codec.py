@@ -0,0 +1,142 @@
+"""
+Compact storage format for large ImportData value sets
+
+Values are sorted, de-duplicated and front-coded in fixed-size blocks; each
+block is zlib-compressed on its own and an uncompressed index of block heads
+sits up front. That allows membership checks (binary search on block heads,
+then one block decoded) and paginated reads (decode from the block holding the
+offset) without materializing the whole list.
+
+Layout (all integers big-endian):
+    header   b"FCV1" | u32 count | u16 block_size | u32 block_count
+    index    per block: u32 data_offset | u32 data_length | u16 head_length | head bytes
+    data     per block: zlib( entries ), entry = varint shared_prefix | varint suffix_length | suffix
+"""
+import zlib
+import struct
+from bisect import bisect_right
+from typing import Iterable, Iterator, List, Optional
+
+MAGIC = b"FCV1"
+DEFAULT_BLOCK_SIZE = 128
+_HEADER = struct.Struct(">4sIHI")
+_INDEX_ENTRY = struct.Struct(">IIH")
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _shared_prefix(a: bytes, b: bytes) -> int:
+    limit = min(len(a), len(b))
+    i = 0
+    while i < limit and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def encode_values(values: Iterable[str], block_size: int = DEFAULT_BLOCK_SIZE) -> bytes:
+    """Sort, de-duplicate and encode values into the compact blob format"""
+    # UTF-8 byte order matches code point order, so sorting bytes keeps both in sync
+    encoded = sorted({value.encode("utf-8") for value in values})
+    blocks = []
+    index = bytearray()
+    offset = 0
+    for start in range(0, len(encoded), block_size):
+        chunk = encoded[start:start + block_size]
+        raw = bytearray()
+        previous = b""
+        for value in chunk:
+            shared = _shared_prefix(previous, value)
+            _write_varint(raw, shared)
+            _write_varint(raw, len(value) - shared)
+            raw += value[shared:]
+            previous = value
+        compressed = zlib.compress(bytes(raw), 6)
+        head = chunk[0]
+        index += _INDEX_ENTRY.pack(offset, len(compressed), len(head)) + head
+        blocks.append(compressed)
+        offset += len(compressed)
+
+    header = _HEADER.pack(MAGIC, len(encoded), block_size, len(blocks))
+    return header + bytes(index) + b"".join(blocks)
+
+
+class CompactValues:
+    """Read-only view over an encoded blob; decodes blocks on demand"""
+
+    def __init__(self, blob: bytes):
+        blob = bytes(blob)  # psycopg hands back memoryview for bytea
+        magic, self.count, self.block_size, block_count = _HEADER.unpack_from(blob, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a compact value blob")
+        self._blob = blob
+        self._heads: List[bytes] = []
+        self._spans = []
+        pos = _HEADER.size
+        for _ in range(block_count):
+            data_offset, data_length, head_length = _INDEX_ENTRY.unpack_from(blob, pos)
+            pos += _INDEX_ENTRY.size
+            self._heads.append(blob[pos:pos + head_length])
+            pos += head_length
+            self._spans.append((data_offset, data_length))
+        self._data_start = pos
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _decode_block(self, block: int) -> List[bytes]:
+        data_offset, data_length = self._spans[block]
+        start = self._data_start + data_offset
+        raw = zlib.decompress(self._blob[start:start + data_length])
+        values = []
+        previous = b""
+        pos = 0
+        while pos < len(raw):
+            shared, pos = _read_varint(raw, pos)
+            length, pos = _read_varint(raw, pos)
+            previous = previous[:shared] + raw[pos:pos + length]
+            pos += length
+            values.append(previous)
+        return values
+
+    def __contains__(self, value: str) -> bool:
+        key = value.encode("utf-8")
+        block = bisect_right(self._heads, key) - 1
+        if block < 0:
+            return False
+        return key in self._decode_block(block)
+
+    def iter_values(self, offset: int = 0, limit: Optional[int] = None) -> Iterator[str]:
+        """Yield values in sorted order starting at offset, decoding one block at a time"""
+        if offset >= self.count or (limit is not None and limit <= 0):
+            return
+        remaining = self.count - offset if limit is None else min(limit, self.count - offset)
+        block, skip = divmod(offset, self.block_size)
+        while remaining > 0 and block < len(self._spans):
+            for value in self._decode_block(block)[skip:skip + remaining]:
+                yield value.decode("utf-8")
+                remaining -= 1
+            block += 1
+            skip = 0
+
+    def page(self, offset: int, limit: int) -> List[str]:
+        return list(self.iter_values(offset, limit))
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_values()